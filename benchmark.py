@@ -0,0 +1,469 @@
+"""
+Benchmarks of the engine operations on synthetic census-shaped data.
+
+Examples:
+    python benchmark.py                          # 100k and 1M rows
+    python benchmark.py --sizes 10m --ops split_by_column,geocode
+    python benchmark.py --label v1.4 --threshold 15 --fail-on-regression
+
+For each size a dataset is generated with a realistic PREGION..PHAMLET
+hierarchy (31 regions down to hundreds of thousands of hamlets), household
+coordinates scattered around their hamlet with a few far-off outliers,
+coordinates typed as text (degrees/minutes/seconds, decimal commas,
+swapped columns) and null tokens such as 'NA' and '#NULL!'. It is saved and
+loaded in every format, and each engine operation is then timed on the
+loaded copy, the way the GUI and nbsclean.py would run it.
+
+Every result records its wall time, rows per second and peak resident
+memory. On Linux the peak is reset before each operation, so it is that
+operation's own peak; elsewhere it is the peak of the whole run. Results
+are appended to a JSON history and compared with the latest earlier run of
+the same size, so a slower release shows up as a regression. Nothing here
+imports tkinter.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import engine
+import instrumentation
+import partitioner
+import writer_pool
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Dataset sizes selectable with --sizes
+SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Children per parent at each admin level, as (fewest, most)
+HIERARCHY_BRANCHING = [
+    ("PREGION", (31, 31)),
+    ("PDISTRICT", (4, 9)),
+    ("PCOUNCIL", (1, 2)),
+    ("PCONSTITUENCY", (1, 3)),
+    ("PDIVISION", (2, 5)),
+    ("PWARD", (3, 8)),
+    ("PVILLAGE", (2, 6)),
+    ("PHAMLET", (3, 7)),
+]
+
+# Digits of each admin level's code; codes are zero-padded text, as in the census files
+CODE_WIDTHS = {
+    "PREGION": 2, "PDISTRICT": 2, "PCOUNCIL": 1, "PCONSTITUENCY": 2,
+    "PDIVISION": 2, "PWARD": 3, "PVILLAGE": 2, "PHAMLET": 3,
+}
+
+# Spread, in degrees, of each admin level's centre around its parent's
+LEVEL_SPREAD = [1.5, 0.6, 0.2, 0.15, 0.1, 0.05, 0.02, 0.005]
+
+# Area the region centres are drawn from: (min lat, max lat, min lon, max lon)
+COUNTRY_BOUNDS = (-11.0, -1.5, 30.0, 39.5)
+
+# Spread of households around their hamlet centre, in degrees
+HOUSEHOLD_SPREAD = 0.002
+
+# Share of rows with each kind of messy value
+NULL_SHARE = 0.03
+TEXT_COORDINATE_SHARE = 0.01
+SWAPPED_SHARE = 0.005
+OUTLIER_SHARE = 0.002
+MISSING_CODE_SHARE = 0.005
+
+# Null-like values planted in the data and passed to the Replacer
+NULL_TOKENS = ["", "NA", "N/A", "#NULL!", "nan"]
+
+# Formats saved and loaded; xlsx is skipped above XLSX_MAX_ROWS since it takes minutes
+FORMATS = ("csv", "parquet", "feather", "xlsx")
+XLSX_MAX_ROWS = 1_000_000
+
+# Engine operations, timed on the loaded CSV copy
+OPERATIONS = (
+    "replace", "parse_coordinates", "fix_coordinates_mean", "fix_coordinates_group",
+    "geocode", "partition", "split_by_column",
+)
+
+# Key of the column split, as the per-region export is done in practice
+SPLIT_COLUMNS = ["PREGION", "PDISTRICT"]
+
+DEFAULT_HISTORY = "benchmark_history.json"
+
+
+def _hierarchy(rng):
+    """
+    Return one code array per admin level and the centre of every hamlet.
+
+    Codes restart at 1 under each parent, as in the census frame.
+    """
+    min_lat, max_lat, min_lon, max_lon = COUNTRY_BOUNDS
+    codes = {}
+    parents = np.zeros(1, dtype=np.int64)
+    lat = np.array([(min_lat + max_lat) / 2])
+    lon = np.array([(min_lon + max_lon) / 2])
+    for (column, (fewest, most)), spread in zip(HIERARCHY_BRANCHING, LEVEL_SPREAD):
+        children = rng.integers(fewest, most + 1, size=len(parents))
+        parent_of_child = np.repeat(np.arange(len(parents)), children)
+        # 1..k under each parent
+        local = np.arange(len(parent_of_child)) - np.repeat(np.cumsum(children) - children, children) + 1
+        for name in codes:
+            codes[name] = codes[name][parent_of_child]
+        codes[column] = local
+        if column == "PREGION":
+            lat = rng.uniform(min_lat, max_lat, size=len(local))
+            lon = rng.uniform(min_lon, max_lon, size=len(local))
+        else:
+            lat = lat[parent_of_child] + rng.normal(0, spread, size=len(local))
+            lon = lon[parent_of_child] + rng.normal(0, spread, size=len(local))
+        parents = parent_of_child
+    return codes, lat, lon
+
+
+def _dms(values, positive, negative):
+    # Degrees, minutes and seconds with a hemisphere letter, e.g. 6°48'12.5"S
+    magnitude = np.abs(values)
+    degrees = np.floor(magnitude).astype(int)
+    minutes = np.floor((magnitude - degrees) * 60).astype(int)
+    seconds = np.round(((magnitude - degrees) * 60 - minutes) * 60, 1)
+    letters = np.where(values < 0, negative, positive)
+    return [f"{d}°{m}'{s}\"{h}" for d, m, s, h in zip(degrees, minutes, seconds, letters)]
+
+
+def make_dataset(rows, seed=0):
+    """
+    Generate a census-shaped household frame.
+
+    Parameters:
+    - rows: Number of rows.
+    - seed: Seed of the random generator; the same seed gives the same data.
+
+    Returns:
+    - pd.DataFrame: PREGION..PHAMLET zero-padded text codes (a few
+      missing, as None), LAT and LON
+      as text with null tokens, DMS values, decimal commas, swapped pairs
+      and outliers, and NAME, SEX and AGE columns.
+    """
+    rng = np.random.default_rng(seed)
+    codes, hamlet_lat, hamlet_lon = _hierarchy(rng)
+
+    # Households per hamlet vary widely, so draw hamlets with uneven weights
+    weights = rng.pareto(2.0, size=len(hamlet_lat)) + 0.1
+    hamlet = rng.choice(len(hamlet_lat), size=rows, p=weights / weights.sum())
+    data = {}
+    for column, level_codes in codes.items():
+        width = CODE_WIDTHS[column]
+        labels = np.array([f"{code:0{width}d}" for code in range(level_codes.max() + 1)], dtype=object)
+        values = labels[level_codes[hamlet]]
+        values[rng.random(rows) < MISSING_CODE_SHARE] = None
+        data[column] = values
+
+    lat = hamlet_lat[hamlet] + rng.normal(0, HOUSEHOLD_SPREAD, size=rows)
+    lon = hamlet_lon[hamlet] + rng.normal(0, HOUSEHOLD_SPREAD, size=rows)
+    outliers = rng.random(rows) < OUTLIER_SHARE
+    min_lat, max_lat, min_lon, max_lon = COUNTRY_BOUNDS
+    lat[outliers] = rng.uniform(min_lat, max_lat, size=outliers.sum())
+    lon[outliers] = rng.uniform(min_lon, max_lon, size=outliers.sum())
+
+    lat_text = np.round(lat, 6).astype(object)
+    lon_text = np.round(lon, 6).astype(object)
+    swapped = np.flatnonzero(rng.random(rows) < SWAPPED_SHARE)
+    lat_text[swapped], lon_text[swapped] = lon_text[swapped], lat_text[swapped]
+    text_rows = np.flatnonzero(rng.random(rows) < TEXT_COORDINATE_SHARE)
+    dms_rows, comma_rows = text_rows[::2], text_rows[1::2]
+    lat_text[dms_rows] = _dms(lat[dms_rows], "N", "S")
+    lon_text[dms_rows] = _dms(lon[dms_rows], "E", "W")
+    lat_text[comma_rows] = [f"{value:.5f}".replace(".", ",") for value in lat[comma_rows]]
+    lon_text[comma_rows] = [f"{value:.5f}".replace(".", ",") for value in lon[comma_rows]]
+    for values in (lat_text, lon_text):
+        nulls = np.flatnonzero(rng.random(rows) < NULL_SHARE)
+        values[nulls] = np.array(NULL_TOKENS, dtype=object)[rng.integers(0, len(NULL_TOKENS), size=len(nulls))]
+    data["LAT"] = lat_text
+    data["LON"] = lon_text
+
+    names = np.array([f"HOUSEHOLD {i}" for i in range(5000)] + NULL_TOKENS, dtype=object)
+    data["NAME"] = names[rng.integers(0, len(names), size=rows)]
+    data["SEX"] = np.array(["Male", "Female"], dtype=object)[rng.integers(0, 2, size=rows)]
+    data["AGE"] = rng.integers(15, 95, size=rows)
+    return pd.DataFrame(data)
+
+
+def measure(name, rows, function, repeat=1, prepare=None):
+    """
+    Time `function` and record the peak memory while it runs.
+
+    Parameters:
+    - name: Operation name stored in the result.
+    - rows: Rows processed, for rows per second.
+    - function: Called with the value returned by `prepare`, or with no
+      arguments without it.
+    - repeat: Number of runs; the fastest time and the highest peak are kept.
+    - prepare: Optional untimed setup run before each repeat, e.g. copying
+      the frame an in-place operation modifies.
+
+    Returns:
+    - dict: 'operation', 'seconds', 'rows_per_sec', 'peak_rss_mb' and
+      'rss_scope' ('operation', or 'process' where the peak cannot be reset).
+    """
+    best, peak, scope = None, None, "process"
+    for _ in range(repeat):
+        argument = prepare() if prepare else None
+        gc.collect()
+        if instrumentation.reset_peak_rss():
+            scope = "operation"
+        start_time = time.perf_counter()
+        function(argument) if prepare else function()
+        seconds = time.perf_counter() - start_time
+        run_peak = instrumentation.peak_rss_mb()
+        best = seconds if best is None else min(best, seconds)
+        if run_peak is not None:
+            peak = run_peak if peak is None else max(peak, run_peak)
+        del argument
+    return {
+        "operation": name,
+        "seconds": round(best, 4),
+        "rows_per_sec": round(rows / best) if best else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "rss_scope": scope,
+    }
+
+
+def _format_available(file_type):
+    return file_type in ("csv", "xlsx") or HAS_PYARROW
+
+
+def run_size(rows, work_dir, formats=FORMATS, operations=OPERATIONS, repeat=1, writers=None, seed=0, log=print):
+    """
+    Generate one dataset and benchmark it.
+
+    Parameters:
+    - rows: Number of rows to generate.
+    - work_dir: Folder for the files written; emptied afterwards.
+    - formats: File types to save and load.
+    - operations: Names from OPERATIONS to time.
+    - repeat: Runs per measurement, see measure().
+    - writers: Parallel writers for split_by_column; defaults to one per CPU.
+    - seed: Seed of the generated data.
+    - log: Function receiving progress lines.
+
+    Returns:
+    - list: One result dict per measurement, see measure().
+    """
+    results = []
+
+    def record(result):
+        results.append(result)
+        log(_format_result(result))
+
+    start_time = time.perf_counter()
+    data = make_dataset(rows, seed)
+    log(f"Generated {rows:,} rows in {time.perf_counter() - start_time:.1f}s.")
+
+    for file_type in formats:
+        if not _format_available(file_type):
+            log(f"Skipping {file_type}: pyarrow is not installed.")
+            continue
+        if file_type == "xlsx" and rows > XLSX_MAX_ROWS:
+            log(f"Skipping xlsx above {XLSX_MAX_ROWS:,} rows.")
+            continue
+        path = os.path.join(work_dir, f"data.{file_type}")
+        record(measure(f"save_{file_type}", rows, lambda data=data, path=path: engine.save_dataset(data, path), repeat))
+        record(measure(f"load_{file_type}", rows,
+                       lambda path=path: engine.load_dataset(path, use_sidecar=False), repeat))
+
+    # The operations run on the data as a user would have it: loaded from CSV
+    # as text, as nbsclean.py does, so codes keep their leading zeros
+    csv_path = os.path.join(work_dir, "data.csv")
+    if not os.path.exists(csv_path):
+        engine.save_dataset(data, csv_path)
+    del data
+    loaded = engine.load_dataset(csv_path, dtype=object, use_sidecar=False)
+    split_dir = os.path.join(work_dir, "split")
+    writers = writers or writer_pool.default_workers()
+    copy = loaded.copy
+    timed = {
+        "replace": (lambda frame: engine.replace_nulls(frame, "NA", tokens=NULL_TOKENS), copy),
+        "parse_coordinates": (lambda frame: engine.parse_coordinates(frame, "LAT", "LON"), copy),
+        "fix_coordinates_mean": (lambda frame: engine.fix_coordinates(frame, "LAT", "LON"), copy),
+        "fix_coordinates_group": (lambda frame: engine.impute_coordinates(frame, "LAT", "LON"), copy),
+        "geocode": (lambda _: engine.generate_geocode(loaded, "07"), None),
+        "partition": (lambda _: partitioner.partition(loaded, SPLIT_COLUMNS), None),
+        "split_by_column": (
+            lambda _: engine.split_by_column(loaded, SPLIT_COLUMNS, "csv", "folder", split_dir,
+                                             workers=writers, resume=False),
+            lambda: shutil.rmtree(split_dir, ignore_errors=True),
+        ),
+    }
+    for name in operations:
+        function, prepare = timed[name]
+        record(measure(name, rows, function, repeat, prepare or (lambda: None)))
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir, exist_ok=True)
+    return results
+
+
+def _format_result(result):
+    peak = f"{result['peak_rss_mb']:,.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+    rate = f"{result['rows_per_sec']:,}/s" if result["rows_per_sec"] else "n/a"
+    return f"  {result['operation']:<24}{result['seconds']:>10.3f}s {rate:>16} {peak:>12}"
+
+
+def environment():
+    """
+    Return the machine and library versions stored with every run.
+    """
+    info = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow.__version__ if HAS_PYARROW else None,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info["commit"] = None
+    return info
+
+
+def load_history(path):
+    """
+    Return the runs stored in a history file, oldest first.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file).get("runs", [])
+
+
+def save_history(path, runs):
+    # Written to a temporary file first so an interrupted run cannot corrupt the history
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump({"runs": runs}, file, indent=2)
+    os.replace(temp_path, path)
+
+
+def compare(run, history, threshold):
+    """
+    Compare a run with the latest earlier run of the same size.
+
+    Parameters:
+    - run: The new run.
+    - history: Earlier runs, oldest first.
+    - threshold: Slowdown in percent above which an operation is a regression.
+
+    Returns:
+    - tuple: (list of report lines, list of regressed operation names).
+    """
+    previous = next((old for old in reversed(history) if old["rows"] == run["rows"]), None)
+    if previous is None:
+        return [f"No earlier {run['size']} run to compare with."], []
+    before = {result["operation"]: result for result in previous["results"]}
+    label = previous.get("label") or previous["environment"].get("commit") or previous["timestamp"]
+    lines = [f"Compared with {label} ({previous['timestamp']}):"]
+    regressions = []
+    for result in run["results"]:
+        old = before.get(result["operation"])
+        if old is None or not old["seconds"]:
+            continue
+        change = (result["seconds"] - old["seconds"]) * 100 / old["seconds"]
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(result["operation"])
+        lines.append(f"  {result['operation']:<24}{old['seconds']:>10.3f}s -> {result['seconds']:.3f}s ({change:+.1f}%){flag}")
+    return lines, regressions
+
+
+def _choices(text, allowed, what):
+    values = [value.strip().lower() for value in text.split(",") if value.strip()]
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {what} {', '.join(unknown)}; choose from {', '.join(allowed)}.")
+    return values
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the NBS cleaning engine on synthetic census data.")
+    parser.add_argument("--sizes", default="100k,1m", help=f"Comma-separated sizes from {', '.join(SIZES)}.")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="Comma-separated operations to time.")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma-separated formats to save and load.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per measurement; the fastest is kept.")
+    parser.add_argument("--writers", type=int, help="Parallel writers for split_by_column (default: one per CPU).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data.")
+    parser.add_argument("--work-dir", help="Folder for temporary files (default: a new temporary folder).")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON file the results are appended to.")
+    parser.add_argument("--no-history", dest="save", action="store_false", help="Do not append the results.")
+    parser.add_argument("--label", help="Name of this run in the history, e.g. a release number.")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Slowdown in percent reported as a regression (default 10).")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any operation regressed.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        sizes = _choices(args.sizes, list(SIZES), "size")
+        operations = _choices(args.ops, list(OPERATIONS), "operation")
+        formats = _choices(args.formats, list(FORMATS), "format")
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="nbsbench-")
+    os.makedirs(work_dir, exist_ok=True)
+    history = load_history(args.history)
+    info = environment()
+    regressions = []
+    try:
+        for size in sizes:
+            print(f"== {size} rows ==")
+            run = {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "label": args.label,
+                "size": size,
+                "rows": SIZES[size],
+                "environment": info,
+                "results": run_size(SIZES[size], work_dir, formats, operations, args.repeat, args.writers, args.seed),
+            }
+            lines, regressed = compare(run, history, args.threshold)
+            print("\n".join(lines))
+            regressions += [f"{size} {name}" for name in regressed]
+            history.append(run)
+            if args.save:
+                save_history(args.history, history)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save:
+        print(f"Results appended to {args.history}.")
+    if regressions:
+        print(f"Regressions over {args.threshold:g}%: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Validation of household coordinates against admin boundary polygons.
+
+Each row states its district (or ward, or any other admin level); the check
+is whether its coordinate falls inside that area's polygon. Rows are grouped
+by their stated area, and each group is tested against its one prepared
+polygon with a single vectorized `shapely.contains_xy` call, so ten million
+rows cost a few hundred batched calls rather than ten million Python-level
+tests.
+
+Only the rows that fail are then looked up in an STRtree over all polygons,
+to report which area the point actually falls in. Coordinates are expected
+in longitude/latitude (WGS84), the same system as the boundary file.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import shapely
+
+try:
+    import pyogrio
+    HAS_PYOGRIO = True
+except ImportError:
+    HAS_PYOGRIO = False
+
+
+# Column receiving the per-row result of the check
+STATUS_COLUMN = "BOUNDARY_STATUS"
+
+# Column receiving the area a mismatched point actually falls in
+FOUND_COLUMN = "BOUNDARY_FOUND"
+
+# Per-row results; an empty status means the point is inside its stated area
+STATUS_OUTSIDE = "outside"
+STATUS_NO_BOUNDARY = "no_boundary"
+STATUS_NO_COORDINATES = "no_coordinates"
+
+# Points looked up in the STRtree at once when locating mismatches
+QUERY_BATCH_ROWS = 1_000_000
+
+
+def _key_text(value):
+    # '01', '1', 1 and 1.0 all name the same area
+    if pd.isna(value):
+        return None
+    text = str(value).strip()
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return str(int(number)) if number.is_integer() else text
+
+
+def area_keys(columns):
+    """
+    Return one text key per row identifying an area.
+
+    Parameters:
+    - columns: List of Series (e.g. PREGION and PDISTRICT) that together
+      name an area. Each distinct value is normalised once.
+
+    Returns:
+    - np.ndarray: Object array of keys joined with '|', None where any part is missing.
+    """
+    parts = []
+    for values in columns:
+        codes, uniques = pd.factorize(values)
+        texts = np.array([_key_text(value) for value in uniques] + [None], dtype=object)
+        parts.append(texts.take(codes))
+    keys = parts[0].copy()
+    missing = pd.isna(keys)
+    for part in parts[1:]:
+        missing |= pd.isna(part)
+        keys = np.where(missing, None, keys.astype(str) + "|" + part.astype(str))
+    keys[missing] = None
+    return keys
+
+
+class Boundaries:
+    def __init__(self, keys, geometries):
+        """
+        Admin area polygons indexed by area key.
+
+        Features sharing a key are merged into one geometry, and every
+        geometry is prepared once so repeated containment tests are fast.
+
+        Parameters:
+        - keys: Area key of each feature, as built by area_keys().
+        - geometries: Shapely polygons or multipolygons, one per feature.
+        """
+        merged = {}
+        for key, geometry in zip(keys, geometries):
+            if key is not None and geometry is not None:
+                merged.setdefault(key, []).append(geometry)
+        self.keys = list(merged)
+        self.geometries = np.array(
+            [parts[0] if len(parts) == 1 else shapely.union_all(parts) for parts in merged.values()],
+            dtype=object,
+        )
+        shapely.prepare(self.geometries)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.tree = shapely.STRtree(self.geometries)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def _read_features(file_path):
+    """
+    Return (property columns dict, geometry array) from a boundary file.
+    """
+    if file_path.lower().endswith((".geojson", ".json")):
+        with open(file_path, "r", encoding="utf-8") as file:
+            features = json.load(file).get("features", [])
+        geometries = np.array(
+            [shapely.geometry.shape(feature["geometry"]) if feature.get("geometry") else None for feature in features],
+            dtype=object,
+        )
+        properties = pd.DataFrame([feature.get("properties") or {} for feature in features])
+        return properties, geometries
+    if not HAS_PYOGRIO:
+        raise ValueError("Reading shapefiles requires pyogrio (pip install pyogrio); GeoJSON files work without it.")
+    meta, _, geometry, field_data = pyogrio.raw.read(file_path)
+    properties = pd.DataFrame(dict(zip(meta["fields"], field_data)))
+    return properties, shapely.from_wkb(geometry)
+
+
+def load_boundaries(file_path, properties):
+    """
+    Load admin area polygons from a GeoJSON file or a shapefile.
+
+    Parameters:
+    - file_path: Path to a .geojson/.json file or any file pyogrio reads (.shp, .gpkg).
+    - properties: Feature properties that name an area, matching the data
+      columns used in validate_points() (e.g. ['REGION', 'DISTRICT']).
+
+    Returns:
+    - Boundaries: The indexed polygons.
+
+    Raises:
+    - ValueError: If the file has no features or lacks a property.
+    """
+    table, geometries = _read_features(file_path)
+    if not len(geometries):
+        raise ValueError(f"No boundary features found in '{file_path}'.")
+    missing = [name for name in properties if name not in table.columns]
+    if missing:
+        raise ValueError(f"Boundary file has no property {', '.join(missing)}; "
+                         f"available: {', '.join(map(str, table.columns))}")
+    return Boundaries(area_keys([table[name] for name in properties]), geometries)
+
+
+def _locate(boundaries, lon, lat):
+    # The first area containing each point, or None; only called for mismatches
+    found = np.full(len(lon), None, dtype=object)
+    keys = np.array(boundaries.keys + [None], dtype=object)
+    for start in range(0, len(lon), QUERY_BATCH_ROWS):
+        points = shapely.points(lon[start:start + QUERY_BATCH_ROWS], lat[start:start + QUERY_BATCH_ROWS])
+        point_index, area_index = boundaries.tree.query(points, predicate="within")
+        # Keep the first hit per point; later hits are overlapping areas
+        first = np.unique(point_index, return_index=True)[1]
+        found[start + point_index[first]] = keys[area_index[first]]
+    return found
+
+
+def validate_points(data, lat_col, lon_col, columns, boundaries, status_column=STATUS_COLUMN,
+                    found_column=FOUND_COLUMN):
+    """
+    Flag rows whose coordinate lies outside the polygon of their stated area.
+
+    Parameters:
+    - data: The DataFrame to check; the status columns are added in place.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+    - columns: Data columns naming each row's area, in the same order as
+      the properties given to load_boundaries().
+    - boundaries: Polygons from load_boundaries().
+    - status_column: Receives '' (inside), 'outside', 'no_boundary' or 'no_coordinates'.
+    - found_column: Receives, for 'outside' rows, the area the point is in.
+
+    Returns:
+    - dict: Row counts with keys 'inside', 'outside', 'no_boundary' and 'no_coordinates'.
+    """
+    lat = pd.to_numeric(data[lat_col], errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(data[lon_col], errors="coerce").to_numpy(dtype=float)
+    keys = area_keys([data[col] for col in columns])
+
+    # Stated area of every row as an index into the polygons, -1 if it has none
+    key_codes, key_uniques = pd.factorize(keys)
+    area_of_unique = np.array([boundaries.index.get(key, -1) for key in key_uniques] + [-1], dtype=np.int64)
+    area = area_of_unique.take(key_codes)
+
+    has_coordinates = ~(np.isnan(lat) | np.isnan(lon))
+    testable = has_coordinates & (area >= 0)
+    inside = np.zeros(len(data), dtype=bool)
+    order = np.flatnonzero(testable)
+    order = order[np.argsort(area[order], kind="stable")]
+    if len(order):
+        # One vectorized call per stated area, over the rows sorted by area
+        sorted_area = area[order]
+        starts = np.flatnonzero(np.r_[True, sorted_area[1:] != sorted_area[:-1]])
+        for start, stop in zip(starts, np.r_[starts[1:], len(order)]):
+            rows = order[start:stop]
+            inside[rows] = shapely.contains_xy(boundaries.geometries[sorted_area[start]], lon[rows], lat[rows])
+
+    outside = testable & ~inside
+    status = np.full(len(data), "", dtype=object)
+    status[~has_coordinates] = STATUS_NO_COORDINATES
+    status[has_coordinates & (area < 0)] = STATUS_NO_BOUNDARY
+    status[outside] = STATUS_OUTSIDE
+    found = np.full(len(data), "", dtype=object)
+    rows = np.flatnonzero(outside)
+    if len(rows):
+        located = _locate(boundaries, lon[rows], lat[rows])
+        found[rows] = np.where(pd.isna(located), "", located)
+
+    if status_column:
+        data[status_column] = pd.Series(status, index=data.index, dtype=object)
+    if found_column:
+        data[found_column] = pd.Series(found, index=data.index, dtype=object)
+    return {
+        "inside": int(inside.sum()),
+        "outside": int(outside.sum()),
+        "no_boundary": int((has_coordinates & (area < 0)).sum()),
+        "no_coordinates": int((~has_coordinates).sum()),
+    }
+
+
+def format_report(report):
+    """
+    Return a one-line summary of a validation report for the logs.
+    """
+    return (f"Boundary check: {report['inside']} inside their area, {report['outside']} outside, "
+            f"{report['no_boundary']} with no matching boundary, {report['no_coordinates']} without coordinates.")
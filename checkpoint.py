@@ -0,0 +1,161 @@
+"""
+Checkpointing for folder exports, so an interrupted split can be resumed.
+
+A split into thousands of files that dies halfway (full disk, app closed,
+cancelled) should not have to start over. Every output file is written
+under a temporary name next to its target and renamed into place only once
+it is complete, so a file with its final name is never partial. After each
+rename, one line recording the file's relative path, size and SHA-256 is
+appended to a manifest in the output folder.
+
+The manifest starts with a fingerprint of the job: the split columns, the
+output format and a hash of the data itself. A later run with the same
+fingerprint skips every file the manifest lists whose size and SHA-256 on
+disk still match; a run on different data starts a new manifest. A manifest cut off
+mid-line by a crash loses only its last entry, whose file is rewritten.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+
+# Manifest kept in the output folder of a checkpointed export
+MANIFEST_NAME = ".nbs_split_manifest.jsonl"
+
+# Infix of the temporary name a file is written under before it is renamed
+PARTIAL_SUFFIX = ".partial"
+
+# Block size used when checksumming a written file
+CHECKSUM_BLOCK_BYTES = 1024 * 1024
+
+
+def data_fingerprint(data):
+    """
+    Return a hex digest of a DataFrame's columns, dtypes and values.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in data.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def partial_path(file_name):
+    """
+    Return the temporary path a file is written under. The extension is
+    kept, since the writer picks the format from it.
+    """
+    folder, base = os.path.split(file_name)
+    stem, ext = os.path.splitext(base)
+    return os.path.join(folder, f".{stem}{PARTIAL_SUFFIX}{ext}")
+
+
+def file_checksum(file_path):
+    """
+    Return the SHA-256 hex digest of a file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(CHECKSUM_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_atomic(data, file_name, write_function):
+    """
+    Write `data` to a temporary file, then rename it to `file_name`.
+
+    Module-level so it can be sent to writer processes.
+
+    Parameters:
+    - data: The DataFrame to write.
+    - file_name: Final path of the file.
+    - write_function: Function taking (data, path) that writes the file.
+
+    Returns:
+    - dict: The file's 'size' in bytes and 'sha256' checksum.
+    """
+    temp_name = partial_path(file_name)
+    try:
+        write_function(data, temp_name)
+        size = os.path.getsize(temp_name)
+        checksum = file_checksum(temp_name)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    return {"size": size, "sha256": checksum}
+
+
+class SplitCheckpoint:
+    def __init__(self, folder, job, resume=True):
+        """
+        Open the manifest of an export into `folder`.
+
+        Parameters:
+        - folder: The output folder; the manifest is kept inside it.
+        - job: JSON-serialisable dict identifying the export, e.g. the
+          split columns, file type and data_fingerprint() of the data.
+        - resume: Reuse the files recorded by an earlier run of the same
+          job. With False, or when the job differs, a new manifest is started.
+        """
+        self.folder = folder
+        self.job = json.loads(json.dumps(job))
+        self.path = os.path.join(folder, MANIFEST_NAME)
+        self.completed = self._read() if resume else {}
+        if not self.completed:
+            with open(self.path, "w", encoding="utf-8") as manifest:
+                manifest.write(json.dumps({"job": self.job}) + "\n")
+
+    def _read(self):
+        # Entries of an earlier run of the same job, by relative path
+        try:
+            with open(self.path, "r", encoding="utf-8") as manifest:
+                lines = manifest.read().splitlines()
+        except OSError:
+            return {}
+        entries = {}
+        for number, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut off by a crash; its file is written again
+                continue
+            if number == 0:
+                if record.get("job") != self.job:
+                    return {}
+            elif "file" in record:
+                entries[record["file"]] = record
+        return entries
+
+    def _relative(self, file_name):
+        return os.path.relpath(file_name, self.folder).replace(os.sep, "/")
+
+    def is_done(self, file_name):
+        """
+        Return True if the file was completed by an earlier run and its
+        size and checksum on disk still match the manifest. The size is
+        compared first, so most changed files are not read.
+        """
+        entry = self.completed.get(self._relative(file_name))
+        if entry is None:
+            return False
+        try:
+            return os.path.getsize(file_name) == entry["size"] and file_checksum(file_name) == entry["sha256"]
+        except OSError:
+            return False
+
+    def record(self, file_name, result):
+        """
+        Append a completed file to the manifest.
+
+        Parameters:
+        - file_name: Path of the file, inside the output folder.
+        - result: The dict returned by write_atomic().
+        """
+        entry = {"file": self._relative(file_name), "size": result["size"], "sha256": result["sha256"]}
+        self.completed[entry["file"]] = entry
+        with open(self.path, "a", encoding="utf-8") as manifest:
+            manifest.write(json.dumps(entry) + "\n")
@@ -0,0 +1,152 @@
+"""
+Memory-compact dtypes for loaded datasets.
+
+Census extracts repeat a handful of region, district and ward values over
+millions of rows, and hold them as one Python string object per cell. A
+compact load stores such columns instead as:
+
+- `category` when a column has few distinct values relative to its rows;
+- `string[pyarrow]` for free text, one contiguous Arrow buffer per column;
+- the smallest integer type that holds every value, and `float32` for
+  floats only when no value changes in the conversion.
+
+CSV sources are planned from a sample of their first rows, so the full
+parse builds the compact columns directly instead of converting afterwards.
+Text values are never changed: a text load (dtype=object) only becomes
+categorical or Arrow strings, never numbers.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = None
+
+# Rows read from a CSV to choose the dtypes of the full parse
+SAMPLE_ROWS = 100_000
+
+# Columns with at most this many distinct values per row become categorical
+CATEGORY_MAX_RATIO = 0.5
+
+
+def memory_usage(data):
+    """
+    Return the memory used by a DataFrame in bytes, including Python strings.
+    """
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def format_bytes(size):
+    """
+    Return a byte count as a short human-readable string.
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def _is_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if not pd.api.types.is_object_dtype(series.dtype):
+        # is_string_dtype is also true for object columns, so it is only asked here
+        return pd.api.types.is_string_dtype(series.dtype)
+    # Object columns mixing numbers and text are left alone
+    values = series.dropna()
+    return bool(values.map(type).eq(str).all()) if len(values) else False
+
+
+def _text_dtype(series):
+    """
+    Return 'category' or the Arrow string dtype for a text column, or None
+    to leave it as it is.
+    """
+    count = series.count()
+    if count and series.nunique() <= count * CATEGORY_MAX_RATIO:
+        return "category"
+    return TEXT_DTYPE
+
+
+def plan_csv_dtypes(sample):
+    """
+    Choose the dtypes of a full CSV parse from a sample of its rows.
+
+    Parameters:
+    - sample: The first rows of the file, parsed the same way as the full
+      load (with dtype=object for text loads).
+
+    Returns:
+    - dict: Column name to dtype for the text columns. Numeric columns are
+      left to the parser and downcast after loading.
+    """
+    plan = {}
+    for col in sample.columns:
+        if _is_text(sample[col]):
+            dtype = _text_dtype(sample[col])
+            if dtype is not None:
+                plan[col] = dtype
+    return plan
+
+
+def _downcast(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+        narrowed = series.astype(np.float32)
+        # Coordinates and other measured values keep their full precision
+        if narrowed.astype(series.dtype).equals(series):
+            return narrowed
+    return series
+
+
+def compact_frame(data):
+    """
+    Convert a loaded DataFrame to compact dtypes, column by column.
+
+    Returns:
+    - pd.DataFrame: A frame with the same values in smaller dtypes.
+    """
+    columns = {}
+    for col in data.columns:
+        series = data[col]
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            series = _downcast(series)
+        elif _is_text(series):
+            dtype = _text_dtype(series)
+            if dtype is not None:
+                series = series.astype(dtype)
+        columns[col] = series
+    return pd.DataFrame(columns, index=data.index)
+
+
+def dtype_summary(data):
+    """
+    Return a one-line count of the column kinds in a compact frame.
+    """
+    kinds = {}
+    for dtype in data.dtypes:
+        if isinstance(dtype, pd.CategoricalDtype):
+            kind = "categorical"
+        elif pd.api.types.is_string_dtype(dtype):
+            kind = "text"
+        elif pd.api.types.is_numeric_dtype(dtype):
+            kind = "numeric"
+        else:
+            kind = "other"
+        kinds[kind] = kinds.get(kind, 0) + 1
+    return ", ".join(f"{count} {kind}" for kind, count in kinds.items())
+
+
+def memory_report(before, after, estimated=False):
+    """
+    Return a log line comparing memory use before and after compaction.
+    """
+    ratio = before / after if after else 0
+    label = "estimated " if estimated else ""
+    return (f"Compact load: {format_bytes(after)} in memory instead of {label}{format_bytes(before)} "
+            f"({ratio:.1f}x smaller).")
@@ -0,0 +1,205 @@
+"""
+Parsing of latitude and longitude values typed in many different ways.
+
+`pd.to_numeric(errors="coerce")` turns values such as `6°48'S`, `-6,7924`
+or `39.28 E` into NaN. Here a column is parsed in two passes:
+
+1. plain numbers are converted at C speed: with pyarrow, one regex match
+   and one cast over an Arrow copy of the column, otherwise
+   `pd.to_numeric`;
+2. only the values it could not convert are factorized, and each distinct
+   text is matched once with a single regular expression through
+   `Series.str.extract`, which reads degrees/minutes/seconds, hemisphere
+   letters (before or after the number) and decimal commas.
+
+Hemisphere letters also tell which axis a value belongs to, so a pair of
+columns can be checked for swapped values: a row is swapped when its
+latitude carries E/W (or its longitude N/S), when its latitude is beyond
+±90 but its longitude is not, or when only the swapped pair lies inside an
+expected bounding box. Every row gets a status describing how it was read.
+"""
+import numpy as np
+import pandas as pd
+
+import nulls
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Column receiving how each row's coordinates were read
+STATUS_COLUMN = "COORD_PARSE"
+
+# Row statuses, least to most severe; a row gets the worst of its two values
+STATUS_LABELS = ["ok", "text", "dms", "swapped", "missing", "out_of_range", "invalid"]
+OK, TEXT, DMS, SWAPPED, MISSING, OUT_OF_RANGE, INVALID = range(len(STATUS_LABELS))
+
+# Axis implied by a hemisphere letter
+NO_AXIS, LAT_AXIS, LON_AXIS = 0, 1, 2
+
+# Plain numbers that the fast pass converts directly
+PLAIN_NUMBER_PATTERN = r"^[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?$"
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+
+# Optional hemisphere, sign, degrees, optional minutes and seconds, optional hemisphere
+COORDINATE_PATTERN = (
+    r"^\s*(?P<pre>[NSEWnsew])?\s*(?P<sign>[-+])?\s*(?P<deg>" + _NUMBER + r")\s*(?:[°º˚:]\s*|\s+)?"
+    r"(?:(?P<min>" + _NUMBER + r")\s*(?:['′’:]\s*|\s+)?"
+    r"(?:(?P<sec>" + _NUMBER + r")\s*(?:[\"″”]|'')?)?)?"
+    r"\s*(?P<post>[NSEWnsew])?\s*$"
+)
+
+
+def _plain_numbers(values):
+    # Values that are not plain numbers come back as NaN
+    if HAS_PYARROW:
+        try:
+            text = pa.array(values, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            text = None
+        if text is not None:
+            plain = pc.match_substring_regex(text, PLAIN_NUMBER_PATTERN)
+            numbers = pc.cast(pc.if_else(plain, text, None), pa.float64())
+            return numbers.to_numpy(zero_copy_only=False).copy()
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan, copy=True)
+
+
+def _number(text):
+    return pd.to_numeric(text.str.replace(",", ".", regex=False), errors="coerce").to_numpy(dtype=float)
+
+
+def _parse_text(texts):
+    """
+    Parse distinct non-numeric texts.
+
+    Returns:
+    - tuple: (values, status codes, axis codes) arrays, one entry per text.
+    """
+    parts = texts.str.extract(COORDINATE_PATTERN)
+    degrees, minutes, seconds = _number(parts["deg"]), _number(parts["min"]), _number(parts["sec"])
+    pre, post = parts["pre"].str.upper(), parts["post"].str.upper()
+    hemisphere = pre.fillna(post).to_numpy(dtype=object)
+
+    has_minutes, has_seconds = ~np.isnan(minutes), ~np.isnan(seconds)
+    with np.errstate(invalid="ignore"):
+        valid = (
+            ~np.isnan(degrees)
+            & ~(pre.notna() & post.notna() & (pre != post)).to_numpy(dtype=bool)
+            & ~(has_minutes & ((minutes >= 60) | (degrees % 1 != 0)))
+            & ~(has_seconds & ((seconds >= 60) | (minutes % 1 != 0)))
+        )
+    values = degrees + np.nan_to_num(minutes) / 60 + np.nan_to_num(seconds) / 3600
+    negative = (parts["sign"] == "-").to_numpy(dtype=bool) | np.isin(hemisphere, ["S", "W"])
+    values = np.where(negative, -values, values)
+    values[~valid] = np.nan
+
+    status = np.where(valid, np.where(has_minutes, DMS, TEXT), INVALID).astype(np.int8)
+    axis = np.select([np.isin(hemisphere, ["N", "S"]), np.isin(hemisphere, ["E", "W"])],
+                     [LAT_AXIS, LON_AXIS], NO_AXIS).astype(np.int8)
+    axis[~valid] = NO_AXIS
+    return values, status, axis
+
+
+def parse_values(values):
+    """
+    Parse one coordinate column.
+
+    Parameters:
+    - values: A Series of numbers or text.
+
+    Returns:
+    - tuple: (float array, status code array, axis code array). Statuses
+      are indices into STATUS_LABELS; axes are NO_AXIS, LAT_AXIS or LON_AXIS.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        parsed = values.to_numpy(dtype=float, na_value=np.nan)
+        return parsed, np.where(np.isnan(parsed), MISSING, OK).astype(np.int8), np.zeros(len(values), dtype=np.int8)
+
+    parsed = _plain_numbers(values)
+    status = np.zeros(len(values), dtype=np.int8)
+    axis = np.zeros(len(values), dtype=np.int8)
+    rest = np.flatnonzero(np.isnan(parsed))
+    if len(rest):
+        missing = nulls.null_mask(values.iloc[rest], strip_whitespace=True)
+        status[rest[missing]] = MISSING
+        rows = rest[~missing]
+        if len(rows):
+            # Each distinct text is matched once
+            codes, uniques = pd.factorize(values.iloc[rows])
+            texts = pd.Series(np.asarray(uniques, dtype=object)).astype(str).astype(object)
+            text_values, text_status, text_axis = _parse_text(texts)
+            parsed[rows] = text_values.take(codes)
+            status[rows] = text_status.take(codes)
+            axis[rows] = text_axis.take(codes)
+    return parsed, status, axis
+
+
+def _inside(lat, lon, bounds):
+    min_lat, max_lat, min_lon, max_lon = bounds
+    return (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+
+
+def parse_pair(lat_values, lon_values, bounds=None):
+    """
+    Parse a latitude and a longitude column and repair swapped rows.
+
+    Parameters:
+    - lat_values: Series holding the latitudes.
+    - lon_values: Series holding the longitudes.
+    - bounds: Optional (min lat, max lat, min lon, max lon) the data is
+      expected to lie in; rows that only fit it once swapped are swapped.
+
+    Returns:
+    - tuple: (latitude array, longitude array, status code array).
+      Out-of-range values are NaN.
+    """
+    lat, lat_status, lat_axis = parse_values(lat_values)
+    lon, lon_status, lon_axis = parse_values(lon_values)
+
+    both = ~(np.isnan(lat) | np.isnan(lon))
+    swapped = ((lat_axis == LON_AXIS) & (lon_axis != LON_AXIS)) | ((lon_axis == LAT_AXIS) & (lat_axis != LAT_AXIS))
+    swapped |= both & (np.abs(lat) > 90) & (np.abs(lon) <= 90)
+    if bounds is not None:
+        swapped |= both & ~_inside(lat, lon, bounds) & _inside(lon, lat, bounds)
+    lat, lon = np.where(swapped, lon, lat), np.where(swapped, lat, lon)
+
+    out_of_range = (np.abs(lat) > 90) | (np.abs(lon) > 180)
+    lat[out_of_range] = np.nan
+    lon[out_of_range] = np.nan
+
+    status = np.maximum(lat_status, lon_status)
+    status = np.where(swapped, np.maximum(status, SWAPPED), status)
+    status = np.where(out_of_range, np.maximum(status, OUT_OF_RANGE), status).astype(np.int8)
+    return lat, lon, status
+
+
+def status_labels(status):
+    """
+    Return the text labels of status codes as an object array.
+    """
+    return np.array(STATUS_LABELS, dtype=object).take(status)
+
+
+def count_statuses(status, total=None):
+    """
+    Count rows per status label, adding into `total` when given (e.g. across chunks).
+    """
+    total = {} if total is None else total
+    for label, count in zip(STATUS_LABELS, np.bincount(status, minlength=len(STATUS_LABELS))):
+        total[label] = total.get(label, 0) + int(count)
+    return total
+
+
+def format_report(counts):
+    """
+    Return a one-line summary of parse status counts for the logs.
+    """
+    parts = [f"{label}: {counts[label]}" for label in STATUS_LABELS if counts.get(label)]
+    return f"Coordinates parsed ({', '.join(parts) or 'no rows'})."
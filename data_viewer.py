@@ -0,0 +1,168 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import pandas as pd
+import row_source
+
+
+# Fallback row height in pixels before the tree has been drawn
+ROW_HEIGHT = 20
+
+# Width of a data column in pixels
+COLUMN_WIDTH = 120
+
+
+class DataViewerWindow:
+    def __init__(self, root, source, title="Data Viewer"):
+        """
+        Initialize the paged Data Viewer window.
+
+        Only the rows that fit in the window are ever turned into widgets;
+        scrolling fetches the next page from the row source, so the window
+        opens in the same time for a hundred rows or a hundred million.
+
+        Parameters:
+        - root: The main application root.
+        - source: A row source from row_source.py.
+        - title: Window title.
+        """
+        self.root = root
+        self.view = row_source.RowView(source)
+        self.top = 0
+        self.visible_rows = 25
+        self.sort_column = None
+        self.sort_ascending = True
+
+        # Create the Data Viewer window
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("1200x600")
+
+        # Initialize UI
+        self.initialize_ui()
+        self.render()
+
+    def initialize_ui(self):
+        """
+        Set up the filter bar, the row table and the status line.
+        """
+        # Filter bar
+        frame_filter = ttk.Frame(self.window, padding=(10, 10, 10, 0))
+        frame_filter.pack(fill=tk.X)
+        ttk.Label(frame_filter, text="Filter column:").pack(side=tk.LEFT)
+        self.filter_column = tk.StringVar()
+        ttk.Combobox(frame_filter, textvariable=self.filter_column, values=self.view.source.columns, state="readonly", width=25).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_filter, text="contains:").pack(side=tk.LEFT)
+        self.filter_text = tk.StringVar()
+        filter_entry = ttk.Entry(frame_filter, textvariable=self.filter_text, width=30)
+        filter_entry.pack(side=tk.LEFT, padx=5)
+        filter_entry.bind("<Return>", lambda event: self.apply_filter())
+        ttk.Button(frame_filter, text="Apply", command=self.apply_filter).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_filter, text="Clear", command=self.clear_filter).pack(side=tk.LEFT, padx=5)
+
+        # Row table: the scrollbar tracks the whole view, the tree only holds one page
+        frame_table = ttk.Frame(self.window, padding=(10, 10))
+        frame_table.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(frame_table, columns=self.view.source.columns, selectmode="browse")
+        self.tree.heading("#0", text="Row")
+        self.tree.column("#0", width=90, stretch=False)
+        for col in self.view.source.columns:
+            self.tree.heading(col, text=col, command=lambda col=col: self.sort_by(col))
+            self.tree.column(col, width=COLUMN_WIDTH, stretch=False)
+
+        self.scrollbar = ttk.Scrollbar(frame_table, orient=tk.VERTICAL, command=self.on_scroll)
+        x_scrollbar = ttk.Scrollbar(frame_table, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.config(xscrollcommand=x_scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_rows(-1 if event.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-1, "units"))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(1, "units"))
+        self.tree.bind("<Prior>", lambda event: self.scroll_rows(-1, "pages"))
+        self.tree.bind("<Next>", lambda event: self.scroll_rows(1, "pages"))
+
+        # Status line
+        self.status = ttk.Label(self.window, anchor="w", padding=(10, 0, 10, 10))
+        self.status.pack(fill=tk.X)
+
+    def render(self):
+        """
+        Fetch the visible page from the row source and redraw the table.
+        """
+        total = len(self.view)
+        self.top = max(0, min(self.top, total - self.visible_rows))
+        positions, page = self.view.page(self.top, self.top + self.visible_rows)
+
+        self.tree.delete(*self.tree.get_children())
+        for position, row in zip(positions, page.itertuples(index=False, name=None)):
+            values = ["" if pd.isna(value) else str(value) for value in row]
+            self.tree.insert("", tk.END, text=str(position + 1), values=values)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        last = min(self.top + self.visible_rows, total)
+        self.status.config(text=f"Rows {self.top + 1 if total else 0}-{last} of {total:,}"
+                                + (f" (filtered from {len(self.view.source):,})" if total != len(self.view.source) else ""))
+
+    def on_scroll(self, *args):
+        """
+        Scrollbar callback: 'moveto <fraction>' or 'scroll <n> units|pages'.
+        """
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.view))
+            self.render()
+        elif args[0] == "scroll":
+            self.scroll_rows(int(args[1]), args[2])
+
+    def scroll_rows(self, amount, what):
+        step = self.visible_rows if what == "pages" else 3
+        self.top += amount * step
+        self.render()
+        return "break"
+
+    def on_resize(self, event):
+        bbox = self.tree.bbox(self.tree.get_children()[0]) if self.tree.get_children() else None
+        row_height = bbox[3] if bbox else ROW_HEIGHT
+        visible_rows = max(1, event.height // row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def sort_by(self, column):
+        """
+        Sort by a column; clicking the same header again reverses the order.
+        """
+        self.sort_ascending = not self.sort_ascending if column == self.sort_column else True
+        self.sort_column = column
+        try:
+            self.view.sort(column, self.sort_ascending)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not sort by '{column}': {e}")
+            return
+        for col in self.view.source.columns:
+            arrow = (" ▲" if self.sort_ascending else " ▼") if col == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.top = 0
+        self.render()
+
+    def apply_filter(self):
+        column = self.filter_column.get()
+        if not column:
+            messagebox.showerror("Error", "Please select a column to filter.")
+            return
+        self.view.filter(column, self.filter_text.get())
+        self.top = 0
+        self.render()
+
+    def clear_filter(self):
+        self.view.reset()
+        self.sort_column = None
+        for col in self.view.source.columns:
+            self.tree.heading(col, text=col)
+        self.filter_text.set("")
+        self.top = 0
+        self.render()
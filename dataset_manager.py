@@ -0,0 +1,161 @@
+"""
+Shared in-memory dataset for the tool windows.
+
+The main window and every tool borrow the same DataFrame from a single
+DatasetManager instead of parsing the file again, so edits made by the
+Replacer, Fix Coordinate or Geocode tools are visible to the Splitter. The
+main window parses files as text (dtype=object), as nbsclean.py does, so
+the shared copy keeps codes such as '007' exactly as written.
+Parsed files are also cached by path, modification time and size, and the
+least recently used entries are evicted once the cache passes its memory
+limit.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import compact
+import engine
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def default_memory_limit():
+    """
+    Return a cache limit of a quarter of physical memory, or 2 GB when the
+    amount of memory cannot be determined.
+    """
+    if psutil is not None:
+        return psutil.virtual_memory().total // 4
+    return 2 * 1024 ** 3
+
+
+class DatasetManager:
+    def __init__(self, memory_limit=None, log_callback=None):
+        """
+        Initialize the dataset manager.
+
+        Parameters:
+        - memory_limit: Maximum bytes held by cached files, excluding the
+          current dataset. Defaults to a quarter of physical memory.
+        - log_callback: Optional function receiving cache messages.
+        """
+        self.memory_limit = memory_limit or default_memory_limit()
+        self.log_callback = log_callback or (lambda message: None)
+        self.current = None
+        self.current_path = None
+        self.current_dtype = None
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def file_key(file_path, dtype=None):
+        """
+        Return the cache key of a file: its absolute path, modification time
+        and size, plus the dtype it was parsed with. load() also appends the
+        sheet and column selection.
+        """
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, str(dtype)
+
+    def load(self, file_path, dtype=None, progress_callback=None, **options):
+        """
+        Return the parsed contents of a file, from the cache when the file
+        has not changed since it was last parsed.
+
+        Parameters:
+        - file_path: Path of the file to load.
+        - dtype: Optional dtype passed through to the reader.
+        - progress_callback: Optional function receiving a 0-100 percentage.
+        - options: Extra keyword arguments for engine.load_dataset.
+
+        Returns:
+        - pd.DataFrame: The loaded data. It is shared, not copied.
+        """
+        selection = sorted((name, value) for name, value in options.items() if not callable(value))
+        key = self.file_key(file_path, dtype) + (repr(selection),)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.log_callback(f"Using cached copy of {os.path.basename(file_path)}.")
+                if progress_callback:
+                    progress_callback(100)
+                return self._cache[key][0]
+
+        data = engine.load_dataset(file_path, dtype=dtype, progress_callback=progress_callback, **options)
+        with self._lock:
+            self._cache[key] = (data, compact.memory_usage(data))
+            self._evict()
+        return data
+
+    def set_current(self, data, file_path=None, dtype=None):
+        """
+        Make `data` the dataset every tool window works on.
+
+        Parameters:
+        - data: The DataFrame to share.
+        - file_path: Optional path of the file it was loaded from.
+        - dtype: The dtype the file was parsed with; None for inferred types.
+        """
+        with self._lock:
+            self.current = data
+            if file_path is not None:
+                self.current_path = os.path.abspath(file_path)
+                self.current_dtype = dtype
+
+    def borrow(self, file_path=None, dtype=None):
+        """
+        Return the current dataset, optionally only if it came from `file_path`.
+
+        Parameters:
+        - file_path: Optional path the dataset must have been loaded from.
+        - dtype: Optional dtype it must have been parsed with. Tools that need
+          the values exactly as written, such as zero-padded codes, pass
+          object; a frame loaded with inferred types is then not returned.
+
+        Returns:
+        - pd.DataFrame or None: The shared current dataset.
+        """
+        with self._lock:
+            if file_path is not None and self.current_path != os.path.abspath(file_path):
+                return None
+            if dtype is not None and str(self.current_dtype) != str(dtype):
+                return None
+            return self.current
+
+    def update(self, data):
+        """
+        Replace the current dataset after a tool has edited it.
+
+        The edited frame no longer matches the file on disk, so any cached
+        parse of the current file that shares its memory is dropped.
+        """
+        with self._lock:
+            previous = self.current
+            self.current = data
+            for key, (cached, _) in list(self._cache.items()):
+                if cached is previous or cached is data:
+                    del self._cache[key]
+
+    def cached_bytes(self):
+        """
+        Return the memory held by cached files in bytes.
+        """
+        with self._lock:
+            return sum(size for _, size in self._cache.values())
+
+    def clear(self):
+        """
+        Drop every cached file. The current dataset is kept.
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def _evict(self):
+        # The newest entry always stays, even if it alone exceeds the limit
+        while len(self._cache) > 1 and self.cached_bytes() > self.memory_limit:
+            key, _ = self._cache.popitem(last=False)
+            self.log_callback(f"Evicted {os.path.basename(key[0])} from the dataset cache.")
@@ -0,0 +1,159 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import duplicates
+import engine
+import writer_pool
+
+
+class DeduplicatorWindow:
+    def __init__(self, root, data, log_callback, update_data_callback, task_runner):
+        """
+        Initialize the Deduplicate Tool window.
+
+        Parameters:
+        - root: The main application root.
+        - data: The DataFrame loaded in the main application.
+        - log_callback: Function to log messages to the main log screen.
+        - update_data_callback: Function to update the DataFrame in the main application.
+        - task_runner: The application's TaskRunner; the duplicate check and
+          saving run on its worker thread.
+        """
+        self.root = root
+        self.data = data
+        self.log_callback = log_callback
+        self.update_data_callback = update_data_callback
+        self.task_runner = task_runner
+
+        # Create the Deduplicate window
+        self.window = tk.Toplevel(root)
+        self.window.title("Deduplicate Tool")
+        self.window.geometry("500x860")
+        self.window.resizable(False, False)
+
+        #logo
+        logo = tk.PhotoImage(file="icons/logo.png")  # Replace with your logo file path
+        self.window.iconphoto(False, logo)
+
+        # Initialize UI
+        self.initialize_ui()
+
+    def initialize_ui(self):
+        """
+        Set up the user interface for the Deduplicate Tool.
+        """
+        columns = self.data.columns.tolist()
+
+        # Title
+        ttk.Label(self.window, text="Deduplicate Tool", font=("Arial", 16, "bold")).pack(pady=10)
+
+        # Exact duplicates
+        ttk.Label(self.window, text="Exact duplicates match on (blank for all columns):", font=("Arial", 12)).pack(pady=5)
+        self.match_columns = tk.StringVar()
+        ttk.Entry(self.window, textvariable=self.match_columns, width=40).pack(pady=5)
+
+        # Near-duplicates
+        ttk.Label(self.window, text="Compare for near-duplicates (blank to skip):", font=("Arial", 12)).pack(pady=5)
+        self.compare_columns = tk.StringVar(value="NAME" if "NAME" in columns else "")
+        ttk.Entry(self.window, textvariable=self.compare_columns, width=40).pack(pady=5)
+        ttk.Label(self.window, text="Only compare rows with the same:").pack(pady=(5, 0))
+        self.block_columns = tk.StringVar(value=",".join(duplicates.DEFAULT_BLOCK_COLUMNS))
+        ttk.Entry(self.window, textvariable=self.block_columns, width=40).pack(pady=5)
+
+        # Coordinate proximity, optional
+        ttk.Label(self.window, text="Latitude and longitude columns (optional):", font=("Arial", 12)).pack(pady=5)
+        self.latitude_column = tk.StringVar()
+        ttk.Combobox(self.window, textvariable=self.latitude_column, values=[""] + columns, state="readonly").pack(pady=5, padx=20, fill=tk.X)
+        self.longitude_column = tk.StringVar()
+        ttk.Combobox(self.window, textvariable=self.longitude_column, values=[""] + columns, state="readonly").pack(pady=5, padx=20, fill=tk.X)
+        frame_limits = ttk.Frame(self.window)
+        frame_limits.pack(pady=5)
+        ttk.Label(frame_limits, text="Within (m):").pack(side=tk.LEFT)
+        self.radius = tk.StringVar(value=f"{duplicates.DEFAULT_RADIUS_M:g}")
+        ttk.Entry(frame_limits, textvariable=self.radius, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_limits, text="Similarity (0-1):").pack(side=tk.LEFT, padx=(10, 0))
+        self.threshold = tk.StringVar(value=f"{duplicates.DEFAULT_THRESHOLD:g}")
+        ttk.Entry(frame_limits, textvariable=self.threshold, width=8).pack(side=tk.LEFT, padx=5)
+
+        # What to do with the duplicates found
+        ttk.Label(self.window, text="Duplicates:", font=("Arial", 12)).pack(pady=5)
+        self.removal = tk.StringVar(value="flag")
+        ttk.Radiobutton(self.window, text="Flag only (DUP_STATUS, DUP_GROUP, DUP_SCORE)", variable=self.removal, value="flag").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Remove exact duplicates", variable=self.removal, value="exact").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Remove exact and near-duplicates", variable=self.removal, value="all").pack(anchor=tk.W, padx=40)
+
+        # File type selection
+        ttk.Label(self.window, text="Save File As:", font=("Arial", 12)).pack(pady=5)
+        self.file_type = tk.StringVar(value="csv")
+        ttk.Radiobutton(self.window, text="CSV (default)", variable=self.file_type, value="csv").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Excel (XLSX)", variable=self.file_type, value="xlsx").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Parquet", variable=self.file_type, value="parquet").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Feather (Arrow IPC)", variable=self.file_type, value="feather").pack(anchor=tk.W, padx=40)
+
+        # Find and Save button
+        ttk.Button(self.window, text="Find Duplicates and Save", command=self.find_and_save).pack(pady=10)
+
+        # Close button
+        ttk.Button(self.window, text="Close", command=self.window.destroy).pack(pady=10)
+
+    def find_and_save(self):
+        """
+        Ask for the output file, then find duplicates and save the result on
+        the task runner's worker thread.
+        """
+        try:
+            options = {
+                "columns": _column_list(self.match_columns.get()),
+                "compare_columns": _column_list(self.compare_columns.get()),
+                "block_columns": _column_list(self.block_columns.get()),
+                "lat_col": self.latitude_column.get() or None,
+                "lon_col": self.longitude_column.get() or None,
+                "radius_m": float(self.radius.get()),
+                "threshold": float(self.threshold.get()),
+                "workers": writer_pool.default_workers(),
+            }
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {e}")
+            return
+        remove = None if self.removal.get() == "flag" else self.removal.get()
+
+        file_type = self.file_type.get()
+        save_file = filedialog.asksaveasfilename(defaultextension=f".{file_type}", filetypes=[engine.FILE_DIALOG_TYPES[file_type]], title="Save File As")
+        if not save_file:
+            messagebox.showinfo("Info", "Save operation canceled.")
+            return
+
+        self.task_runner.submit(
+            "Find duplicates",
+            lambda task: self.deduplicate(task, options, remove, save_file),
+            on_success=self.on_deduplicated,
+            on_error=lambda e: messagebox.showerror("Error", f"An error occurred: {e}"),
+        )
+
+    def deduplicate(self, task, options, remove, save_file):
+        """
+        Flag or remove duplicates and save the result; runs on the worker thread.
+        """
+        result, report = engine.find_duplicates(self.data, remove=remove, log_callback=task.log,
+                                                progress_callback=task.progress, **options)
+
+        # Log the action
+        task.log(duplicates.format_report(report))
+
+        # Save the result
+        engine.save_dataset(result, save_file)
+
+        # Log the save action
+        task.log(f"File saved as: {save_file}")
+        return result, save_file
+
+    def on_deduplicated(self, outcome):
+        # Update the data in the main application
+        self.data, save_file = outcome
+        self.update_data_callback(self.data)
+        messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
+
+
+def _column_list(text):
+    # Comma-separated column names, or None when blank
+    columns = [col.strip() for col in text.split(",") if col.strip()]
+    return columns or None
@@ -0,0 +1,347 @@
+"""
+Detection of duplicate interviews: exact copies and near-duplicates.
+
+Exact duplicates are found by hashing every row once with
+`pd.util.hash_pandas_object` and factorizing the 64-bit hashes, so a
+million rows cost one vectorized pass rather than a sort on every column.
+
+Near-duplicates (the same household entered twice with a typo, or by two
+enumerators) cannot be compared all against all: ten million rows would
+be fifty trillion pairs. Rows are therefore blocked first. Only rows of
+the same block (by default the same CODE1/CODE2 enumeration area) are ever
+paired, and with coordinate columns only rows within `radius_m` metres of
+each other. Inside a block, rows are sorted by latitude and each row is
+paired only with the rows that follow it within the radius's latitude
+band (found with one `searchsorted`), then the haversine distance drops
+the pairs that are too far apart in longitude.
+
+String similarity, the only per-pair Python work, runs on the surviving
+pairs, spread over a process pool in slices that each carry only the
+text of their own rows. Rows are then grouped
+by following the matched pairs, and each group keeps its first row.
+"""
+import difflib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import coordinates
+import imputation
+
+try:
+    from rapidfuzz import fuzz
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+
+# Columns receiving the result of a duplicate check
+STATUS_COLUMN = "DUP_STATUS"
+GROUP_COLUMN = "DUP_GROUP"
+SCORE_COLUMN = "DUP_SCORE"
+
+# Row statuses: the kept row of a group, and the rows duplicating it
+STATUS_FIRST = "first"
+STATUS_EXACT = "exact"
+STATUS_NEAR = "near"
+
+# Block on the enumeration area codes written by the Geocode tool
+DEFAULT_BLOCK_COLUMNS = ["CODE1", "CODE2"]
+
+# Rows further apart than this are never near-duplicates
+DEFAULT_RADIUS_M = 50.0
+
+# Mean similarity of the compared columns above which a pair is a near-duplicate
+DEFAULT_THRESHOLD = 0.9
+
+# Blocks compared all against all when there are no coordinates; larger ones are skipped
+MAX_BLOCK_ROWS = 2_000
+
+# Metres per degree of latitude
+METRES_PER_DEGREE = 111_320.0
+
+# Pool tasks per worker, so uneven slices still spread evenly
+TASKS_PER_WORKER = 4
+
+# Fewer candidate pairs than this are scored in this process
+MIN_PARALLEL_PAIRS = 10_000
+
+# Pairs scored in this process between two progress reports
+SCORE_SLICE_PAIRS = 20_000
+
+
+def similarity(left, right):
+    """
+    Return the similarity of two strings from 0 to 1, with rapidfuzz when
+    it is installed and difflib otherwise.
+    """
+    if left == right:
+        return 1.0
+    if HAS_RAPIDFUZZ:
+        return fuzz.ratio(left, right) / 100
+    return difflib.SequenceMatcher(None, left, right).ratio()
+
+
+def _upper_bound(left, right):
+    # Cheap upper bound of similarity() from the string lengths alone
+    total = len(left) + len(right)
+    return 2 * min(len(left), len(right)) / total if total else 1.0
+
+
+def exact_groups(data, columns=None):
+    """
+    Return, for every row, the position of the first row with the same
+    values in `columns` (all columns by default).
+    """
+    columns = list(data.columns) if columns is None else columns
+    hashes = pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+    codes, uniques = pd.factorize(hashes)
+    _, first = np.unique(codes, return_index=True)
+    return first[codes]
+
+
+def _normalise(values):
+    # Compared text: lower case, single spaces, '' for missing values
+    text = values.astype(object).where(values.notna(), "").astype(str)
+    return text.str.strip().str.lower().str.replace(r"\s+", " ", regex=True).to_numpy(dtype=object)
+
+
+def candidate_pairs(block, lat=None, lon=None, radius_m=DEFAULT_RADIUS_M, max_block_rows=MAX_BLOCK_ROWS):
+    """
+    Return the pairs of rows that share a block and, with coordinates, lie
+    within `radius_m` metres of each other.
+
+    Parameters:
+    - block: Integer block code per row; rows with a negative code are never paired.
+    - lat, lon: Optional coordinate arrays; rows missing either are never paired.
+    - radius_m: Pairing radius in metres.
+    - max_block_rows: Without coordinates, blocks with more rows are skipped.
+
+    Returns:
+    - tuple: (left positions, right positions, number of skipped blocks).
+    """
+    rows = block >= 0
+    if lat is not None:
+        rows &= ~(np.isnan(lat) | np.isnan(lon))
+    skipped = 0
+    if lat is None:
+        sizes = np.bincount(block[rows])
+        skipped = int((sizes > max_block_rows).sum())
+        rows[rows] = sizes[block[rows]] <= max_block_rows
+    positions = np.flatnonzero(rows)
+    block = pd.factorize(block[positions])[0]
+
+    if lat is None:
+        order = np.argsort(block, kind="stable")
+        key = block[order].astype(float)
+        window = 0.0
+    else:
+        # Blocks sorted apart by a wide margin, latitudes in order within each
+        key = block * 1000.0 + (lat[positions] + 90.0)
+        order = np.argsort(key, kind="stable")
+        key = key[order]
+        window = radius_m / METRES_PER_DEGREE
+
+    # Each row pairs with the rows after it up to the end of its window
+    end = np.searchsorted(key, key + window, side="right")
+    counts = end - np.arange(len(key)) - 1
+    left = np.repeat(np.arange(len(key)), counts)
+    right = left + 1 + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+    left, right = positions[order[left]], positions[order[right]]
+
+    if lat is not None:
+        distance = imputation.haversine_km(lat[left], lon[left], lat[right], lon[right]) * 1000
+        near = distance <= radius_m
+        left, right = left[near], right[near]
+    return left, right, skipped
+
+
+def score_pairs(texts, left, right, threshold=DEFAULT_THRESHOLD):
+    """
+    Return the mean similarity of the compared columns of each pair, or 0
+    where it cannot reach `threshold`.
+
+    Module-level so it can be sent to worker processes.
+
+    Parameters:
+    - texts: List of normalised text arrays, one per compared column.
+    - left, right: Row positions of the pairs, into the text arrays.
+    - threshold: Pairs are abandoned as soon as their score cannot reach it.
+
+    Returns:
+    - np.ndarray: One score per pair. Columns empty in both rows do not count.
+    """
+    scores = np.zeros(len(left))
+    for number, (i, j) in enumerate(zip(left, right)):
+        total = 0.0
+        used = 0
+        remaining = len(texts)
+        for values in texts:
+            remaining -= 1
+            a, b = values[i], values[j]
+            if not a and not b:
+                continue
+            used += 1
+            # Stop once even perfect scores for the remaining columns fall short
+            if (total + _upper_bound(a, b) + remaining) / (used + remaining) < threshold:
+                total = None
+                break
+            total += similarity(a, b)
+        if total is not None and used:
+            scores[number] = total / used
+    return scores
+
+
+def _score_parallel(texts, left, right, threshold, workers, progress):
+    # Score the pairs in slices, in this process or over a process pool where each slice ships only its rows;
+    # progress (0-1) is reported after each slice
+    if workers <= 1 or len(left) < MIN_PARALLEL_PAIRS:
+        scores = []
+        for start in range(0, len(left), SCORE_SLICE_PAIRS):
+            stop = start + SCORE_SLICE_PAIRS
+            scores.append(score_pairs(texts, left[start:stop], right[start:stop], threshold))
+            progress(min(stop, len(left)) / len(left))
+        return np.concatenate(scores) if scores else np.zeros(0)
+    bounds = np.linspace(0, len(left), workers * TASKS_PER_WORKER + 1).astype(int)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows, inverse = np.unique(np.concatenate([left[start:stop], right[start:stop]]), return_inverse=True)
+            sub_texts = [values[rows] for values in texts]
+            futures.append(executor.submit(score_pairs, sub_texts, inverse[:stop - start],
+                                           inverse[stop - start:], threshold))
+        scores = []
+        try:
+            for future in futures:
+                scores.append(future.result())
+                progress(len(scores) / len(futures))
+        except BaseException:
+            # Do not wait for slices nobody will read
+            for future in futures:
+                future.cancel()
+            raise
+        return np.concatenate(scores)
+
+
+def _connected_groups(count, left, right):
+    # Smallest position reachable through the pairs, per row, by label propagation
+    labels = np.arange(count)
+    while len(left):
+        lowest = np.minimum(labels[left], labels[right])
+        before = labels.copy()
+        np.minimum.at(labels, left, lowest)
+        np.minimum.at(labels, right, lowest)
+        labels = labels[labels]
+        if np.array_equal(labels, before):
+            break
+    return labels
+
+
+def find_duplicates(data, columns=None, compare_columns=None, block_columns=None, lat_col=None, lon_col=None,
+                    radius_m=DEFAULT_RADIUS_M, threshold=DEFAULT_THRESHOLD, workers=1, log_callback=None,
+                    progress_callback=None):
+    """
+    Find exact and near-duplicate rows.
+
+    Parameters:
+    - data: The DataFrame to check. It is not modified.
+    - columns: Columns that must all be equal for an exact duplicate;
+      defaults to every column.
+    - compare_columns: Text columns (e.g. head of household name) compared
+      for near-duplicates, or None to only look for exact duplicates.
+    - block_columns: Columns whose values must be equal for two rows to be
+      compared; defaults to CODE1 and CODE2.
+    - lat_col, lon_col: Optional coordinate columns; only rows within
+      `radius_m` metres of each other are then compared.
+    - radius_m: Pairing radius in metres.
+    - threshold: Mean similarity (0-1) of the compared columns above which
+      two rows are near-duplicates.
+    - workers: Processes scoring the candidate pairs.
+    - log_callback: Optional function receiving progress messages.
+    - progress_callback: Optional function receiving a 0-100 percentage,
+      after the exact pass and after each slice of scored pairs.
+
+    Returns:
+    - tuple: (DataFrame with the DUP_STATUS, DUP_GROUP and DUP_SCORE
+      columns, on the index of `data`; dict of counts with keys 'exact',
+      'near', 'groups', 'pairs' and 'skipped_blocks').
+
+    Raises:
+    - ValueError: If a column is missing or the threshold is out of range.
+    """
+    log = log_callback or (lambda message: None)
+    progress = progress_callback or (lambda value: None)
+    compare_columns = compare_columns or []
+    block_columns = block_columns or DEFAULT_BLOCK_COLUMNS
+    coordinate_columns = [col for col in (lat_col, lon_col) if col]
+    wanted = (columns or []) + compare_columns + (block_columns if compare_columns else []) + coordinate_columns
+    missing_columns = [col for col in wanted if col not in data.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    if len(coordinate_columns) == 1:
+        raise ValueError("Please select both latitude and longitude columns, or neither.")
+    if not 0 < threshold <= 1:
+        raise ValueError("The similarity threshold must be between 0 and 1.")
+
+    count = len(data)
+    group = exact_groups(data, columns)
+    exact = group != np.arange(count)
+    report = {"exact": int(exact.sum()), "near": 0, "groups": 0, "pairs": 0, "skipped_blocks": 0}
+    log(f"Exact duplicates: {report['exact']}.")
+    progress(10)
+    scores = np.zeros(count)
+
+    if compare_columns:
+        # Only the first row of each exact group takes part in the near pass
+        block = imputation.group_codes(data, block_columns)[block_columns[-1]].copy()
+        block[exact] = -1
+        lat = lon = None
+        if coordinate_columns:
+            lat, lon, _ = coordinates.parse_pair(data[lat_col], data[lon_col])
+        left, right, report["skipped_blocks"] = candidate_pairs(block, lat, lon, radius_m)
+        if report["skipped_blocks"]:
+            log(f"Skipped {report['skipped_blocks']} blocks of more than {MAX_BLOCK_ROWS} rows; "
+                f"add coordinates or finer block columns to compare them.")
+        report["pairs"] = len(left)
+        log(f"Comparing {len(left)} candidate pairs...")
+
+        texts = [_normalise(data[col]) for col in compare_columns]
+        progress(20)
+        pair_scores = _score_parallel(texts, left, right, threshold, workers,
+                                      lambda done: progress(20 + 70 * done))
+        matched = pair_scores >= threshold
+        left, right, pair_scores = left[matched], right[matched], pair_scores[matched]
+        np.maximum.at(scores, left, pair_scores)
+        np.maximum.at(scores, right, pair_scores)
+        near_group = _connected_groups(count, left, right)
+        near = near_group != np.arange(count)
+        report["near"] = int(near.sum())
+        # Exact copies follow the row they copy into its near group
+        group = near_group[group]
+    else:
+        near = np.zeros(count, dtype=bool)
+
+    in_group = np.bincount(group, minlength=count)[group] > 1
+    report["groups"] = int((in_group & (group == np.arange(count))).sum())
+
+    status = np.full(count, "", dtype=object)
+    status[in_group] = STATUS_FIRST
+    status[near] = STATUS_NEAR
+    status[exact] = STATUS_EXACT
+    result = pd.DataFrame({
+        STATUS_COLUMN: status,
+        # 1-based row numbers of each group's kept row, as a user counts them
+        GROUP_COLUMN: pd.Series(group + 1, index=data.index, dtype="Int64").where(in_group),
+        SCORE_COLUMN: np.where(near, scores.round(3), np.nan),
+    }, index=data.index)
+    progress(100)
+    return result, report
+
+
+def format_report(report):
+    """
+    Return a one-line summary of a duplicate report for the logs.
+    """
+    return (f"Exact duplicates: {report['exact']}, near-duplicates: {report['near']} "
+            f"(from {report['pairs']} compared pairs), in {report['groups']} groups.")
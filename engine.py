@@ -0,0 +1,779 @@
+"""
+Headless processing engine for the NBS Cleaning Tool.
+
+Every operation in this module works on plain pandas DataFrames and never
+touches tkinter, so the same cleaning can be driven from the GUI windows or
+from the command line (see nbsclean.py).
+"""
+import functools
+import glob
+import io
+import os
+import pandas as pd
+
+import boundaries
+import checkpoint
+import compact
+import coordinates
+import duplicates
+import excel_io
+import geocoder
+import imputation
+import instrumentation
+import nulls
+import partitioner
+import writer_pool
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".parquet", ".feather", ".arrow")
+
+# Columnar formats need pyarrow; '.arrow' is the Arrow IPC file format, the same as Feather v2
+COLUMNAR_EXTENSIONS = (".parquet", ".feather", ".arrow")
+
+# Text sources at least this large get a columnar sidecar copy after their first parse
+SIDECAR_MIN_BYTES = 50 * 1024 * 1024
+SIDECAR_DIR = ".nbscache"
+
+# (label, pattern) pairs for file dialogs, keyed by file type
+FILE_DIALOG_TYPES = {
+    "csv": ("CSV Files", "*.csv"),
+    "xlsx": ("Excel Files", "*.xlsx"),
+    "parquet": ("Parquet Files", "*.parquet"),
+    "feather": ("Feather/Arrow Files", "*.feather *.arrow"),
+}
+
+# Duplicate removal options of find_duplicates: flag only, drop exact copies, drop near-duplicates too
+DUPLICATE_REMOVALS = (None, "exact", "all")
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class ProgressFile(io.RawIOBase):
+    """
+    Read-only binary file that reports how much of it has been consumed.
+
+    The callback receives a 0-100 percentage and is only called when the
+    percentage changes, so it is cheap enough to drive a progress bar.
+    """
+
+    def __init__(self, file_path, progress_callback):
+        self._handle = open(file_path, "rb", buffering=0)
+        self._total = os.path.getsize(file_path) or 1
+        self._consumed = 0
+        self._last_percent = -1
+        self._progress_callback = progress_callback
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._handle.readinto(buffer)
+        if count:
+            self._consumed += count
+            percent = min(100, self._consumed * 100 // self._total)
+            if percent != self._last_percent:
+                self._last_percent = percent
+                self._progress_callback(percent)
+        return count
+
+    def close(self):
+        self._handle.close()
+        super().close()
+
+
+def _require_pyarrow(file_path):
+    if not HAS_PYARROW:
+        raise ValueError(f"Reading or writing '{os.path.splitext(file_path)[1]}' files requires pyarrow (pip install pyarrow).")
+
+
+def sidecar_path(file_path, dtype=None, compact_load=False):
+    """
+    Return the path of the columnar sidecar copy of a text source.
+
+    The name embeds the source size and modification time, so a sidecar is
+    only found again while the source is unchanged.
+
+    Parameters:
+    - file_path: Path of the '.csv' or '.xlsx' source.
+    - dtype: The dtype the source was parsed with; text and typed parses
+      are cached separately.
+    - compact_load: Whether the parse used compact dtypes, also cached
+      separately.
+
+    Returns:
+    - str: The sidecar path.
+    """
+    stat = os.stat(file_path)
+    folder, name = os.path.split(os.path.abspath(file_path))
+    kind = ("typed" if dtype is None else "text") + ("-compact" if compact_load else "")
+    return os.path.join(folder, SIDECAR_DIR, f"{name}.{kind}.{stat.st_size}-{stat.st_mtime_ns}.feather")
+
+
+def _uses_sidecar(file_path, dtype):
+    return (
+        HAS_PYARROW
+        and file_path.endswith((".csv", ".xlsx"))
+        and (dtype is None or dtype is object)
+        and os.path.getsize(file_path) >= SIDECAR_MIN_BYTES
+    )
+
+
+def _write_sidecar(data, path, log_callback=None):
+    """
+    Write a sidecar copy, replacing older copies of the same source.
+
+    Frames that Arrow cannot store losslessly, such as columns mixing numbers
+    and text, are skipped rather than converted, so a cached load always
+    returns exactly what a fresh parse would. The sidecar is only a cache:
+    a read-only folder or a locked file is logged, never raised, since the
+    load itself has succeeded.
+    """
+    log = log_callback or _noop
+    prefix = os.path.basename(path).rsplit(".", 2)[0]
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        data.reset_index(drop=True).to_feather(temp_path)
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+        except OSError:
+            pass
+        return False
+    for stale in glob.glob(os.path.join(os.path.dirname(path), glob.escape(prefix) + ".*.feather")):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError as e:
+                log(f"Could not remove old cached copy {stale}: {e}")
+    return True
+
+
+def _read_file(file_path, dtype, progress, parser, sheets=None, columns=None, log_callback=None, compact_load=False):
+    if file_path.endswith(".csv"):
+        if compact_load:
+            return _read_csv_compact(file_path, dtype, progress, columns, log_callback or _noop)
+        if parser == "auto":
+            parser = "pyarrow" if HAS_PYARROW and dtype is None else "c"
+        options = {"dtype": dtype, "usecols": columns}
+        if parser == "pyarrow":
+            options["engine"] = "pyarrow"
+        else:
+            options["low_memory"] = False
+        with io.BufferedReader(ProgressFile(file_path, progress), 1024 * 1024) as handle:
+            return pd.read_csv(handle, **options)
+    elif file_path.endswith(".xlsx"):
+        progress(0)
+        return excel_io.read_excel(file_path, sheets=sheets, columns=columns, dtype=dtype,
+                                   log_callback=log_callback, progress_callback=progress)
+    elif file_path.endswith(".parquet"):
+        _require_pyarrow(file_path)
+        data = pd.read_parquet(file_path, columns=columns)
+    elif file_path.endswith((".feather", ".arrow")):
+        _require_pyarrow(file_path)
+        data = pd.read_feather(file_path, columns=columns)
+    else:
+        raise ValueError("Unsupported file type. Supported types: " + ", ".join(SUPPORTED_EXTENSIONS))
+    return data.astype(dtype) if dtype is not None else data
+
+
+def _read_csv_compact(file_path, dtype, progress, columns, log):
+    # A sample of the first rows picks categorical and Arrow string columns for the full parse
+    sample = pd.read_csv(file_path, dtype=dtype, usecols=columns, nrows=compact.SAMPLE_ROWS, low_memory=False)
+    plan = compact.plan_csv_dtypes(sample)
+    with io.BufferedReader(ProgressFile(file_path, progress), 1024 * 1024) as handle:
+        data = pd.read_csv(handle, dtype=plan if dtype is None else {col: plan.get(col, dtype) for col in sample.columns},
+                           usecols=columns, low_memory=False)
+    data = compact.compact_frame(data)
+    if len(sample):
+        before = compact.memory_usage(sample) * len(data) / len(sample)
+        log(compact.memory_report(before, compact.memory_usage(data), estimated=len(sample) < len(data)))
+    log(f"Column types: {compact.dtype_summary(data)}.")
+    return data
+
+
+@instrumentation.timed("load")
+def load_dataset(file_path, dtype=None, progress_callback=None, parser="auto", use_sidecar=True,
+                 sheets=None, columns=None, log_callback=None, compact_load=False):
+    """
+    Load a dataset based on its file extension.
+
+    Parameters:
+    - file_path: Path of the file to load.
+    - dtype: Optional dtype passed through to the pandas reader.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      based on the bytes read from disk.
+    - parser: CSV parser, 'c', 'pyarrow', or 'auto' to use the multithreaded
+      pyarrow parser when it is installed. Text loads (dtype=object) stay on
+      the C parser under 'auto' because pyarrow infers types before
+      converting, which loses leading zeros such as '007'.
+    - use_sidecar: Load large '.csv'/'.xlsx' sources from their columnar
+      sidecar copy when the source is unchanged, and write one after the
+      first parse. Only whole-file loads use the sidecar.
+    - sheets: For '.xlsx', a sheet name or list of sheet names to stack;
+      None reads the first sheet.
+    - columns: Optional list of column names to load.
+    - log_callback: Optional function receiving per-sheet and memory messages.
+    - compact_load: Store low-cardinality columns as categoricals, free
+      text as Arrow strings and numbers in the smallest lossless type (see
+      compact.py). CSV files pick these dtypes from a sample of their first
+      rows, so the full parse builds them directly; the `parser` option is
+      not used.
+
+    Returns:
+    - pd.DataFrame: The loaded data.
+
+    Raises:
+    - ValueError: If the file type is unsupported.
+    """
+    progress = progress_callback or _noop
+    log = log_callback or _noop
+    whole_file = sheets is None and columns is None
+    sidecar = None
+    if use_sidecar and whole_file and _uses_sidecar(file_path, dtype):
+        sidecar = sidecar_path(file_path, dtype, compact_load)
+    if sidecar and os.path.exists(sidecar):
+        progress(0)
+        data = pd.read_feather(sidecar)
+        instrumentation.add_bytes(read=instrumentation.file_size(sidecar))
+    else:
+        instrumentation.add_bytes(read=instrumentation.file_size(file_path))
+        data = _read_file(file_path, dtype, progress, parser, sheets, columns, log_callback, compact_load)
+        if compact_load and not file_path.endswith(".csv"):
+            before = compact.memory_usage(data)
+            data = compact.compact_frame(data)
+            log(compact.memory_report(before, compact.memory_usage(data)))
+            log(f"Column types: {compact.dtype_summary(data)}.")
+        if sidecar:
+            _write_sidecar(data, sidecar, log)
+    progress(100)
+    return data
+
+
+@instrumentation.timed("save")
+def save_dataset(data, file_path, excel_engine="auto"):
+    """
+    Save a dataset based on the extension of the target path.
+
+    Parameters:
+    - data: The DataFrame to save.
+    - file_path: Destination path ending in one of SUPPORTED_EXTENSIONS.
+    - excel_engine: Workbook writer for '.xlsx', see excel_io.EXCEL_ENGINES.
+      Sheets past Excel's row limit roll over into extra sheets.
+
+    Raises:
+    - ValueError: If the file type is unsupported.
+    """
+    if file_path.endswith(".csv"):
+        data.to_csv(file_path, index=False)
+    elif file_path.endswith(".xlsx"):
+        excel_io.write_excel(data, file_path, excel_engine=excel_engine)
+    elif file_path.endswith(COLUMNAR_EXTENSIONS):
+        _require_pyarrow(file_path)
+        data = arrow_compatible(data)
+        if file_path.endswith(".parquet"):
+            data.to_parquet(file_path, index=False)
+        else:
+            data.reset_index(drop=True).to_feather(file_path)
+    else:
+        raise ValueError("Unsupported file format!")
+    instrumentation.add_bytes(written=instrumentation.file_size(file_path))
+
+
+def arrow_compatible(data):
+    """
+    Return `data` with object columns that mix numbers and text converted
+    to text, which Arrow requires. Missing values are kept as missing.
+
+    The input is returned unchanged when no column needs converting.
+    """
+    mixed = [
+        col for col in data.columns
+        if data[col].dtype == object
+        and pd.api.types.infer_dtype(data[col], skipna=True) not in ("string", "empty", "bytes", "boolean")
+    ]
+    if not mixed:
+        return data
+    data = data.copy(deep=False)
+    for col in mixed:
+        data[col] = data[col].where(data[col].isna(), data[col].astype(str))
+    return data
+
+
+@instrumentation.timed("replace")
+def replace_nulls(data, replacement, tokens=None, strip_whitespace=False, ignore_case=False,
+                  column_replacements=None, progress_callback=None):
+    """
+    Replace null-like values in every column, in place.
+
+    Each column is scanned once with a strategy suited to its dtype (see
+    nulls.py), so numeric columns are never searched for text tokens.
+
+    Parameters:
+    - data: The DataFrame to modify.
+    - replacement: Value written wherever a null-like value is found.
+    - tokens: Text values treated as null; defaults to nulls.DEFAULT_NULL_TOKENS.
+    - strip_whitespace: Match tokens after removing surrounding whitespace.
+    - ignore_case: Match tokens case-insensitively.
+    - column_replacements: Optional mapping of column name to the value
+      used in that column instead of `replacement`.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      after each column.
+
+    Returns:
+    - dict: Number of values replaced, per column.
+
+    Raises:
+    - ValueError: If the replacement value is empty or a column is unknown.
+    """
+    if replacement is None or replacement == "":
+        raise ValueError("Replacement value cannot be empty!")
+
+    return nulls.normalise_nulls(data, replacement, tokens=tokens, strip_whitespace=strip_whitespace,
+                                 ignore_case=ignore_case, column_replacements=column_replacements,
+                                 progress_callback=progress_callback)
+
+
+@instrumentation.timed("deduplicate")
+def find_duplicates(data, remove=None, log_callback=None, progress_callback=None, **options):
+    """
+    Flag exact and near-duplicate rows (see duplicates.py), and optionally
+    drop them.
+
+    The DUP_STATUS, DUP_GROUP and DUP_SCORE columns are added to `data` in
+    place; the first row of each duplicate group is always kept.
+
+    Parameters:
+    - data: The DataFrame to check.
+    - remove: None to only flag duplicates, 'exact' to drop exact copies,
+      or 'all' to drop near-duplicates as well.
+    - log_callback: Optional function receiving progress messages.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+    - options: Keyword arguments for duplicates.find_duplicates, such as
+      columns, compare_columns, block_columns, lat_col, lon_col, radius_m,
+      threshold and workers.
+
+    Returns:
+    - tuple: (the data, without the removed rows, and the counts of
+      duplicates.find_duplicates).
+
+    Raises:
+    - ValueError: If a column is missing or an option is invalid.
+    """
+    if remove not in DUPLICATE_REMOVALS:
+        raise ValueError(f"Unknown removal '{remove}'. Choose one of: {', '.join(str(option) for option in DUPLICATE_REMOVALS)}.")
+    flags, report = duplicates.find_duplicates(data, log_callback=log_callback, progress_callback=progress_callback,
+                                               **options)
+    for col in flags.columns:
+        data[col] = flags[col]
+    if remove is None:
+        return data, report
+
+    dropped = [duplicates.STATUS_EXACT] if remove == "exact" else [duplicates.STATUS_EXACT, duplicates.STATUS_NEAR]
+    keep = ~data[duplicates.STATUS_COLUMN].isin(dropped)
+    if log_callback:
+        log_callback(f"Removed {int((~keep).sum())} duplicate rows.")
+    return data[keep].reset_index(drop=True), report
+
+
+@instrumentation.timed("fix coordinates")
+def fix_coordinates(data, lat_col, lon_col):
+    """
+    Convert the latitude and longitude columns to floats and fill missing
+    values with the column means, in place.
+
+    Parameters:
+    - data: The DataFrame to modify.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+
+    Returns:
+    - tuple: (latitude mean, longitude mean) used for filling.
+
+    Raises:
+    - ValueError: If a column is not selected or missing from the data.
+    """
+    _check_coordinate_columns(data, lat_col, lon_col)
+
+    # Convert columns to float, reading DMS and other text forms
+    data[lat_col], data[lon_col], _ = coordinates.parse_pair(data[lat_col], data[lon_col])
+
+    # Fill missing values with the mean
+    lat_mean = data[lat_col].mean()
+    lon_mean = data[lon_col].mean()
+    data[lat_col] = data[lat_col].fillna(lat_mean)
+    data[lon_col] = data[lon_col].fillna(lon_mean)
+
+    return lat_mean, lon_mean
+
+
+@instrumentation.timed("fill coordinates")
+def impute_coordinates(data, lat_col, lon_col, progress_callback=None, **options):
+    """
+    Clean and fill coordinates in place from the median of each row's
+    hamlet, then village, ward and district (see imputation.py).
+
+    Parameters:
+    - data: The DataFrame to modify.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      after each fill level.
+    - options: Keyword arguments for imputation.impute_coordinates, such as
+      bounds, outlier_column and replace_outliers.
+
+    Returns:
+    - dict: Out-of-bounds, outlier, filled-per-level and unfilled counts.
+
+    Raises:
+    - ValueError: If a column is not selected or missing from the data.
+    """
+    _check_coordinate_columns(data, lat_col, lon_col)
+    data[lat_col], data[lon_col], _ = coordinates.parse_pair(data[lat_col], data[lon_col])
+    return imputation.impute_coordinates(data, lat_col, lon_col, progress_callback=progress_callback, **options)
+
+
+@instrumentation.timed("parse coordinates")
+def parse_coordinates(data, lat_col, lon_col, bounds=None, status_column=coordinates.STATUS_COLUMN):
+    """
+    Convert the latitude and longitude columns to floats in place, reading
+    DMS, hemisphere letters and decimal commas and repairing swapped rows
+    (see coordinates.py).
+
+    Parameters:
+    - data: The DataFrame to modify.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+    - bounds: Optional (min lat, max lat, min lon, max lon) used to spot
+      swapped rows.
+    - status_column: Column receiving each row's parse status, or None.
+
+    Returns:
+    - dict: Number of rows per parse status.
+
+    Raises:
+    - ValueError: If a column is not selected or missing from the data.
+    """
+    _check_coordinate_columns(data, lat_col, lon_col)
+    data[lat_col], data[lon_col], status = coordinates.parse_pair(data[lat_col], data[lon_col], bounds)
+    if status_column:
+        data[status_column] = pd.Series(coordinates.status_labels(status), index=data.index, dtype=object)
+    return coordinates.count_statuses(status)
+
+
+@instrumentation.timed("boundary check")
+def validate_boundaries(data, lat_col, lon_col, boundary_file, columns, properties=None):
+    """
+    Flag rows whose coordinate lies outside the boundary of their stated
+    area (see boundaries.py). Adds the BOUNDARY_STATUS and BOUNDARY_FOUND
+    columns in place.
+
+    Parameters:
+    - data: The DataFrame to check.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+    - boundary_file: GeoJSON file or shapefile of admin area polygons.
+    - columns: Data columns naming each row's area, e.g. ['PREGION', 'PDISTRICT'].
+    - properties: Boundary feature properties matching `columns`, in the
+      same order; defaults to the same names.
+
+    Returns:
+    - dict: Inside, outside, no-boundary and no-coordinate row counts.
+
+    Raises:
+    - ValueError: If a column or property is missing, or the file cannot be used.
+    """
+    _check_coordinate_columns(data, lat_col, lon_col)
+    if not columns:
+        raise ValueError("Please select the column(s) naming each row's area!")
+    missing = [col for col in columns if col not in data.columns]
+    if missing:
+        raise ValueError(f"Column(s) not found in data: {', '.join(missing)}")
+    properties = properties or columns
+    if len(properties) != len(columns):
+        raise ValueError("Give one boundary property for each area column.")
+    area_boundaries = boundaries.load_boundaries(boundary_file, properties)
+    return boundaries.validate_points(data, lat_col, lon_col, columns, area_boundaries)
+
+
+def _check_coordinate_columns(data, lat_col, lon_col):
+    if not lat_col or not lon_col:
+        raise ValueError("Please select both latitude and longitude columns!")
+    for col in (lat_col, lon_col):
+        if col not in data.columns:
+            raise ValueError(f"Column '{col}' not found in data.")
+
+
+@instrumentation.timed("geocode")
+def generate_geocode(data, pregion_value, log_callback=None, schema=None, progress_callback=None):
+    """
+    Generate CODE1 and CODE2, leave GEOCODE empty and drop the source columns.
+
+    Parameters:
+    - data: The DataFrame holding the geographic columns. It is not modified.
+    - pregion_value: Two-digit region code used for PREGION.
+    - log_callback: Optional function receiving progress messages.
+    - schema: Optional code schema (see geocoder.py); defaults to the NBS
+      CODE1/CODE2 layout.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      after each code field.
+
+    Returns:
+    - pd.DataFrame: The data with the code columns, GEOCODE and CODE_OVERFLOW
+      as the first columns. CODE_OVERFLOW names the fields of each row whose
+      value was wider than its field.
+
+    Raises:
+    - ValueError: If required columns are missing or PREGION is invalid.
+    """
+    log = log_callback or _noop
+    schema = geocoder.validate_schema(schema or geocoder.DEFAULT_SCHEMA)
+    source_columns = geocoder.schema_columns(schema)
+
+    # Ensure required columns are present
+    missing_columns = [col for col in source_columns if col not in data.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    pregion_value = str(pregion_value).strip()
+    if not pregion_value.isdigit() or len(pregion_value) != 2:
+        raise ValueError("PREGION must be a 2-digit numeric value.")
+
+    log(f"Using PREGION value: {pregion_value}")
+    log(f"Generating {', '.join(schema)}...")
+    codes, overflow = geocoder.build_codes(data, schema, overrides={"PREGION": pregion_value},
+                                           progress_callback=progress_callback)
+    log(f"{', '.join(schema)} generated successfully.")
+
+    overflow_count = int((overflow != "").sum())
+    if overflow_count:
+        log(f"Warning: {overflow_count} rows have values wider than their code field (see {geocoder.OVERFLOW_COLUMN}).")
+
+    # Code columns and an empty GEOCODE at the beginning, then the rest without the originals
+    code_frame = pd.DataFrame(codes, index=data.index)
+    code_frame["GEOCODE"] = ""
+    code_frame[geocoder.OVERFLOW_COLUMN] = overflow
+    log("GEOCODE initialized as empty.")
+    remaining = [col for col in data.columns if col not in code_frame.columns and col not in source_columns]
+    log(f"Dropped original columns: {', '.join(source_columns)}")
+    return pd.concat([code_frame, data[remaining]], axis=1)
+
+
+def group_file_name(save_folder, group_name, file_type):
+    """
+    Return the output path for one group of a column split.
+
+    A tuple key from a multi-column split maps to nested folders, one level
+    per key column: (PREGION, PDISTRICT) -> '<PREGION>/<PDISTRICT>.csv'.
+    """
+    if isinstance(group_name, tuple):
+        *folders, group_name = group_name
+        save_folder = os.path.join(save_folder, *(str(folder) for folder in folders))
+    return os.path.join(save_folder, f"{group_name}.{file_type}")
+
+
+def _group_label(key):
+    return "_".join(str(value) for value in key) if len(key) > 1 else key[0]
+
+
+def _folder_partitions(partitioning, save_target, file_type, skip=None):
+    # Nested folders are created here, before any write is dispatched
+    for key, group_data in partitioning:
+        file_name = group_file_name(save_target, key if len(key) > 1 else key[0], file_type)
+        if skip is not None and file_name in skip:
+            continue
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        yield file_name, group_data
+
+
+def _recorder(job, workers):
+    # Parallel writes run where the trace cannot see them, so their bytes are added here
+    def record(file_name, result):
+        job.record(file_name, result)
+        if workers > 1:
+            instrumentation.add_bytes(written=result["size"])
+    return record
+
+
+@instrumentation.timed("split")
+def split_by_column(df, column_name, file_type, save_option, save_target, log_callback=None, progress_callback=None,
+                    excel_engine="auto", workers=1, executor="process", resume=True):
+    """
+    Split data by unique values in one or more columns and save rows with no
+    value separately as 'Invalid_Rows.xlsx'.
+
+    Parameters:
+    - df: The DataFrame to split.
+    - column_name: Column whose values define the groups, or a list of
+      columns to split by the first, then the second, ... into nested folders.
+    - file_type: 'csv', 'xlsx', 'parquet' or 'feather'.
+    - save_option: 'folder' (one file per group) or 'single' (one file).
+    - save_target: Folder path for 'folder', file path for 'single'.
+    - log_callback: Optional function receiving progress messages.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+    - excel_engine: Workbook writer for '.xlsx' output, see excel_io.EXCEL_ENGINES.
+    - workers: Number of files written in parallel in 'folder' mode.
+    - executor: 'process' or 'thread' workers, see writer_pool.write_partitions.
+    - resume: In 'folder' mode, files are written under temporary names,
+      renamed when complete and recorded in a manifest (see checkpoint.py).
+      With True, files completed by an earlier run of the same split on
+      the same data are kept and skipped. With False, the data is not
+      fingerprinted, so that run cannot be resumed later either.
+
+    Returns:
+    - int: Number of groups in the split, including skipped ones.
+
+    Raises:
+    - ValueError: If the column or options are invalid.
+    """
+    log = log_callback or _noop
+    progress = progress_callback or _noop
+
+    if save_option not in ("folder", "single"):
+        raise ValueError(f"Unknown save option '{save_option}'.")
+
+    # Rows with no value in a key column are invalid; the rest is sorted into contiguous groups
+    with instrumentation.stage("partition") as partition_stage:
+        partition_stage.rows = len(df)
+        partitioning = partitioner.partition(df, column_name)
+        invalid_rows = partitioning.invalid_rows()
+
+    job = None
+    if save_option == "folder":
+        os.makedirs(save_target, exist_ok=True)
+        job = checkpoint.SplitCheckpoint(save_target, {
+            "columns": partitioning.columns,
+            "file_type": file_type,
+            "data": checkpoint.data_fingerprint(df) if resume else None,
+        }, resume=resume)
+
+    # Save invalid rows to a separate file
+    if not invalid_rows.empty:
+        invalid_dir = save_target if save_option == "folder" else os.path.dirname(save_target)
+        invalid_file_path = os.path.join(invalid_dir, "Invalid_Rows.xlsx")
+        write_invalid = functools.partial(excel_io.write_excel, excel_engine=excel_engine)
+        if job is None:
+            write_invalid(invalid_rows, invalid_file_path)
+            log(f"Saved invalid rows to: {invalid_file_path}")
+        elif job.is_done(invalid_file_path):
+            log(f"Invalid rows already saved to: {invalid_file_path}")
+        else:
+            job.record(invalid_file_path, checkpoint.write_atomic(invalid_rows, invalid_file_path, write_invalid))
+            log(f"Saved invalid rows to: {invalid_file_path}")
+    else:
+        log("No invalid rows detected.")
+
+    progress(0)
+    total_groups = partitioning.ngroups
+    if total_groups == 0:
+        return 0
+
+    if save_option == "folder":
+        # Files a previous run of this job completed are not written again
+        done = set()
+        for key in partitioning.keys:
+            file_name = group_file_name(save_target, key if len(key) > 1 else key[0], file_type)
+            if job.is_done(file_name):
+                done.add(file_name)
+        if done:
+            log(f"Resuming: {len(done)} of {total_groups} files were already written.")
+        with instrumentation.stage("write") as write_stage:
+            write_stage.rows = len(partitioning.sorted_frame)
+            writer_pool.write_partitions(
+                _folder_partitions(partitioning, save_target, file_type, skip=done),
+                functools.partial(checkpoint.write_atomic,
+                                  write_function=functools.partial(save_dataset, excel_engine=excel_engine)),
+                workers=workers, executor=executor,
+                log_callback=log, progress_callback=progress, total=total_groups - len(done),
+                result_callback=_recorder(job, workers),
+            )
+        progress(100)
+    else:
+        # Save all splits in a single file; the sorted rows already are the groups back to back
+        if file_type != "xlsx":
+            save_dataset(partitioning.valid_rows(), save_target)
+            progress(100)
+        else:
+            with instrumentation.stage("write") as write_stage:
+                write_stage.rows = len(partitioning.sorted_frame)
+                excel_io.write_excel_sheets(
+                    save_target, ((_group_label(key), group_data) for key, group_data in partitioning),
+                    excel_engine=excel_engine, log_callback=log, progress_callback=progress, total=total_groups,
+                )
+                instrumentation.add_bytes(written=instrumentation.file_size(save_target))
+
+    return total_groups
+
+
+@instrumentation.timed("split")
+def split_by_rows(df, rows_per_part, file_type, save_option, save_target, log_callback=None, progress_callback=None,
+                  excel_engine="auto"):
+    """
+    Split data into parts with a fixed number of rows per part.
+
+    Parameters:
+    - df: The DataFrame to split.
+    - rows_per_part: Maximum number of rows in each part.
+    - file_type: 'csv', 'xlsx', 'parquet' or 'feather'.
+    - save_option: 'folder' (one file per part) or 'single' (one file).
+    - save_target: Folder path for 'folder', file path for 'single'.
+    - log_callback: Optional function receiving progress messages.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+    - excel_engine: Workbook writer for '.xlsx' output, see excel_io.EXCEL_ENGINES.
+
+    Returns:
+    - int: Number of parts written.
+
+    Raises:
+    - ValueError: If the row count or options are invalid.
+    """
+    log = log_callback or _noop
+    progress = progress_callback or _noop
+
+    rows_per_part = int(rows_per_part)
+    if rows_per_part <= 0:
+        raise ValueError("Row count must be a positive integer.")
+    if save_option not in ("folder", "single"):
+        raise ValueError(f"Unknown save option '{save_option}'.")
+
+    part_count = (len(df) + rows_per_part - 1) // rows_per_part
+    # Slices are views taken one at a time, so no part is held longer than its write
+    splits = (df.iloc[i * rows_per_part: (i + 1) * rows_per_part] for i in range(part_count))
+
+    progress(0)
+    if not part_count:
+        return 0
+    progress_increment = 100 / part_count
+
+    if save_option == "folder":
+        os.makedirs(save_target, exist_ok=True)
+        for i, split_data in enumerate(splits, start=1):
+            file_name = os.path.join(save_target, f"Part_{i}.{file_type}")
+            save_dataset(split_data, file_name, excel_engine=excel_engine)
+            progress(int(i * progress_increment))
+            log(f"Saved: {file_name}")
+    else:
+        if file_type != "xlsx":
+            # Without sheets the parts add up to the whole frame, written as it is
+            save_dataset(df, save_target)
+            progress(100)
+        else:
+            with instrumentation.stage("write") as write_stage:
+                write_stage.rows = len(df)
+                excel_io.write_excel_sheets(
+                    save_target, ((f"Part_{i}", split_data) for i, split_data in enumerate(splits, start=1)),
+                    excel_engine=excel_engine, log_callback=log, progress_callback=progress, total=part_count,
+                )
+                instrumentation.add_bytes(written=instrumentation.file_size(save_target))
+
+    return part_count
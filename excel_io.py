@@ -0,0 +1,268 @@
+"""
+Excel reading and writing helpers shared by every load and export path.
+
+Workbooks are read with the Rust-based calamine reader when python-calamine
+is installed, otherwise by streaming rows from openpyxl in read-only mode
+into pre-sized column arrays. Sheets and columns can be selected so only the
+needed part of a workbook is parsed.
+
+Workbooks are written with xlsxwriter in `constant_memory` mode when it is
+installed: each row is flushed to disk as soon as the next one starts, so
+memory stays flat however large the export is. That mode only accepts
+cells in row order, so the rows are written here rather than through
+DataFrame.to_excel. openpyxl, which builds the
+whole workbook in memory, remains available as a fallback. Sheets longer
+than Excel's row limit roll over into extra sheets automatically.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import xlsxwriter
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+try:
+    import python_calamine
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+
+# Excel's hard limit per sheet, header row included
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_SHEET_NAME = 31
+
+EXCEL_ENGINES = ("auto", "xlsxwriter", "openpyxl")
+
+# Rows parsed between progress updates when streaming a sheet with openpyxl
+READ_PROGRESS_ROWS = 50_000
+
+# Rows converted to Python values at a time when writing with xlsxwriter
+EXCEL_WRITE_CHUNK_ROWS = 50_000
+
+
+def list_sheets(file_path):
+    """
+    Return the sheet names of a workbook without parsing its cells.
+    """
+    if HAS_CALAMINE:
+        return python_calamine.CalamineWorkbook.from_path(file_path).sheet_names
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def read_excel(file_path, sheets=None, columns=None, dtype=None, log_callback=None, progress_callback=None):
+    """
+    Read one or more sheets of a workbook into a single DataFrame.
+
+    Parameters:
+    - file_path: Path of the '.xlsx' file.
+    - sheets: A sheet name, a list of sheet names, or None for the first
+      sheet. Several sheets are stacked and should share their columns.
+    - columns: Optional list of column names to keep.
+    - dtype: Optional dtype passed through to the reader.
+    - log_callback: Optional function receiving one message per sheet.
+    - progress_callback: Optional function receiving a 0-100 percentage,
+      updated per sheet (and per row block on the openpyxl path).
+
+    Returns:
+    - pd.DataFrame: The loaded data.
+    """
+    log = log_callback or (lambda message: None)
+    progress = progress_callback or (lambda percent: None)
+    if sheets is None:
+        sheets = [0]
+    elif isinstance(sheets, str):
+        sheets = [sheets]
+    total = len(sheets)
+
+    frames = []
+    for i, sheet in enumerate(sheets):
+        label = "first sheet" if sheet == 0 else f"sheet '{sheet}'"
+        log(f"Loading {label} ({i + 1}/{total})...")
+
+        def sheet_progress(fraction, i=i):
+            progress(int((i + fraction) * 100 / total))
+
+        if HAS_CALAMINE:
+            frame = pd.read_excel(file_path, sheet_name=sheet, usecols=columns, dtype=dtype, engine="calamine")
+        else:
+            frame = _read_sheet_openpyxl(file_path, sheet, columns, dtype, sheet_progress)
+        frames.append(frame)
+        sheet_progress(1)
+
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _read_sheet_openpyxl(file_path, sheet, columns, dtype, sheet_progress):
+    import openpyxl
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=columns or [])
+        header = [f"Unnamed: {i}" if name is None else name for i, name in enumerate(header)]
+        keep = range(len(header)) if columns is None else [header.index(name) for name in columns]
+
+        # The sheet dimension may be missing or stale, so arrays grow if needed
+        capacity = max((worksheet.max_row or 1) - 1, 1)
+        arrays = [np.empty(capacity, dtype=object) for _ in keep]
+        count = 0
+        for row in rows:
+            if count == capacity:
+                capacity *= 2
+                arrays = [np.resize(array, capacity) for array in arrays]
+            for array, index in zip(arrays, keep):
+                array[count] = row[index] if index < len(row) else None
+            count += 1
+            if count % READ_PROGRESS_ROWS == 0:
+                sheet_progress(min(count / capacity, 0.99))
+    finally:
+        workbook.close()
+
+    frame = pd.DataFrame({header[index]: array[:count] for array, index in zip(arrays, keep)})
+    if dtype is not None:
+        return frame.astype(dtype)
+    return frame.infer_objects()
+
+
+def resolve_engine(excel_engine="auto"):
+    """
+    Return the concrete writer engine for an engine choice.
+
+    Raises:
+    - ValueError: If the engine is unknown or xlsxwriter is not installed.
+    """
+    if excel_engine not in EXCEL_ENGINES:
+        raise ValueError(f"Unknown Excel writer '{excel_engine}'. Choose one of: {', '.join(EXCEL_ENGINES)}.")
+    if excel_engine == "auto":
+        return "xlsxwriter" if HAS_XLSXWRITER else "openpyxl"
+    if excel_engine == "xlsxwriter" and not HAS_XLSXWRITER:
+        raise ValueError("The xlsxwriter engine is not installed (pip install xlsxwriter).")
+    return excel_engine
+
+
+def rollover_sheets(sheet_name, data, max_rows=EXCEL_MAX_ROWS - 1):
+    """
+    Split one sheet into as many sheets as needed to stay under the row limit.
+
+    Parameters:
+    - sheet_name: Name of the first sheet. Later sheets get ' (2)', ' (3)', ...
+    - data: The DataFrame to write.
+    - max_rows: Maximum data rows per sheet, excluding the header.
+
+    Yields:
+    - tuple: (sheet name, DataFrame slice).
+    """
+    if len(data) <= max_rows:
+        yield sheet_name[:EXCEL_MAX_SHEET_NAME], data
+        return
+    for part, start in enumerate(range(0, len(data), max_rows), start=1):
+        suffix = "" if part == 1 else f" ({part})"
+        yield sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix, data.iloc[start:start + max_rows]
+
+
+def write_excel_sheets(file_path, sheets, excel_engine="auto", log_callback=None, progress_callback=None, total=None):
+    """
+    Write several DataFrames to one workbook, one sheet each.
+
+    Parameters:
+    - file_path: Destination '.xlsx' path.
+    - sheets: Iterable of (sheet name, DataFrame) pairs. It is consumed
+      lazily, so a generator keeps only one sheet's data alive at a time.
+    - excel_engine: 'auto', 'xlsxwriter' or 'openpyxl'.
+    - log_callback: Optional function receiving one message per sheet.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+    - total: Number of entries in `sheets`, used for progress.
+
+    Returns:
+    - int: Number of sheets written, including roll-over sheets.
+    """
+    log = log_callback or (lambda message: None)
+    engine_name = resolve_engine(excel_engine)
+
+    written = 0
+    used_names = set()
+    if engine_name == "xlsxwriter":
+        writer = _RowOrderWorkbook(file_path)
+        add_sheet = writer.add_sheet
+    else:
+        writer = pd.ExcelWriter(file_path, engine=engine_name)
+        add_sheet = lambda name, part: part.to_excel(writer, sheet_name=name, index=False)
+    with writer:
+        for i, (sheet_name, data) in enumerate(sheets, start=1):
+            for name, part in rollover_sheets(str(sheet_name), data):
+                name = _unique_sheet_name(name, used_names)
+                add_sheet(name, part)
+                written += 1
+                log(f"Added sheet: {name}")
+            if progress_callback and total:
+                progress_callback(int(i * 100 / total))
+    return written
+
+
+class _RowOrderWorkbook:
+    # xlsxwriter workbook in constant_memory mode. That mode only accepts
+    # cells in row order, while DataFrame.to_excel writes column by column
+    # and would lose all but the last row of every later column, so the
+    # rows are written here one after another.
+    def __init__(self, file_path):
+        self.workbook = xlsxwriter.Workbook(file_path, {
+            "constant_memory": True,
+            "nan_inf_to_errors": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+        self.header_format = self.workbook.add_format({"bold": True, "border": 1, "align": "center"})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.workbook.close()
+
+    def add_sheet(self, name, data):
+        worksheet = self.workbook.add_worksheet(name)
+        worksheet.write_row(0, 0, [str(column) for column in data.columns], self.header_format)
+        row = 1
+        for start in range(0, len(data), EXCEL_WRITE_CHUNK_ROWS):
+            chunk = data.iloc[start:start + EXCEL_WRITE_CHUNK_ROWS]
+            # Python scalars, with every missing value as a blank cell
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for record in values.itertuples(index=False, name=None):
+                worksheet.write_row(row, 0, record)
+                row += 1
+
+
+def write_excel(data, file_path, excel_engine="auto", sheet_name="Sheet1"):
+    """
+    Write one DataFrame to a workbook, rolling over into extra sheets when
+    it exceeds Excel's row limit.
+
+    Returns:
+    - int: Number of sheets written.
+    """
+    return write_excel_sheets(file_path, [(sheet_name, data)], excel_engine=excel_engine)
+
+
+def _unique_sheet_name(name, used_names):
+    # Excel compares sheet names case-insensitively
+    candidate = name
+    counter = 2
+    while candidate.lower() in used_names:
+        suffix = f"~{counter}"
+        candidate = name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+        counter += 1
+    used_names.add(candidate.lower())
+    return candidate
@@ -1,10 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
+import os
+import engine
+import boundaries
+import coordinates
+import imputation
 
 
 class FixCoordinateWindow:
-    def __init__(self, root, data, log_callback, update_data_callback):
+    def __init__(self, root, data, log_callback, update_data_callback, task_runner):
         """
         Initialize the Fix Coordinate Tool window.
 
@@ -13,16 +17,20 @@ class FixCoordinateWindow:
         - data: The DataFrame loaded in the main application.
         - log_callback: Function to log messages to the main log screen.
         - update_data_callback: Function to update the DataFrame in the main application.
+        - task_runner: The application's TaskRunner; fixing, checking and
+          saving run on its worker thread.
         """
         self.root = root
         self.data = data
         self.log_callback = log_callback
         self.update_data_callback = update_data_callback
+        self.task_runner = task_runner
+        self.boundary_file = None
 
         # Create the Fix Coordinate window
         self.window = tk.Toplevel(root)
         self.window.title("Fix Coordinate Tool")
-        self.window.geometry("500x400")
+        self.window.geometry("500x820")
         self.window.resizable(False, False)
 
         #logo
@@ -51,8 +59,35 @@ class FixCoordinateWindow:
         self.longitude_dropdown = ttk.Combobox(self.window, textvariable=self.longitude_column, values=self.data.columns.tolist(), state="readonly")
         self.longitude_dropdown.pack(pady=5, padx=20, fill=tk.X)
 
+        # Fill method
+        ttk.Label(self.window, text="Fill Missing Coordinates With:", font=("Arial", 12)).pack(pady=5)
+        self.fill_method = tk.StringVar(value="group")
+        ttk.Radiobutton(self.window, text="Group median (hamlet, village, ward, district)", variable=self.fill_method, value="group").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Column mean", variable=self.fill_method, value="mean").pack(anchor=tk.W, padx=40)
+
+        # Outliers, used by the group median method, and bounds, also used to spot swapped rows
+        self.replace_outliers = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.window, text="Refill coordinates far from their ward", variable=self.replace_outliers).pack(anchor=tk.W, padx=40, pady=(5, 0))
+        ttk.Label(self.window, text="Expected bounds (optional: min lat, max lat, min lon, max lon):").pack(pady=(5, 0))
+        self.bounds = tk.StringVar()
+        ttk.Entry(self.window, textvariable=self.bounds, width=40).pack(pady=5)
+
         # Buttons
         ttk.Button(self.window, text="Fix Coordinates", command=self.fix_coordinates).pack(pady=10)
+
+        # Boundary check
+        ttk.Label(self.window, text="Check Against Admin Boundaries:", font=("Arial", 12)).pack(pady=5)
+        ttk.Button(self.window, text="Choose Boundary File", command=self.choose_boundary_file).pack(pady=5)
+        self.boundary_label = ttk.Label(self.window, text="No boundary file selected")
+        self.boundary_label.pack()
+        ttk.Label(self.window, text="Area columns (e.g. PREGION,PDISTRICT):").pack(pady=(5, 0))
+        self.area_columns = tk.StringVar(value="PREGION,PDISTRICT")
+        ttk.Entry(self.window, textvariable=self.area_columns, width=40).pack(pady=5)
+        ttk.Label(self.window, text="Boundary properties (same order, blank for the same names):").pack(pady=(5, 0))
+        self.boundary_properties = tk.StringVar()
+        ttk.Entry(self.window, textvariable=self.boundary_properties, width=40).pack(pady=5)
+        ttk.Button(self.window, text="Check Boundaries", command=self.check_boundaries).pack(pady=10)
+
         ttk.Button(self.window, text="Save Fixed Data", command=self.save_fixed_data).pack(pady=10)
         ttk.Button(self.window, text="Close", command=self.window.destroy).pack(pady=10)
 
@@ -68,51 +103,115 @@ class FixCoordinateWindow:
             return
 
         try:
-            # Log the action
-            self.log_callback(f"Fixing coordinates for columns '{lat_col}' and '{lon_col}'...")
-
-            # Convert columns to float and handle invalid values
-            self.data[lat_col] = pd.to_numeric(self.data[lat_col], errors="coerce")
-            self.data[lon_col] = pd.to_numeric(self.data[lon_col], errors="coerce")
+            bounds = imputation.parse_bounds(self.bounds.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"An error occurred: {e}")
+            return
 
-            # Fill missing values with the mean
-            lat_mean = self.data[lat_col].mean()
-            lon_mean = self.data[lon_col].mean()
-            self.data[lat_col].fillna(lat_mean, inplace=True)
-            self.data[lon_col].fillna(lon_mean, inplace=True)
+        # Log the action
+        self.log_callback(f"Fixing coordinates for columns '{lat_col}' and '{lon_col}'...")
+        method = self.fill_method.get()
+        replace_outliers = self.replace_outliers.get()
+        self.task_runner.submit(
+            "Fix coordinates",
+            lambda task: self.fix(task, lat_col, lon_col, bounds, method, replace_outliers),
+            on_success=lambda result: self.on_updated("Coordinates fixed successfully!"),
+            on_error=lambda e: self.on_error("Error fixing coordinates", e),
+        )
+
+    def fix(self, task, lat_col, lon_col, bounds, method, replace_outliers):
+        """
+        Parse and fill the coordinates; runs on the worker thread.
+        """
+        # Read DMS, hemisphere letters and decimal commas, and repair swapped rows
+        task.log(coordinates.format_report(engine.parse_coordinates(self.data, lat_col, lon_col, bounds)))
+
+        if method == "group":
+            # Fill from the median of each row's hamlet, village, ward or district
+            report = engine.impute_coordinates(
+                self.data, lat_col, lon_col,
+                bounds=bounds,
+                replace_outliers=replace_outliers,
+                progress_callback=task.progress,
+            )
+            task.log(f"Coordinates fixed: {imputation.format_report(report)}")
+        else:
+            # Convert columns to float and fill missing values with the mean
+            lat_mean, lon_mean = engine.fix_coordinates(self.data, lat_col, lon_col)
 
             # Log the results
-            self.log_callback(f"Coordinates fixed: Missing values replaced with column means (Lat: {lat_mean:.6f}, Lon: {lon_mean:.6f}).")
-            messagebox.showinfo("Success", "Coordinates fixed successfully!")
-            self.update_data_callback(self.data)  # Update the data in the main application
+            task.log(f"Coordinates fixed: Missing values replaced with column means (Lat: {lat_mean:.6f}, Lon: {lon_mean:.6f}).")
 
-        except Exception as e:
-            self.log_callback(f"Error fixing coordinates: {e}")
-            messagebox.showerror("Error", f"An error occurred: {e}")
+    def on_updated(self, message):
+        messagebox.showinfo("Success", message)
+        self.update_data_callback(self.data)  # Update the data in the main application
+
+    def on_error(self, context, error):
+        self.log_callback(f"{context}: {error}")
+        messagebox.showerror("Error", f"An error occurred: {error}")
+
+    def choose_boundary_file(self):
+        """
+        Select the GeoJSON file or shapefile holding the admin boundaries.
+        """
+        file_path = filedialog.askopenfilename(
+            title="Select Boundary File",
+            filetypes=[("Boundary files", "*.geojson *.json *.shp *.gpkg"), ("All Files", "*.*")],
+        )
+        if file_path:
+            self.boundary_file = file_path
+            self.boundary_label.config(text=os.path.basename(file_path))
+
+    def check_boundaries(self):
+        """
+        Flag rows whose coordinate lies outside their stated area.
+        """
+        lat_col = self.latitude_column.get()
+        lon_col = self.longitude_column.get()
+
+        if not self.boundary_file:
+            messagebox.showerror("Error", "Please choose a boundary file!")
+            return
+
+        boundary_file = self.boundary_file
+        columns = [col.strip() for col in self.area_columns.get().split(",") if col.strip()]
+        properties = [name.strip() for name in self.boundary_properties.get().split(",") if name.strip()]
+        self.log_callback(f"Checking coordinates against boundaries in '{os.path.basename(boundary_file)}'...")
+        self.task_runner.submit(
+            "Check boundaries",
+            lambda task: engine.validate_boundaries(self.data, lat_col, lon_col, boundary_file, columns, properties),
+            on_success=self.on_checked,
+            on_error=lambda e: self.on_error("Error checking boundaries", e),
+        )
+
+    def on_checked(self, report):
+        self.log_callback(f"{boundaries.format_report(report)} See the {boundaries.STATUS_COLUMN} column.")
+        self.on_updated(boundaries.format_report(report))
 
     def save_fixed_data(self):
         """
         Save the fixed dataset to a new file.
         """
-        try:
-            save_file = filedialog.asksaveasfilename(defaultextension=".csv",
-                                                     filetypes=[("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")],
-                                                     title="Save File As")
-            if not save_file:
-                messagebox.showinfo("Info", "Save operation canceled.")
-                return
-
-            if save_file.endswith(".csv"):
-                self.data.to_csv(save_file, index=False)
-            elif save_file.endswith(".xlsx"):
-                self.data.to_excel(save_file, index=False, engine="openpyxl")
-            else:
-                raise ValueError("Unsupported file format!")
-
-            # Log the save action
-            self.log_callback(f"Fixed data saved as: {save_file}")
-            messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
-
-        except Exception as e:
-            self.log_callback(f"Error saving file: {e}")
-            messagebox.showerror("Error", f"An error occurred while saving: {e}")
+        save_file = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                 filetypes=list(engine.FILE_DIALOG_TYPES.values()),
+                                                 title="Save File As")
+        if not save_file:
+            messagebox.showinfo("Info", "Save operation canceled.")
+            return
+
+        data = self.data
+        self.task_runner.submit(
+            f"Save {os.path.basename(save_file)}",
+            lambda task: engine.save_dataset(data, save_file),
+            on_success=lambda result: self.on_saved(save_file),
+            on_error=self.on_save_error,
+        )
+
+    def on_saved(self, save_file):
+        # Log the save action
+        self.log_callback(f"Fixed data saved as: {save_file}")
+        messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
+
+    def on_save_error(self, error):
+        self.log_callback(f"Error saving file: {error}")
+        messagebox.showerror("Error", f"An error occurred while saving: {error}")
@@ -1,10 +1,12 @@
+import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
+import engine
+import geocoder
 
 
 class GeocodeWindow:
-    def __init__(self, root, data, log_callback, update_data_callback):
+    def __init__(self, root, data, log_callback, update_data_callback, task_runner):
         """
         Initialize the Geocode Tool window.
 
@@ -13,17 +15,20 @@ class GeocodeWindow:
         - data: The DataFrame loaded in the main application.
         - log_callback: Function to log messages to the main log screen.
         - update_data_callback: Function to update the DataFrame in the main application.
+        - task_runner: The application's TaskRunner; geocoding and saving
+          run on its worker thread.
         """
         self.root = root
         self.data = data
         self.log_callback = log_callback
         self.update_data_callback = update_data_callback
-        
+        self.task_runner = task_runner
+        self.schema = None
 
         # Create the Geocode window
         self.window = tk.Toplevel(root)
         self.window.title("Geocode Tool")
-        self.window.geometry("500x450")
+        self.window.geometry("500x520")
         self.window.resizable(False, False)
 
         #logo
@@ -48,6 +53,11 @@ class GeocodeWindow:
         # Instructions
         ttk.Label(self.window, text="Generate CODE1, CODE2, and leave GEOCODE empty", font=("Arial", 12)).pack(pady=5)
 
+        # Optional code schema (field order, widths and pad characters)
+        self.schema_label = ttk.Label(self.window, text="Code schema: NBS default", font=("Arial", 10))
+        self.schema_label.pack(pady=5)
+        ttk.Button(self.window, text="Load Code Schema...", command=self.load_schema).pack(pady=5)
+
         # Generate and Save buttons
         ttk.Button(self.window, text="Generate Geocode", command=self.generate_geocode).pack(pady=10)
         ttk.Button(self.window, text="Save File", command=self.save_data).pack(pady=10)
@@ -57,100 +67,65 @@ class GeocodeWindow:
         """
         Generate CODE1 and CODE2, and leave GEOCODE empty.
         """
-        try:
-            # Ensure required columns are present
-            required_columns = [
-                "PREGION", "PDISTRICT", "PCOUNCIL",
-                "PCONSTITUENCY", "PDIVISION", "PWARD", "PVILLAGE", "PHAMLET"
-            ]
-            missing_columns = [col for col in required_columns if col not in self.data.columns]
-            if missing_columns:
-                raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
-
-            # Get the user input for PREGION
-            pregion_value = self.pregion_value.get().strip()
-            if not pregion_value.isdigit() or len(pregion_value) != 2:
-                raise ValueError("PREGION must be a 2-digit numeric value.")
-
-            self.log_callback(f"Using PREGION value: {pregion_value}")
-
-            # Replace PREGION with the user-provided value
-            self.data["PREGION"] = pregion_value
-
-            self.log_callback("Generating CODE1...")
-
-            # Format PDISTRICT as two digits and concatenate with PREGION and PCOUNCIL
-            self.data["PDISTRICT"] = self.data["PDISTRICT"].apply(lambda x: f"{int(x):02}" if pd.notnull(x) else "00")
-            self.data["CODE1"] = (
-                self.data["PREGION"] +
-                self.data["PDISTRICT"] +
-                self.data["PCOUNCIL"].astype(str)
-            ).astype(str)
-
-            self.log_callback("CODE1 generated successfully.")
-
-            self.log_callback("Generating CODE2...")
-
-            # Format components of CODE2 to ensure it is 10 characters long
-            self.data["PWARD"] = self.data["PWARD"].apply(lambda x: f"{int(x):03}" if pd.notnull(x) else "000")
-            self.data["PVILLAGE"] = self.data["PVILLAGE"].apply(lambda x: f"{int(x):02}" if pd.notnull(x) else "00")
-            self.data["PHAMLET"] = self.data["PHAMLET"].apply(lambda x: f"{int(x):03}" if pd.notnull(x) else "000")
-            self.data["CODE2"] = (
-                self.data["PCONSTITUENCY"].astype(str) +
-                self.data["PDIVISION"].astype(str) +
-                self.data["PWARD"] +
-                self.data["PVILLAGE"] +
-                self.data["PHAMLET"]
-            ).astype(str)
-
-            self.log_callback("CODE2 generated successfully.")
-
-            self.log_callback("Leaving GEOCODE empty...")
-
-            # Initialize GEOCODE column as empty
-            self.data["GEOCODE"] = ""
-
-            self.log_callback("GEOCODE initialized as empty.")
-
-            # Reorder columns: CODE1, CODE2, GEOCODE at the beginning
-            new_order = ["CODE1", "CODE2", "GEOCODE"] + [col for col in self.data.columns if col not in ["CODE1", "CODE2", "GEOCODE"]]
-            self.data = self.data[new_order]
-
-            # Drop original columns
-            self.data.drop(columns=required_columns, inplace=True)
-            self.log_callback(f"Dropped original columns: {', '.join(required_columns)}")
+        pregion_value = self.pregion_value.get()
+        schema = self.schema
+        self.task_runner.submit(
+            "Generate geocode",
+            lambda task: engine.generate_geocode(self.data, pregion_value, log_callback=task.log, schema=schema,
+                                                 progress_callback=task.progress),
+            on_success=self.on_geocoded,
+            on_error=self.on_error,
+        )
+
+    def on_geocoded(self, data):
+        # Notify success and update the main data
+        self.data = data
+        messagebox.showinfo("Success", "Geocode columns generated successfully (GEOCODE left empty)!")
+        self.update_data_callback(self.data)
 
-            # Notify success and update the main data
-            messagebox.showinfo("Success", "Geocode columns generated successfully (GEOCODE left empty)!")
-            self.update_data_callback(self.data)
+    def on_error(self, error):
+        self.log_callback(f"Error generating geocode: {error}")
+        messagebox.showerror("Error", f"An error occurred: {error}")
 
+    def load_schema(self):
+        """
+        Load a JSON code schema to use instead of the NBS CODE1/CODE2 layout.
+        """
+        schema_file = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")], title="Select Code Schema")
+        if not schema_file:
+            return
+        try:
+            self.schema = geocoder.load_schema(schema_file)
+            self.schema_label.config(text=f"Code schema: {os.path.basename(schema_file)}")
+            self.log_callback(f"Loaded code schema: {schema_file}")
         except Exception as e:
-            self.log_callback(f"Error generating geocode: {e}")
+            self.log_callback(f"Error loading code schema: {e}")
             messagebox.showerror("Error", f"An error occurred: {e}")
 
     def save_data(self):
         """
         Save the modified dataset to a new file.
         """
-        try:
-            save_file = filedialog.asksaveasfilename(defaultextension=".csv",
-                                                     filetypes=[("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")],
-                                                     title="Save File As")
-            if not save_file:
-                messagebox.showinfo("Info", "Save operation canceled.")
-                return
-
-            if save_file.endswith(".csv"):
-                self.data.to_csv(save_file, index=False)
-            elif save_file.endswith(".xlsx"):
-                self.data.to_excel(save_file, index=False, engine="openpyxl")
-            else:
-                raise ValueError("Unsupported file format!")
-
-            # Log the save action
-            self.log_callback(f"File saved as: {save_file}")
-            messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
-
-        except Exception as e:
-            self.log_callback(f"Error saving file: {e}")
-            messagebox.showerror("Error", f"An error occurred while saving: {e}")
+        save_file = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                 filetypes=list(engine.FILE_DIALOG_TYPES.values()),
+                                                 title="Save File As")
+        if not save_file:
+            messagebox.showinfo("Info", "Save operation canceled.")
+            return
+
+        data = self.data
+        self.task_runner.submit(
+            f"Save {os.path.basename(save_file)}",
+            lambda task: engine.save_dataset(data, save_file),
+            on_success=lambda result: self.on_saved(save_file),
+            on_error=self.on_save_error,
+        )
+
+    def on_saved(self, save_file):
+        # Log the save action
+        self.log_callback(f"File saved as: {save_file}")
+        messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
+
+    def on_save_error(self, error):
+        self.log_callback(f"Error saving file: {error}")
+        messagebox.showerror("Error", f"An error occurred while saving: {error}")
@@ -0,0 +1,244 @@
+"""
+Group-aware imputation and outlier checks for household coordinates.
+
+A missing coordinate is filled with the median of its hamlet; hamlets with
+no known coordinates fall back to their village, then ward, then district,
+and finally to the median of the whole dataset. Each level is one
+`groupby().transform("median")` over integer group codes, which are built
+once by factorizing the admin columns from the top of the hierarchy down,
+so a hamlet is only ever grouped with hamlets of the same village.
+
+Before filling, coordinates outside the valid range (or a user bounding
+box) are cleared, and coordinates far from the centroid of their group are
+flagged as outliers: the distance of every point to its group median is
+computed in one vectorized haversine pass and compared with the typical
+distance within that group.
+"""
+import numpy as np
+import pandas as pd
+
+
+# Admin columns from the top of the hierarchy down
+GEO_HIERARCHY = [
+    "PREGION", "PDISTRICT", "PCOUNCIL",
+    "PCONSTITUENCY", "PDIVISION", "PWARD", "PVILLAGE", "PHAMLET"
+]
+
+# Imputation levels, most local first, and the admin column each one ends at
+IMPUTATION_LEVELS = [
+    ("hamlet", "PHAMLET"),
+    ("village", "PVILLAGE"),
+    ("ward", "PWARD"),
+    ("district", "PDISTRICT"),
+]
+
+# Label of the last-resort fill with the median of every known coordinate
+OVERALL_LEVEL = "overall"
+
+# Column describing, per row, what was flagged and at which level it was filled
+STATUS_COLUMN = "COORD_STATUS"
+
+# Valid coordinate range: (min lat, max lat, min lon, max lon)
+WORLD_BOUNDS = (-90.0, 90.0, -180.0, 180.0)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Groups smaller than this are too small to judge outliers in
+MIN_OUTLIER_GROUP = 5
+
+
+def group_codes(data, hierarchy=None):
+    """
+    Return integer group codes for every admin level present in `data`.
+
+    Each level's code identifies the combination of that column and every
+    column above it, so equal hamlet numbers in different villages get
+    different codes. Rows with a missing value at a level (or above it)
+    get -1 from that level down.
+
+    Returns:
+    - dict: Admin column name to an int64 code array. Codes are not
+      consecutive; groupby renumbers them anyway.
+    """
+    hierarchy = GEO_HIERARCHY if hierarchy is None else hierarchy
+    codes = {}
+    combined = np.zeros(len(data), dtype=np.int64)
+    for col in hierarchy:
+        if col not in data.columns:
+            continue
+        col_codes, col_uniques = pd.factorize(data[col])
+        missing = (combined < 0) | (col_codes < 0)
+        width = max(len(col_uniques), 1)
+        if combined.max(initial=0) >= np.iinfo(np.int64).max // width:
+            # Renumber only when the combined codes would overflow
+            combined = pd.factorize(combined)[0]
+        combined = np.where(missing, -1, combined * width + col_codes)
+        codes[col] = combined
+    return codes
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Return the great-circle distance in kilometres between coordinate arrays.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(values, dtype=float)) for values in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _fill_values(lat, lon, observed, codes, missing):
+    """
+    Return the group medians of the `missing` rows at one level.
+
+    Only groups that contain a missing row are aggregated, so levels after
+    the first touch a small part of the data.
+    """
+    missing_codes = codes[missing]
+    wanted = np.unique(missing_codes[missing_codes >= 0])
+    rows = observed & np.isin(codes, wanted)
+    medians = pd.DataFrame({"lat": lat[rows], "lon": lon[rows]}).groupby(codes[rows]).median()
+    medians = medians.reindex(missing_codes)
+    return medians["lat"].to_numpy(), medians["lon"].to_numpy()
+
+
+def _group_medians(coords, codes):
+    # One transform for both columns; rows without a group get NaN
+    medians = coords.groupby(codes).transform("median")
+    medians[codes < 0] = np.nan
+    return medians
+
+
+def _status_labels(levels):
+    # One label per (flags, fill level) combination, e.g. 'outlier;filled:village'
+    labels = []
+    for flag in range(4):
+        for level in [None] + [name for name, _ in levels]:
+            parts = [label for bit, label in ((1, "out_of_bounds"), (2, "outlier")) if flag & bit]
+            if level is not None:
+                parts.append(f"filled:{level}")
+            labels.append(";".join(parts))
+    return np.array(labels, dtype=object)
+
+
+def impute_coordinates(data, lat_col, lon_col, bounds=None, outlier_column="PWARD", outlier_factor=5.0,
+                       min_outlier_km=5.0, replace_outliers=True, status_column=STATUS_COLUMN, progress_callback=None):
+    """
+    Clean and fill coordinates in place using the admin hierarchy.
+
+    Parameters:
+    - data: The DataFrame to modify.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+    - bounds: Optional (min lat, max lat, min lon, max lon); coordinates
+      outside it are cleared. Defaults to the valid world range.
+    - outlier_column: Admin column whose groups are used for the outlier
+      check, or None to skip it.
+    - outlier_factor: A point is an outlier when it lies more than this
+      many times its group's median distance from the group centroid...
+    - min_outlier_km: ...and more than this many kilometres from it.
+    - replace_outliers: Clear outliers so they are filled like missing values.
+    - status_column: Column receiving a per-row description of what was
+      flagged and filled, or None to skip it.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      after the outlier check and after each fill level.
+
+    Returns:
+    - dict: Counts with keys 'out_of_bounds', 'outliers', 'filled' (rows
+      filled per level, in fill order) and 'unfilled'.
+    """
+    progress = progress_callback or (lambda value: None)
+    lat = pd.to_numeric(data[lat_col], errors="coerce").to_numpy(dtype=float, copy=True)
+    lon = pd.to_numeric(data[lon_col], errors="coerce").to_numpy(dtype=float, copy=True)
+    min_lat, max_lat, min_lon, max_lon = bounds or WORLD_BOUNDS
+    codes = group_codes(data)
+    report = {"out_of_bounds": 0, "outliers": 0, "filled": {}, "unfilled": 0}
+    # Per-row status as small integer codes, turned into labels at the end
+    flags = np.zeros(len(data), dtype=np.int8)
+    fill_level = np.full(len(data), -1, dtype=np.int8)
+
+    # Out-of-range coordinates are treated as missing
+    known = ~(np.isnan(lat) | np.isnan(lon))
+    out_of_bounds = known & ((lat < min_lat) | (lat > max_lat) | (lon < min_lon) | (lon > max_lon))
+    lat[out_of_bounds] = np.nan
+    lon[out_of_bounds] = np.nan
+    report["out_of_bounds"] = int(out_of_bounds.sum())
+    flags[out_of_bounds] |= 1
+
+    if outlier_column in codes:
+        group = codes[outlier_column]
+        coords = pd.DataFrame({"lat": lat, "lon": lon})
+        medians = _group_medians(coords, group)
+        distance = pd.Series(haversine_km(lat, lon, medians["lat"], medians["lon"]))
+        typical = distance.groupby(group).transform("median").to_numpy()
+        size = coords["lat"].groupby(group).transform("count").to_numpy()
+        with np.errstate(invalid="ignore"):
+            outliers = (
+                (group >= 0) & (size >= MIN_OUTLIER_GROUP)
+                & (distance.to_numpy() > np.maximum(outlier_factor * typical, min_outlier_km))
+            )
+        report["outliers"] = int(outliers.sum())
+        flags[outliers] |= 2
+        if replace_outliers:
+            lat[outliers] = np.nan
+            lon[outliers] = np.nan
+
+    # Medians always come from observed coordinates, never from earlier fills
+    observed = ~(np.isnan(lat) | np.isnan(lon))
+    filled_lat, filled_lon = lat.copy(), lon.copy()
+    levels = [(name, col) for name, col in IMPUTATION_LEVELS if col in codes] + [(OVERALL_LEVEL, None)]
+    for level, (name, col) in enumerate(levels):
+        progress(100 * (level + 1) / (len(levels) + 1))
+        missing = np.flatnonzero(np.isnan(filled_lat) | np.isnan(filled_lon))
+        if not len(missing):
+            break
+        if col is None:
+            lat_fill = np.full(len(missing), np.nanmedian(lat) if observed.any() else np.nan)
+            lon_fill = np.full(len(missing), np.nanmedian(lon) if observed.any() else np.nan)
+        else:
+            lat_fill, lon_fill = _fill_values(lat, lon, observed, codes[col], missing)
+        before = np.isnan(filled_lat[missing]) | np.isnan(filled_lon[missing])
+        filled_lat[missing] = np.where(np.isnan(filled_lat[missing]), lat_fill, filled_lat[missing])
+        filled_lon[missing] = np.where(np.isnan(filled_lon[missing]), lon_fill, filled_lon[missing])
+        rows = missing[before & ~(np.isnan(filled_lat[missing]) | np.isnan(filled_lon[missing]))]
+        report["filled"][name] = len(rows)
+        fill_level[rows] = level
+
+    report["unfilled"] = int((np.isnan(filled_lat) | np.isnan(filled_lon)).sum())
+
+    data[lat_col] = filled_lat
+    data[lon_col] = filled_lon
+    if status_column:
+        data[status_column] = pd.Series(_status_labels(levels).take(flags * (len(levels) + 1) + fill_level + 1),
+                                        index=data.index, dtype=object)
+    progress(100)
+    return report
+
+
+def parse_bounds(text):
+    """
+    Parse 'min lat, max lat, min lon, max lon' typed by a user.
+
+    Returns:
+    - tuple or None: The four bounds, or None for an empty string.
+
+    Raises:
+    - ValueError: If the text does not hold four numbers in a valid order.
+    """
+    if not text.strip():
+        return None
+    try:
+        values = tuple(float(value) for value in text.split(","))
+    except ValueError:
+        raise ValueError("Bounds must be four numbers: min lat, max lat, min lon, max lon.") from None
+    if len(values) != 4 or values[0] >= values[1] or values[2] >= values[3]:
+        raise ValueError("Bounds must be four numbers: min lat, max lat, min lon, max lon.")
+    return values
+
+
+def format_report(report):
+    """
+    Return a one-line summary of an imputation report for the logs.
+    """
+    filled = ", ".join(f"{level}: {count}" for level, count in report["filled"].items()) or "none"
+    return (f"Out of bounds: {report['out_of_bounds']}, outliers: {report['outliers']}, "
+            f"filled by level ({filled}), still missing: {report['unfilled']}.")
@@ -0,0 +1,477 @@
+"""
+Incremental geocoding and coordinate filling for appended batches.
+
+Field teams send daily deltas to a master file of millions of rows.
+Re-running the geocode and coordinate fill over the whole accumulated file
+for every delta costs a full recompute; here only the delta is processed and
+its rows are appended to the cleaned CSV output.
+
+What a full run would have needed from the rest of the data is kept in a
+state store, a folder next to the output:
+
+- rows/part-NNNNN.parquet: one part per run, holding the identity hash of
+  every processed row (a hash of all its source values) and, when a key
+  column is used, its key and the byte offset of its line in the output.
+  A delta row whose hash is already stored was processed before and is
+  skipped.
+- groups.parquet: per hamlet, village, ward and district, the running sum
+  of the observed latitudes and longitudes and their count, plus the same
+  for the whole dataset. Missing coordinates of a delta are filled from the
+  means these give, after the delta's own coordinates have been added.
+- meta.json: the options the store was built with, its parts, and the size
+  the output had after the last run, so an output changed by anything else
+  is detected instead of silently diverging from the store.
+
+Group fills use means rather than the medians of imputation.py, since
+medians cannot be updated from running totals. Rows already in the output
+keep the values they were given; only new rows see the updated means.
+
+With a key column (e.g. a household ID), a delta row whose key was seen
+before with other values is a correction: its old line is cut out of the
+output, and the new version is appended. The stored offsets locate the old
+lines without parsing the output; the bytes after the oldest corrected
+line are moved back over the gap, so the cost grows with how far back the
+corrections reach, not with the size of the output. Correcting rows from
+the first days of a very large output still moves most of the file; a
+warning is logged when a correction moves more than half of it. The old
+row's coordinates stay in the group totals.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import boundaries
+import coordinates
+import engine
+import geocoder
+import imputation
+import instrumentation
+import streaming
+
+
+# Suffix of the state folder kept next to the output by default
+STATE_SUFFIX = ".nbsstate"
+
+# Layout version of the state folder
+STATE_VERSION = 2
+
+# Columns of the stored row parts
+HASH_COLUMN = "ROW_HASH"
+KEY_COLUMN = "ROW_KEY"
+START_COLUMN = "ROW_START"
+
+# Offset stored for rows no longer in the output
+REMOVED = -1
+
+# Bytes moved at a time when cutting corrected lines out of the output
+MOVE_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Group level holding the totals of every observed coordinate
+OVERALL_LEVEL = imputation.OVERALL_LEVEL
+
+METHODS = ("group", "mean")
+
+
+def default_state_dir(output_path):
+    """
+    Return the state folder used for an output file by default.
+    """
+    return output_path + STATE_SUFFIX
+
+
+def row_hashes(data, columns):
+    """
+    Return a uint64 identity hash of every row over `columns`, in order.
+    """
+    return pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+
+
+def _group_hashes(data):
+    # (level name, uint64 hash, has-group mask) per imputation level present,
+    # each level keyed by its admin column and every column above it
+    levels = []
+    for name, column in imputation.IMPUTATION_LEVELS:
+        if column not in data.columns:
+            continue
+        path = imputation.GEO_HIERARCHY[:imputation.GEO_HIERARCHY.index(column) + 1]
+        keys = boundaries.area_keys([data[col] for col in path if col in data.columns])
+        present = ~pd.isna(keys)
+        hashes = pd.util.hash_array(np.where(present, keys, "").astype(object))
+        levels.append((name, hashes, present))
+    return levels
+
+
+def _group_totals(levels, lat, lon, observed):
+    # Coordinate sums and counts of the observed rows per (level, group)
+    frames = []
+    for name, hashes, present in levels + [(OVERALL_LEVEL, np.zeros(len(lat), dtype=np.uint64), True)]:
+        rows = observed & present
+        totals = pd.DataFrame({"lat_sum": lat[rows], "lon_sum": lon[rows], "count": np.ones(rows.sum(), dtype=np.int64)})
+        totals = totals.groupby(hashes[rows]).sum()
+        totals.index.name = "group"
+        frames.append(totals.reset_index().assign(level=name))
+    return pd.concat(frames, ignore_index=True)[["level", "group", "lat_sum", "lon_sum", "count"]]
+
+
+def _group_means(totals, level):
+    # Lat and lon means of one level, indexed by group hash
+    rows = totals[totals["level"] == level].set_index("group")
+    return pd.DataFrame({"lat": rows["lat_sum"] / rows["count"], "lon": rows["lon_sum"] / rows["count"]})
+
+
+class IncrementalState:
+    def __init__(self, folder, options):
+        """
+        Open (or start) the state store of an incremental output.
+
+        Parameters:
+        - folder: The state folder.
+        - options: JSON-serialisable dict of the processing options; a
+          store built with different options cannot be extended.
+
+        Raises:
+        - ValueError: If the store was built with different options.
+        """
+        self.folder = folder
+        self.options = json.loads(json.dumps(options))
+        self.meta = {"version": STATE_VERSION, "options": self.options, "parts": [],
+                     "source_columns": None, "output_size": None, "rows": 0}
+        self.groups = pd.DataFrame({"level": pd.Series(dtype=object), "group": pd.Series(dtype=np.uint64),
+                                    "lat_sum": pd.Series(dtype=float), "lon_sum": pd.Series(dtype=float),
+                                    "count": pd.Series(dtype=np.int64)})
+
+        meta_path = os.path.join(folder, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+            if meta.get("version") != STATE_VERSION:
+                raise ValueError(f"The state in {folder} was built by another version of this tool; rebuild it.")
+            if meta.get("options") != self.options:
+                changed = sorted(key for key in self.options if (meta.get("options") or {}).get(key) != self.options[key])
+                raise ValueError(f"The state in {folder} was built with other options ({', '.join(changed)}); "
+                                 f"rebuild it to change them.")
+            self.meta = meta
+            groups_path = os.path.join(folder, "groups.parquet")
+            if os.path.exists(groups_path):
+                self.groups = pd.read_parquet(groups_path)
+
+    @property
+    def is_new(self):
+        return not self.meta["parts"]
+
+    @instrumentation.timed("read state")
+    def seen_rows(self):
+        """
+        Return the hashes of every row processed so far and, with a key
+        column, a Series of the output offset of each key's current line.
+        """
+        columns = [HASH_COLUMN, KEY_COLUMN, START_COLUMN] if self.options["key_column"] else [HASH_COLUMN]
+        parts = [pd.read_parquet(path, columns=columns) for path in self._part_paths()]
+        if not parts:
+            return np.array([], dtype=np.uint64), None
+        stored = pd.concat(parts, ignore_index=True)
+        instrumentation.count_rows(len(stored))
+        if not self.options["key_column"]:
+            return stored[HASH_COLUMN].to_numpy(), None
+        # Later parts hold the newer version of a key
+        latest = stored.drop_duplicates(KEY_COLUMN, keep="last")
+        return latest[HASH_COLUMN].to_numpy(), latest.set_index(KEY_COLUMN)[START_COLUMN]
+
+    def _part_paths(self):
+        return [os.path.join(self.folder, "rows", part) for part in self.meta["parts"]]
+
+    @instrumentation.timed("read state")
+    def row_starts(self):
+        """
+        Return the output byte offsets of every row still in the output, sorted.
+        """
+        starts = [pd.read_parquet(path, columns=[START_COLUMN])[START_COLUMN].to_numpy() for path in self._part_paths()]
+        starts = np.concatenate(starts) if starts else np.zeros(0, dtype=np.int64)
+        return np.sort(starts[starts != REMOVED])
+
+    @instrumentation.timed("save state")
+    def move_rows(self, cut_starts, cut_lengths):
+        """
+        Update the stored offsets after lines were cut out of the output:
+        the cut rows are marked removed and every later row moves back by
+        the bytes cut before it.
+
+        Parameters:
+        - cut_starts: Sorted offsets of the lines cut.
+        - cut_lengths: Their lengths in bytes.
+        """
+        cut_before = np.concatenate([[0], np.cumsum(cut_lengths)])
+        for path in self._part_paths():
+            rows = pd.read_parquet(path)
+            starts = rows[START_COLUMN].to_numpy()
+            kept = starts != REMOVED
+            cut = kept & np.isin(starts, cut_starts)
+            moved = np.where(kept, starts - cut_before[np.searchsorted(cut_starts, starts)], REMOVED)
+            moved[cut] = REMOVED
+            if not np.array_equal(moved, starts):
+                rows[START_COLUMN] = moved
+                _write_replace(lambda temp_path: rows.to_parquet(temp_path, index=False), path)
+
+    def merged_totals(self, delta_totals):
+        """
+        Return the stored group totals with a delta's totals added.
+        """
+        if not len(self.groups):
+            return delta_totals
+        merged = pd.concat([self.groups, delta_totals], ignore_index=True)
+        return merged.groupby(["level", "group"], as_index=False, sort=False).sum()
+
+    @instrumentation.timed("save state")
+    def save(self, rows, totals, source_columns, output_size):
+        """
+        Add a run's rows and group totals to the store. meta.json is
+        replaced last, so an interrupted save leaves the previous state.
+        """
+        os.makedirs(os.path.join(self.folder, "rows"), exist_ok=True)
+        part = f"part-{len(self.meta['parts']) + 1:05d}.parquet"
+        _write_replace(lambda path: rows.to_parquet(path, index=False), os.path.join(self.folder, "rows", part))
+        _write_replace(lambda path: totals.to_parquet(path, index=False), os.path.join(self.folder, "groups.parquet"))
+        self.groups = totals
+        self.meta["parts"].append(part)
+        self.meta["source_columns"] = source_columns
+        self.meta["output_size"] = output_size
+        self.meta["rows"] += len(rows)
+
+        def write_meta(path):
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(self.meta, file, indent=2)
+        _write_replace(write_meta, os.path.join(self.folder, "meta.json"))
+
+
+def _write_replace(write_function, file_path):
+    # Write under a temporary name, then rename over the target
+    temp_path = file_path + ".tmp"
+    write_function(temp_path)
+    os.replace(temp_path, file_path)
+
+
+@instrumentation.timed("fill coordinates")
+def fill_coordinates(data, lat_col, lon_col, state, method="group", bounds=None):
+    """
+    Parse and fill the coordinates of new rows in place from running group
+    means, and return the updated group totals.
+
+    Parameters:
+    - data: The new rows.
+    - lat_col: Name of the latitude column.
+    - lon_col: Name of the longitude column.
+    - state: The IncrementalState the totals are read from.
+    - method: 'group' fills from the hamlet, village, ward, district and
+      then overall means; 'mean' fills from the overall means only.
+    - bounds: Optional (min lat, max lat, min lon, max lon); coordinates
+      outside it are cleared before filling.
+
+    Returns:
+    - tuple: (stored totals plus those of `data`, dict of rows filled per level).
+    """
+    lat, lon, status = coordinates.parse_pair(data[lat_col], data[lon_col], bounds)
+    data[coordinates.STATUS_COLUMN] = pd.Series(coordinates.status_labels(status), index=data.index, dtype=object)
+    labels = np.full(len(data), "", dtype=object)
+
+    if bounds is not None and method == "group":
+        min_lat, max_lat, min_lon, max_lon = bounds
+        out_of_bounds = (lat < min_lat) | (lat > max_lat) | (lon < min_lon) | (lon > max_lon)
+        lat[out_of_bounds] = np.nan
+        lon[out_of_bounds] = np.nan
+        labels[out_of_bounds] = "out_of_bounds"
+
+    levels = _group_hashes(data) if method == "group" else []
+    observed = ~(np.isnan(lat) | np.isnan(lon))
+    totals = state.merged_totals(_group_totals(levels, lat, lon, observed))
+
+    # As in imputation.py, a row missing either value is filled at the first level with a mean
+    filled = {}
+    everywhere = np.ones(len(data), dtype=bool)
+    for name, hashes, present in levels + [(OVERALL_LEVEL, np.zeros(len(data), dtype=np.uint64), everywhere)]:
+        missing = np.flatnonzero((np.isnan(lat) | np.isnan(lon)) & present)
+        if not len(missing):
+            continue
+        means = _group_means(totals, name).reindex(hashes[missing])
+        lat[missing] = np.where(np.isnan(lat[missing]), means["lat"].to_numpy(), lat[missing])
+        lon[missing] = np.where(np.isnan(lon[missing]), means["lon"].to_numpy(), lon[missing])
+        rows = missing[~(np.isnan(lat[missing]) | np.isnan(lon[missing]))]
+        if not len(rows):
+            continue
+        filled[name] = len(rows)
+        labels[rows] = [f"{label};filled:{name}" if label else f"filled:{name}" for label in labels[rows]]
+
+    data[lat_col] = lat
+    data[lon_col] = lon
+    if method == "group":
+        data[imputation.STATUS_COLUMN] = pd.Series(labels, index=data.index, dtype=object)
+    return totals, filled
+
+
+def _clear_state(state_dir, output_path):
+    # Remove the files of a state store and its output, leaving anything else in the folder
+    rows_dir = os.path.join(state_dir, "rows")
+    paths = [os.path.join(state_dir, "meta.json"), os.path.join(state_dir, "groups.parquet"), output_path]
+    if os.path.isdir(rows_dir):
+        paths += [os.path.join(rows_dir, name) for name in os.listdir(rows_dir) if name.startswith("part-")]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _cut_lines(output_path, starts, ends):
+    """
+    Cut the byte ranges [starts[i], ends[i]) out of a file in place, moving
+    the bytes after the first range back over the gaps.
+
+    Returns:
+    - int: Bytes moved.
+    """
+    moved = 0
+    with open(output_path, "r+b") as file:
+        write_at = int(starts[0])
+        keep_to = np.r_[starts[1:], os.path.getsize(output_path)]
+        for begin, stop in zip(ends, keep_to):
+            read_at = int(begin)
+            while read_at < stop:
+                file.seek(read_at)
+                block = file.read(min(MOVE_BLOCK_BYTES, int(stop) - read_at))
+                file.seek(write_at)
+                file.write(block)
+                read_at += len(block)
+                write_at += len(block)
+                moved += len(block)
+        file.truncate(write_at)
+    return moved
+
+
+def _remove_rows(output_path, state, old_starts, log):
+    # Cut the earlier versions of corrected rows out of the output and move the stored offsets to match
+    all_starts = state.row_starts()
+    cut_starts = np.sort(np.asarray(old_starts, dtype=np.int64))
+    following = np.searchsorted(all_starts, cut_starts, side="right")
+    output_size = os.path.getsize(output_path)
+    cut_ends = np.where(following < len(all_starts), all_starts[np.minimum(following, len(all_starts) - 1)], output_size)
+    moved = _cut_lines(output_path, cut_starts, cut_ends)
+    state.move_rows(cut_starts, cut_ends - cut_starts)
+    log(f"Removed the previous versions of {len(cut_starts)} corrected rows from the output "
+        f"({instrumentation.format_bytes(moved)} moved).")
+    if moved > output_size / 2:
+        log(f"Warning: the corrections reach back into the first half of {output_path}, so most of it was moved.")
+
+
+@instrumentation.timed("incremental")
+def process_delta(delta_path, output_path, state_dir=None, pregion_value=None, schema=None, lat_col=None, lon_col=None,
+                  method="group", bounds=None, key_column=None, rebuild=False, log_callback=None):
+    """
+    Geocode and fill the coordinates of the new or changed rows of a delta
+    file and append them to a CSV output.
+
+    Parameters:
+    - delta_path: The delta file, in any supported format.
+    - output_path: The '.csv' output that accumulates every processed row.
+    - state_dir: The state folder; defaults to the output path plus '.nbsstate'.
+    - pregion_value: Two-digit PREGION value, or None to skip geocoding.
+    - schema: Optional code schema (see geocoder.py).
+    - lat_col, lon_col: Coordinate columns, or None to skip coordinate filling.
+    - method: 'group' or 'mean', see fill_coordinates().
+    - bounds: Optional (min lat, max lat, min lon, max lon).
+    - key_column: Optional column identifying a row across deltas, so a
+      changed row replaces its earlier version in the output.
+    - rebuild: Discard the state and the output and start again from this delta.
+    - log_callback: Optional function receiving progress messages.
+
+    Returns:
+    - dict: Counts with keys 'new', 'changed', 'skipped' and 'filled'.
+
+    Raises:
+    - ValueError: If the options, columns or output do not match the state.
+    """
+    log = log_callback or (lambda message: None)
+    if not output_path.endswith(".csv"):
+        raise ValueError("Incremental output must be a '.csv' file, since new rows are appended to it.")
+    if not engine.HAS_PYARROW:
+        raise ValueError("The incremental state store requires pyarrow (pip install pyarrow).")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Choose one of: {', '.join(METHODS)}.")
+    if (lat_col is None) != (lon_col is None):
+        raise ValueError("Give both a latitude and a longitude column, or neither.")
+    schema = geocoder.validate_schema(schema or geocoder.DEFAULT_SCHEMA) if pregion_value else None
+
+    state_dir = state_dir or default_state_dir(output_path)
+    options = {"pregion": pregion_value, "schema": schema, "lat": lat_col, "lon": lon_col, "method": method,
+               "bounds": list(bounds) if bounds else None, "key_column": key_column}
+    if rebuild:
+        _clear_state(state_dir, output_path)
+        log("Rebuilding the state from this delta.")
+    state = IncrementalState(state_dir, options)
+
+    output_exists = os.path.exists(output_path)
+    if state.is_new and output_exists:
+        raise ValueError(f"{output_path} exists but has no incremental state; rebuild to start over from this delta.")
+    if not state.is_new and (not output_exists or os.path.getsize(output_path) != state.meta["output_size"]):
+        raise ValueError(f"{output_path} has changed since the last incremental run; rebuild the state.")
+
+    delta = engine.load_dataset(delta_path, dtype=object, log_callback=log)
+    source_columns = delta.columns.tolist()
+    if state.meta["source_columns"] and sorted(source_columns) != sorted(state.meta["source_columns"]):
+        raise ValueError("The delta's columns differ from those of earlier deltas.")
+    source_columns = state.meta["source_columns"] or source_columns
+    for col in (key_column, lat_col, lon_col):
+        if col and col not in delta.columns:
+            raise ValueError(f"Column '{col}' not found in the delta.")
+
+    # Rows seen before, and repeats within the delta, are skipped
+    hashes = row_hashes(delta, source_columns)
+    seen, current_keys = state.seen_rows()
+    fresh = ~pd.Series(hashes).isin(seen).to_numpy() & ~pd.Series(hashes).duplicated().to_numpy()
+    if key_column:
+        # A key repeated within the delta keeps its last version
+        fresh &= ~delta[key_column].duplicated(keep="last").to_numpy()
+    rows = delta[fresh].copy()
+    changed_keys = rows[key_column][rows[key_column].isin(current_keys.index)] if key_column and current_keys is not None else []
+    report = {"new": len(rows) - len(changed_keys), "changed": len(changed_keys), "skipped": len(delta) - len(rows),
+              "filled": {}}
+    log(f"Delta of {len(delta)} rows: {report['new']} new, {report['changed']} changed, "
+        f"{report['skipped']} already processed.")
+    if not len(rows):
+        return report
+
+    totals = state.groups
+    if lat_col is not None:
+        totals, report["filled"] = fill_coordinates(rows, lat_col, lon_col, state, method, bounds)
+        filled = ", ".join(f"{level}: {count}" for level, count in report["filled"].items()) or "none"
+        log(f"Coordinates filled from running means by level ({filled}).")
+
+    stored = pd.DataFrame({HASH_COLUMN: hashes[fresh]})
+    if key_column:
+        stored[KEY_COLUMN] = rows[key_column].to_numpy()
+    if pregion_value:
+        rows = engine.generate_geocode(rows, pregion_value, log_callback=log, schema=schema)
+
+    with instrumentation.stage("merge") as current:
+        current.rows = len(rows)
+        size_before = instrumentation.file_size(output_path)
+        if output_exists:
+            header = streaming.read_csv_columns(output_path)
+            if sorted(header) != sorted(rows.columns):
+                raise ValueError("The processed delta's columns differ from those of the output.")
+            text = rows[header].to_csv(header=False, index=False)
+        else:
+            text = rows.to_csv(index=False)
+        block = text.encode("utf-8")
+        if len(changed_keys):
+            _remove_rows(output_path, state, current_keys[changed_keys].to_numpy(), log)
+        with open(output_path, "ab") as file:
+            offset = file.tell()
+            file.write(block)
+        if key_column:
+            starts = streaming.record_starts(block)
+            # The first record of a new output is its header
+            stored[START_COLUMN] = offset + (starts if output_exists else starts[1:])
+        instrumentation.add_bytes(written=max(instrumentation.file_size(output_path) - size_before, 0))
+
+    state.save(stored, totals, source_columns, os.path.getsize(output_path))
+    log(f"Appended {len(rows)} rows to {output_path}; the state now covers {state.meta['rows']} rows.")
+    return report
@@ -0,0 +1,395 @@
+"""
+Per-stage timing, throughput and memory tracing of the cleaning pipeline.
+
+The engine's stages (load, replace, coordinate fixing, geocode, partition,
+write, ...) are marked with the `timed` decorator or the `stage` context
+manager. Outside a trace these cost one thread-local lookup. Inside
+`tracing(trace)`, every stage run on that thread records its wall time,
+rows, bytes read and written and peak resident memory into the trace.
+
+Stages nest: a stage run inside another is recorded under its parent's
+path (e.g. 'split/write/save'), and repeated calls of the same path, such
+as one save per output file, are added up into one entry with a call count.
+Times, bytes and memory peaks include the nested stages.
+
+The process peak is read when a stage starts and when it ends; a stage
+records the peak at its end and how far it raised it. The peak is never
+reset here, since it is shared by the whole process (other tasks, the
+GUI): a stage that stays under an earlier peak shows no growth. Only
+benchmark.py resets it, between isolated runs. Work done in other threads
+or processes (parallel writers) is not seen by the trace, apart from the
+bytes the caller adds for it.
+
+`profiled` additionally runs a block under cProfile or, when installed,
+pyinstrument, for a detailed report of a single run.
+"""
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from pyinstrument import Profiler
+    HAS_PYINSTRUMENT = True
+except ImportError:
+    HAS_PYINSTRUMENT = False
+
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+# Functions listed in the log after a cProfile run
+PROFILE_TOP_FUNCTIONS = 20
+
+_local = threading.local()
+
+
+def reset_peak_rss():
+    """
+    Reset the peak resident memory of this process; Linux only.
+
+    The peak is process-wide, so this is meant for benchmarks that run one
+    operation at a time, not for stages of a running application.
+
+    Returns:
+    - bool: False if the peak cannot be reset here.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident memory of this process in MB, since the last
+    reset_peak_rss() on Linux, or None if it cannot be read.
+    """
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return None
+
+
+class StageRecord:
+    def __init__(self, path):
+        """
+        Totals of every call of one stage path.
+        """
+        self.path = path
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_rss_mb = None
+        self.peak_growth_mb = None
+
+    @property
+    def name(self):
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def depth(self):
+        return self.path.count("/")
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.rows and self.seconds else None
+
+    def to_dict(self):
+        return {
+            "stage": self.path,
+            "calls": self.calls,
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows_per_sec) if self.rows_per_sec else None,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            "peak_growth_mb": round(self.peak_growth_mb, 1) if self.peak_growth_mb is not None else None,
+        }
+
+
+class _Stage:
+    # One running stage; `rows` and the byte counts are filled in while it runs
+    def __init__(self, path):
+        self.path = path
+        self.rows = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # Process peak when the stage started
+        self.start_peak = None
+
+
+class _NoStage:
+    # Stand-in yielded by stage() outside a trace
+    rows = None
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class Trace:
+    def __init__(self, name):
+        """
+        Stage records of one job, e.g. one GUI task or one CLI input file.
+        """
+        self.name = name
+        self.started = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.seconds = 0.0
+        self.records = {}
+        self.stack = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def _record(self, path):
+        if path not in self.records:
+            self.records[path] = StageRecord(path)
+        return self.records[path]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started": self.started,
+            "seconds": round(self.seconds, 4),
+            "stages": [record.to_dict() for record in self.records.values()],
+        }
+
+    def summary(self):
+        """
+        Return the stage records as a text table for the logs.
+        """
+        lines = [f"Stage timings for {self.name} ({self.seconds:.2f}s):",
+                 f"  {'Stage':<28}{'Calls':>6}{'Time':>10}{'Rows/s':>13}{'Read':>10}{'Written':>10}{'Peak +':>10}"]
+        for record in self.records.values():
+            rate = f"{record.rows_per_sec:,.0f}" if record.rows_per_sec else "-"
+            peak = f"{record.peak_growth_mb:,.0f} MB" if record.peak_growth_mb is not None else "-"
+            lines.append(
+                f"  {'  ' * record.depth + record.name:<28}{record.calls:>6}{record.seconds:>9.2f}s{rate:>13}"
+                f"{format_bytes(record.bytes_read):>10}{format_bytes(record.bytes_written):>10}{peak:>10}"
+            )
+        return "\n".join(lines)
+
+
+def format_bytes(count):
+    """
+    Return a byte count as a short text, '-' for zero.
+    """
+    if not count:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def active_trace():
+    """
+    Return the trace collecting this thread's stages, or None.
+    """
+    return getattr(_local, "trace", None)
+
+
+@contextlib.contextmanager
+def tracing(trace):
+    """
+    Record the stages run on this thread into `trace` for the duration of the block.
+    """
+    previous = active_trace()
+    _local.trace = trace
+    start_time = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.seconds += time.perf_counter() - start_time
+        _local.trace = previous
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Mark a block as a pipeline stage.
+
+    Yields an object whose `rows` may be set to the rows the stage
+    processed; add_bytes() adds to the bytes it read and wrote. Outside a
+    trace the block simply runs.
+    """
+    trace = active_trace()
+    if trace is None:
+        yield _NO_STAGE
+        return
+
+    parent = trace.stack[-1] if trace.stack else None
+    current = _Stage(f"{parent.path}/{name}" if parent else name)
+    current.start_peak = peak_rss_mb()
+    # Created now so stages are listed in the order they start, parents first
+    record = trace._record(current.path)
+    trace.stack.append(current)
+    start_time = time.perf_counter()
+    try:
+        yield current
+    finally:
+        seconds = time.perf_counter() - start_time
+        trace.stack.pop()
+        end_peak = peak_rss_mb()
+        if parent is not None:
+            parent.bytes_read += current.bytes_read
+            parent.bytes_written += current.bytes_written
+
+        record.calls += 1
+        record.seconds += seconds
+        if current.rows is not None:
+            record.rows = (record.rows or 0) + current.rows
+        record.bytes_read += current.bytes_read
+        record.bytes_written += current.bytes_written
+        if end_peak is not None:
+            record.peak_rss_mb = end_peak if record.peak_rss_mb is None else max(record.peak_rss_mb, end_peak)
+        if end_peak is not None and current.start_peak is not None:
+            growth = max(end_peak - current.start_peak, 0.0)
+            record.peak_growth_mb = growth if record.peak_growth_mb is None else max(record.peak_growth_mb, growth)
+
+
+def add_bytes(read=0, written=0):
+    """
+    Add to the bytes read and written by the innermost running stage.
+    """
+    trace = active_trace()
+    if trace is not None and trace.stack:
+        trace.stack[-1].bytes_read += read
+        trace.stack[-1].bytes_written += written
+
+
+def file_size(path):
+    """
+    Return the size of a file, or 0 if it cannot be read.
+    """
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _row_count(result, args):
+    # Rows of the DataFrame returned, or of the first DataFrame argument;
+    # pandas is imported here so the GUI can import this module at startup
+    import pandas as pd
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            return len(arg)
+    return None
+
+
+def timed(name):
+    """
+    Decorator recording every call of a function as a stage.
+
+    The stage's rows are those of the DataFrame the function returns, or
+    else of its first DataFrame argument, unless the function sets them.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if active_trace() is None:
+                return function(*args, **kwargs)
+            with stage(name) as current:
+                result = function(*args, **kwargs)
+                if current.rows is None:
+                    current.rows = _row_count(result, args)
+                return result
+        return wrapper
+    return decorate
+
+
+def count_rows(rows):
+    """
+    Set the rows processed by the innermost running stage.
+    """
+    trace = active_trace()
+    if trace is not None and trace.stack:
+        trace.stack[-1].rows = rows
+
+
+def save_traces(file_path, traces):
+    """
+    Write traces to a JSON file.
+
+    Parameters:
+    - file_path: Destination '.json' path.
+    - traces: Iterable of Trace objects.
+    """
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump({"traces": [trace.to_dict() for trace in traces]}, file, indent=2)
+
+
+@contextlib.contextmanager
+def profiled(profiler, output_path, log_callback=None):
+    """
+    Run a block under a profiler and save its report.
+
+    cProfile only sees the calling thread, so the block should run the
+    whole job itself rather than hand it to other threads.
+
+    Parameters:
+    - profiler: 'cprofile' (saved as pstats data, with the top functions
+      logged) or 'pyinstrument' (saved as an HTML report).
+    - output_path: File receiving the report.
+    - log_callback: Optional function receiving the summary.
+
+    Raises:
+    - ValueError: If the profiler is unknown or not installed.
+    """
+    log = log_callback or (lambda message: None)
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}'. Choose one of: {', '.join(PROFILERS)}.")
+    if profiler == "pyinstrument" and not HAS_PYINSTRUMENT:
+        raise ValueError("The pyinstrument profiler is not installed (pip install pyinstrument).")
+
+    if profiler == "pyinstrument":
+        session = Profiler()
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            with open(output_path, "w", encoding="utf-8") as file:
+                file.write(session.output_html())
+            log(f"Profile saved to {output_path}")
+        return
+
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        session.dump_stats(output_path)
+        report = io.StringIO()
+        pstats.Stats(session, stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        log(f"Profile saved to {output_path} (open with python -m pstats or snakeviz).\n{report.getvalue().strip()}")
@@ -1,13 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from pandastable import Table
-from splitter import SplitterWindow
-from replacer import ReplacerWindow
-from fix_coordinate import FixCoordinateWindow
-from geocode import GeocodeWindow  # Import GeocodeWindow
-import pandas as pd
+import multiprocessing
+import os
 import threading
 import time
+import instrumentation
+from task_runner import TaskRunner
+
+# pandas, pandastable and the tool windows are imported on first use (see
+# ModernFastLoaderApp.warm_up), so the window appears without waiting for them
+
+
+ALL_SHEETS = "(All sheets)"
+
+# Start of the launch, for the startup timing line in the log
+STARTED_AT = time.perf_counter()
 
 
 class SplashScreen:
@@ -38,16 +45,16 @@ class SplashScreen:
             error_label = tk.Label(self.splash, text=f"Error loading splash image: {e}", bg="white", fg="red", font=("Arial", 12))
             error_label.pack(expand=True)
 
-        # Schedule the splash screen to close after 10 seconds
-        self.splash.after(10000, self.splash.destroy)
+    def close(self):
+        self.splash.destroy()
 
 
 class ModernFastLoaderApp:
     def __init__(self, root):
         self.root = root
         self.root.title("NBS Cleaning Tool")
-        self.root.geometry("800x500")
-        self.root.minsize(800, 500)
+        self.root.geometry("940x580")
+        self.root.minsize(800, 580)
 
         # Set custom logo for the application
         logo_path = "icons/logo.png"  # Replace with your logo file path
@@ -74,6 +81,27 @@ class ModernFastLoaderApp:
 
         ttk.Entry(frame_top, textvariable=self.file_path, width=60).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(frame_top, text="Browse", command=self.browse_file).pack(side=tk.LEFT)
+        ttk.Button(frame_top, text="View File", command=self.view_file).pack(side=tk.LEFT, padx=(10, 0))
+
+        # Sheet and column selection
+        frame_selection = ttk.Frame(self.root, padding=(10, 0))
+        frame_selection.pack(fill=tk.X)
+
+        ttk.Label(frame_selection, text="Sheet:").pack(side=tk.LEFT)
+        self.sheet_name = tk.StringVar()
+        self.sheet_dropdown = ttk.Combobox(frame_selection, textvariable=self.sheet_name, state="disabled", width=25)
+        self.sheet_dropdown.pack(side=tk.LEFT, padx=(5, 15))
+
+        ttk.Label(frame_selection, text="Columns (optional, comma separated):").pack(side=tk.LEFT)
+        self.column_filter = tk.StringVar()
+        ttk.Entry(frame_selection, textvariable=self.column_filter, width=30).pack(side=tk.LEFT, padx=5)
+
+        self.compact_load = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_selection, text="Compact load", variable=self.compact_load).pack(side=tk.LEFT, padx=5)
+
+        # The paged viewer only draws the visible rows; pandastable draws them all
+        self.paged_viewer = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame_selection, text="Paged viewer", variable=self.paged_viewer).pack(side=tk.LEFT, padx=5)
 
         # Load icons
         self.load_icon = tk.PhotoImage(file="icons/load.png")
@@ -92,6 +120,16 @@ class ModernFastLoaderApp:
         self.progress_label = ttk.Label(frame_progress, text="Progress: 0%", anchor="center")
         self.progress_label.pack(pady=5)
 
+        # Background tasks: cancel the running one or everything queued
+        frame_tasks = ttk.Frame(frame_progress)
+        frame_tasks.pack()
+        ttk.Button(frame_tasks, text="Cancel", command=self.cancel_task).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_tasks, text="Cancel All", command=self.cancel_all_tasks).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_tasks, text="Export Trace", command=self.export_trace).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_tasks, text="Profile Next Task", command=self.profile_next_task).pack(side=tk.LEFT, padx=5)
+        self.tasks_label = ttk.Label(frame_tasks, text="No tasks running")
+        self.tasks_label.pack(side=tk.LEFT, padx=10)
+
         # Action buttons with icons
         frame_buttons = ttk.Frame(self.root, padding=(10, 10))
         frame_buttons.pack(fill=tk.X)
@@ -108,12 +146,18 @@ class ModernFastLoaderApp:
         self.replace_button = ttk.Button(frame_buttons, text=" Replace Data", image=self.replace_icon, compound=tk.LEFT, command=self.open_replacer_window, state="disabled")
         self.replace_button.pack(side=tk.LEFT, padx=5)
 
+        self.deduplicate_button = ttk.Button(frame_buttons, text=" Deduplicate", command=self.open_deduplicator_window, state="disabled")
+        self.deduplicate_button.pack(side=tk.LEFT, padx=5)
+
         self.fix_coordinate_button = ttk.Button(frame_buttons, text=" Fix Coordinate", image=self.coordinate_icon, compound=tk.LEFT, command=self.open_fix_coordinate_window, state="disabled")
         self.fix_coordinate_button.pack(side=tk.LEFT, padx=5)
 
         self.geocode_button = ttk.Button(frame_buttons, text=" Geocode", image=self.geocode_icon, compound=tk.LEFT, command=self.open_geocode_window, state="disabled")
         self.geocode_button.pack(side=tk.LEFT, padx=5)  # Add new Geocode button
 
+        # Recipes run on files chosen in their own window, so no data needs to be loaded
+        ttk.Button(frame_buttons, text=" Run Recipe", command=self.open_recipe_window).pack(side=tk.LEFT, padx=5)
+
         # Logs area
         frame_logs = ttk.Frame(self.root, padding=(10, 10))
         frame_logs.pack(fill=tk.BOTH, expand=True)
@@ -127,32 +171,152 @@ class ModernFastLoaderApp:
         self.log_text.config(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # Initialize variables for tracking loaded data
-        self.loaded_data = None
+        # Heavy work runs on the task runner's worker thread; the log and
+        # progress bar are only touched from this thread
+        self.tasks = TaskRunner(self.root, self.write_log, self.draw_progress, status_callback=self.show_task_count)
+
+        # Single shared copy of the data, borrowed by every tool window; created on first use
+        self._datasets = None
+        self._datasets_lock = threading.Lock()
         self.data_viewer_window = None
 
+        self.log_message(f"Startup: window ready in {time.perf_counter() - STARTED_AT:.2f}s.")
+        threading.Thread(target=self.warm_up, daemon=True).start()
+
+    def warm_up(self):
+        """
+        Import pandas and the engine on a background thread while the user
+        picks a file, so the first load does not wait for them.
+        """
+        start_time = time.perf_counter()
+        try:
+            import dataset_manager  # noqa: F401
+            import row_source  # noqa: F401
+        except Exception as e:
+            self.log_message(f"Error loading data libraries: {e}")
+            return
+        self.log_message(f"Startup: data libraries loaded in the background in {time.perf_counter() - start_time:.2f}s.")
+
+    @property
+    def datasets(self):
+        with self._datasets_lock:
+            if self._datasets is None:
+                from dataset_manager import DatasetManager
+                self._datasets = DatasetManager(log_callback=self.log_message)
+            return self._datasets
+
+    @property
+    def loaded_data(self):
+        return self.datasets.borrow()
+
     def browse_file(self):
-        filetypes = [("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")]
+        import engine
+        filetypes = [("Data Files", " ".join("*" + ext for ext in engine.SUPPORTED_EXTENSIONS))]
+        filetypes += list(engine.FILE_DIALOG_TYPES.values())
         file_path = filedialog.askopenfilename(filetypes=filetypes)
         if file_path:
             self.file_path.set(file_path)
+            self.load_sheet_names(file_path)
+
+    def load_sheet_names(self, file_path):
+        """
+        Fill the sheet dropdown for workbooks and disable it for other files.
+        """
+        self.sheet_name.set("")
+        if not file_path.endswith(".xlsx"):
+            self.sheet_dropdown.config(values=[], state="disabled")
+            return
+        import excel_io
+        try:
+            sheet_names = excel_io.list_sheets(file_path)
+        except Exception as e:
+            self.log_message(f"Error reading sheet names: {e}")
+            return
+        self.sheet_dropdown.config(values=[ALL_SHEETS] + sheet_names, state="readonly")
+        if sheet_names:
+            self.sheet_name.set(sheet_names[0])
+
+    def load_options(self, file_path):
+        """
+        Return the sheet and column selection and the compact load option as
+        keyword arguments for loading.
+        """
+        import excel_io
+        options = {}
+        if self.compact_load.get():
+            options["compact_load"] = True
+        columns = [name.strip() for name in self.column_filter.get().split(",") if name.strip()]
+        if columns:
+            options["columns"] = columns
+        sheet_name = self.sheet_name.get()
+        if file_path.endswith(".xlsx") and sheet_name:
+            options["sheets"] = excel_io.list_sheets(file_path) if sheet_name == ALL_SHEETS else [sheet_name]
+        return options
 
     def log_message(self, message):
+        """
+        Log a message; safe to call from any thread.
+        """
+        self.tasks.post_log(message)
+
+    def update_progress(self, progress, color="yellow"):
+        """
+        Update the progress bar; safe to call from any thread.
+        """
+        self.tasks.post_progress(progress, color)
+
+    def write_log(self, text):
         self.log_text.config(state="normal")
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, text + "\n")
         self.log_text.see(tk.END)
         self.log_text.config(state="disabled")
 
-    def update_progress(self, progress, color="yellow"):
+    def draw_progress(self, progress, color="yellow"):
         style = f"{color.capitalize()}.Horizontal.TProgressbar"
         self.progress["style"] = style
         self.progress["value"] = progress
-        self.progress_label.config(text=f"Progress: {progress}%")
+        self.progress_label.config(text=f"Progress: {progress:.0f}%")
+
+    def show_task_count(self, count):
+        self.tasks_label.config(text=f"{count} task(s) running or queued" if count else "No tasks running")
+
+    def cancel_task(self):
+        if not self.tasks.cancel_current():
+            self.log_message("No task is running.")
+
+    def cancel_all_tasks(self):
+        self.tasks.cancel_all()
+
+    def export_trace(self):
+        """
+        Save the stage timings of the recent tasks as a JSON trace.
+        """
+        if not self.tasks.traces:
+            messagebox.showinfo("Info", "No task has recorded any stages yet.")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")],
+                                                 title="Export Trace")
+        if not file_path:
+            return
+        try:
+            instrumentation.save_traces(file_path, list(self.tasks.traces))
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save the trace: {e}")
+            return
+        self.log_message(f"Trace of {len(self.tasks.traces)} task(s) saved to {file_path}")
+
+    def profile_next_task(self):
+        """
+        Run the next task under pyinstrument, or cProfile when it is not installed.
+        """
+        self.tasks.profile_next = "pyinstrument" if instrumentation.HAS_PYINSTRUMENT else "cprofile"
+        self.log_message(f"The next task will be profiled with {self.tasks.profile_next}.")
 
     def enable_action_buttons(self):
         self.split_button.config(state="normal")
         self.reopen_button.config(state="normal")
         self.replace_button.config(state="normal")
+        self.deduplicate_button.config(state="normal")
         self.fix_coordinate_button.config(state="normal")
         self.geocode_button.config(state="normal")  # Enable Geocode button
 
@@ -162,43 +326,69 @@ class ModernFastLoaderApp:
             messagebox.showerror("Error", "Please select a file first!")
             return
 
-        self.log_message("Starting to load file...")
-        self.progress["value"] = 0
-        thread = threading.Thread(target=self.load_file)
-        thread.start()
-
-    def load_file(self):
-        file_path = self.file_path.get()
         try:
-            if file_path.endswith(".csv"):
-                self.log_message("Loading CSV file...")
-                self.loaded_data = pd.read_csv(file_path)
-            elif file_path.endswith(".xlsx"):
-                self.log_message("Loading Excel file...")
-                self.loaded_data = pd.read_excel(file_path)
-            else:
-                raise ValueError("Unsupported file format!")
-
-            for i in range(1, 101):
-                self.update_progress(i)
-                time.sleep(0.01)
-
-            self.log_message("File loaded successfully.")
-            self.enable_action_buttons()
-            self.open_data_viewer()
+            options = self.load_options(file_path)
         except Exception as e:
             self.log_message(f"Error loading file: {e}")
+            return
+
+        self.log_message("Starting to load file...")
+        self.draw_progress(0)
+        self.tasks.submit(
+            f"Load {os.path.basename(file_path)}",
+            lambda task: self.load_file(task, file_path, options),
+            on_success=lambda result: self.on_file_loaded(file_path, *result),
+            on_error=lambda e: self.log_message(f"Error loading file: {e}"),
+        )
+
+    def load_file(self, task, file_path, options):
+        """
+        Parse the file; runs on the worker thread.
+
+        Returns:
+        - tuple: (DataFrame, seconds taken).
+        """
+        import engine
+        if file_path.endswith(".csv"):
+            task.log("Loading CSV file as text...")
+        elif file_path.endswith(".xlsx"):
+            task.log("Loading Excel file...")
+        elif file_path.endswith(engine.COLUMNAR_EXTENSIONS):
+            task.log("Loading columnar file...")
+        else:
+            raise ValueError("Unsupported file format!")
+
+        start_time = time.perf_counter()
+        # Parsed as text, like nbsclean.py, so codes such as '007' keep their
+        # leading zeros in every tool that borrows this copy
+        data = self.datasets.load(
+            file_path,
+            dtype=object,
+            progress_callback=task.progress,
+            log_callback=task.log,
+            **options,
+        )
+        return data, time.perf_counter() - start_time
+
+    def on_file_loaded(self, file_path, data, seconds):
+        self.datasets.set_current(data, file_path, dtype=object)
+        self.log_message(f"File loaded successfully: {len(data)} rows in {seconds:.1f}s.")
+        self.enable_action_buttons()
+        self.open_data_viewer()
 
     def open_splitter_window(self):
         if not self.file_path.get():
             messagebox.showerror("Error", "Please select a file first!")
             return
 
+        from splitter import SplitterWindow
         SplitterWindow(
             self.root,
             self.file_path.get(),
             log_callback=self.log_message,
             progress_callback=lambda progress, color="green": self.update_progress(progress, color),
+            task_runner=self.tasks,
+            dataset_manager=self.datasets,
         )
 
     def reopen_data_viewer(self):
@@ -212,6 +402,13 @@ class ModernFastLoaderApp:
             self.data_viewer_window.lift()
             return
 
+        if self.paged_viewer.get():
+            import row_source
+            from data_viewer import DataViewerWindow
+            viewer = DataViewerWindow(self.root, row_source.FrameSource(self.loaded_data))
+            self.data_viewer_window = viewer.window
+            return
+
         self.data_viewer_window = tk.Toplevel(self.root)
         self.data_viewer_window.title("Data Viewer")
         self.data_viewer_window.geometry("1200x600")
@@ -219,19 +416,56 @@ class ModernFastLoaderApp:
         frame = ttk.Frame(self.data_viewer_window, padding=(10, 10))
         frame.pack(fill=tk.BOTH, expand=True)
 
+        # pandastable pulls in matplotlib, so it is only imported for this view
+        from pandastable import Table
         pt = Table(frame, dataframe=self.loaded_data, showtoolbar=True, showstatusbar=True)
         pt.show()
 
+    def view_file(self):
+        """
+        Open a Parquet, Feather or Arrow file in the paged viewer without
+        loading it; rows are read from the file as they are scrolled into view.
+        """
+        file_path = self.file_path.get()
+        if not file_path:
+            messagebox.showerror("Error", "Please select a file first!")
+            return
+        import row_source
+        from data_viewer import DataViewerWindow
+        try:
+            source = row_source.open_file_source(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.log_message(f"Viewing {file_path} from disk ({len(source):,} rows).")
+        DataViewerWindow(self.root, source, title=f"Data Viewer - {os.path.basename(file_path)}")
+
     def open_replacer_window(self):
         if self.loaded_data is None:
             messagebox.showerror("Error", "No data loaded to replace!")
             return
 
+        from replacer import ReplacerWindow
         ReplacerWindow(
             self.root,
             self.loaded_data,
             log_callback=self.log_message,
             update_data_callback=self.update_data,
+            task_runner=self.tasks,
+        )
+
+    def open_deduplicator_window(self):
+        if self.loaded_data is None:
+            messagebox.showerror("Error", "No data loaded to deduplicate!")
+            return
+
+        from deduplicator import DeduplicatorWindow
+        DeduplicatorWindow(
+            self.root,
+            self.loaded_data,
+            log_callback=self.log_message,
+            update_data_callback=self.update_data,
+            task_runner=self.tasks,
         )
 
     def open_fix_coordinate_window(self):
@@ -239,11 +473,13 @@ class ModernFastLoaderApp:
             messagebox.showerror("Error", "No data loaded to fix coordinates!")
             return
 
+        from fix_coordinate import FixCoordinateWindow
         FixCoordinateWindow(
             self.root,
             self.loaded_data,
             log_callback=self.log_message,
             update_data_callback=self.update_data,
+            task_runner=self.tasks,
         )
 
     def open_geocode_window(self):
@@ -251,25 +487,41 @@ class ModernFastLoaderApp:
             messagebox.showerror("Error", "No data loaded to generate geocode!")
             return
 
+        from geocode import GeocodeWindow
         GeocodeWindow(
             self.root,
             self.loaded_data,
             log_callback=self.log_message,
             update_data_callback=self.update_data,
+            task_runner=self.tasks,
+        )
+
+    def open_recipe_window(self):
+        from recipe_window import RecipeWindow
+        RecipeWindow(
+            self.root,
+            log_callback=self.log_message,
+            progress_callback=lambda progress, color="blue": self.update_progress(progress, color),
+            task_runner=self.tasks,
         )
 
     def update_data(self, updated_data):
-        self.loaded_data = updated_data
+        self.datasets.update(updated_data)
         self.log_message("Data updated successfully.")
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed by the writer pool in frozen builds
     root = tk.Tk()
     root.withdraw()  # Hide main window during splash screen
 
     # Splash Screen Configuration
     splash_logo_path = "icons/splash_logo.png"  # Replace with your splash image path
-    SplashScreen(root, splash_logo_path)
+    splash = SplashScreen(root, splash_logo_path)
+    root.update()  # Draw the splash while the main window is built
 
-    root.after(10000, lambda: [root.deiconify(), ModernFastLoaderApp(root)])  # Show main app after 10 seconds
+    # Show the main window as soon as it is built; pandas keeps loading in the background
+    ModernFastLoaderApp(root)
+    splash.close()
+    root.deiconify()
     root.mainloop()
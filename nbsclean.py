@@ -0,0 +1,497 @@
+"""
+Command-line entry point for running the NBS cleaning operations headless.
+
+Examples:
+    python nbsclean.py replace --value NA -o cleaned data/*.csv
+    python nbsclean.py fixcoords --lat LATITUDE --lon LONGITUDE -o cleaned data/*.csv
+    python nbsclean.py geocode --pregion 07 -o cleaned data/*.csv
+    python nbsclean.py split --column PDISTRICT -o splits data/*.csv
+    python nbsclean.py pipeline --value NA --lat LATITUDE --lon LONGITUDE --pregion 07 -o cleaned data/*.csv
+    python nbsclean.py run --recipe clean.yaml -o cleaned data/*.csv
+    python nbsclean.py dedup --compare NAME --lat LATITUDE --lon LONGITUDE --remove exact -o cleaned data/*.csv
+    python nbsclean.py geocode --pregion 07 -o cleaned --trace trace.json data/big.csv
+    python nbsclean.py incremental --into cleaned/master.csv --pregion 07 --lat LATITUDE --lon LONGITUDE deltas/day1.csv
+
+Each input file is processed independently, in parallel across --workers
+processes, except with `incremental`, where the deltas are applied to one
+output in the order given. Nothing here imports tkinter.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import boundaries
+import coordinates
+import duplicates
+import engine
+import excel_io
+import geocoder
+import imputation
+import incremental
+import instrumentation
+import nulls
+import recipe
+import streaming
+
+
+def _output_path(file_path, output_dir, suffix, file_type):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(output_dir, f"{stem}_{suffix}.{file_type}")
+
+
+def _file_type(args, file_path):
+    if args.format:
+        return args.format
+    extension = os.path.splitext(file_path)[1].lower()
+    return {".xlsx": "xlsx", ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}.get(extension, "csv")
+
+
+def _load_options(args):
+    return {
+        "parser": args.parser,
+        "use_sidecar": args.sidecar,
+        "sheets": args.sheet,
+        "columns": args.columns.split(",") if args.columns else None,
+        "compact_load": args.compact,
+    }
+
+
+def _split_columns(args):
+    columns = args.column.split(",")
+    return columns if len(columns) > 1 else columns[0]
+
+
+def _schema(args):
+    return geocoder.load_schema(args.schema) if args.schema else None
+
+
+def _null_options(args):
+    return {
+        "tokens": nulls.parse_tokens(args.tokens) if args.tokens else None,
+        "strip_whitespace": args.strip,
+        "ignore_case": args.ignore_case,
+        "column_replacements": nulls.parse_column_replacements(args.column_value) if args.column_value else None,
+    }
+
+
+def _impute_options(args):
+    return {
+        "bounds": imputation.parse_bounds(args.bounds) if args.bounds else None,
+        "replace_outliers": args.outliers,
+    }
+
+
+def _column_list(text):
+    return text.split(",") if text else None
+
+
+def _dedup_options(args):
+    return {
+        "columns": _column_list(args.match_columns),
+        "compare_columns": _column_list(args.compare),
+        "block_columns": _column_list(args.block_columns),
+        "lat_col": args.lat,
+        "lon_col": args.lon,
+        "radius_m": args.radius,
+        "threshold": args.threshold,
+        "workers": args.compare_workers,
+    }
+
+
+def run_job(command, file_path, args):
+    """
+    Run one command against one input file.
+
+    Parameters:
+    - command: One of 'replace', 'fixcoords', 'geocode', 'split', 'pipeline', 'run', 'dedup'.
+    - file_path: Path of the input file.
+    - args: Parsed command-line arguments.
+
+    Returns:
+    - str: A summary line describing the output.
+    """
+    name = os.path.basename(file_path)
+
+    def log(message):
+        print(f"[{name}] {message}", flush=True)
+
+    file_type = _file_type(args, file_path)
+    os.makedirs(args.output, exist_ok=True)
+
+    if command == "run":
+        target = recipe.run_recipe(args.recipe_data, file_path, args.output, chunksize=args.chunksize, log_callback=log,
+                                   excel_engine=args.excel_engine, **_load_options(args))
+        return f"{name}: saved {target}"
+
+    if args.chunksize:
+        return run_streaming_job(command, file_path, args, log)
+
+    if command == "split":
+        df = engine.load_dataset(file_path, dtype=object, log_callback=log, **_load_options(args))
+        if args.save_option == "folder":
+            stem = os.path.splitext(name)[0]
+            target = os.path.join(args.output, stem)
+        else:
+            target = _output_path(file_path, args.output, "split", file_type)
+        if args.column:
+            count = engine.split_by_column(df, _split_columns(args), file_type, args.save_option, target,
+                                           log_callback=log, excel_engine=args.excel_engine, workers=args.writers,
+                                           resume=args.resume)
+        else:
+            count = engine.split_by_rows(df, args.rows, file_type, args.save_option, target,
+                                         log_callback=log, excel_engine=args.excel_engine)
+        return f"{name}: {count} parts written to {target}"
+
+    data = engine.load_dataset(file_path, log_callback=log, **_load_options(args))
+    log(f"Loaded {len(data)} rows.")
+
+    if command == "dedup":
+        data, report = engine.find_duplicates(data, remove=args.remove, log_callback=log, **_dedup_options(args))
+        log(duplicates.format_report(report))
+
+    if command in ("replace", "pipeline") and args.value:
+        counts = engine.replace_nulls(data, args.value, **_null_options(args))
+        log(f"Replaced null-like values with '{args.value}'. {nulls.summarise_counts(counts)}")
+
+    if command in ("fixcoords", "pipeline") and args.lat and args.lon:
+        bounds = imputation.parse_bounds(args.bounds) if args.bounds else None
+        log(coordinates.format_report(engine.parse_coordinates(data, args.lat, args.lon, bounds)))
+        if args.method == "mean":
+            lat_mean, lon_mean = engine.fix_coordinates(data, args.lat, args.lon)
+            log(f"Coordinates fixed: Missing values replaced with column means (Lat: {lat_mean:.6f}, Lon: {lon_mean:.6f}).")
+        else:
+            report = engine.impute_coordinates(data, args.lat, args.lon, **_impute_options(args))
+            log(f"Coordinates fixed: {imputation.format_report(report)}")
+        if args.boundaries:
+            report = engine.validate_boundaries(
+                data, args.lat, args.lon, args.boundaries, args.area_columns.split(","),
+                args.area_properties.split(",") if args.area_properties else None,
+            )
+            log(boundaries.format_report(report))
+
+    if command in ("geocode", "pipeline") and args.pregion:
+        data = engine.generate_geocode(data, args.pregion, log_callback=log, schema=_schema(args))
+
+    target = _output_path(file_path, args.output, command, file_type)
+    engine.save_dataset(data, target, excel_engine=args.excel_engine)
+    return f"{name}: saved {target}"
+
+
+def traced_job(command, file_path, args):
+    """
+    Run run_job() while recording the time, rows, bytes and memory of each stage.
+
+    Returns:
+    - tuple: (summary line, instrumentation.Trace).
+    """
+    trace = instrumentation.Trace(os.path.basename(file_path))
+    with instrumentation.tracing(trace):
+        message = run_job(command, file_path, args)
+    return message, trace
+
+
+def run_streaming_job(command, file_path, args, log):
+    """
+    Run one command against one CSV file in bounded memory, chunk by chunk.
+    """
+    name = os.path.basename(file_path)
+    if not file_path.endswith(".csv") or _file_type(args, file_path) != "csv":
+        raise ValueError("--chunksize only supports CSV input and output.")
+    if command == "dedup":
+        raise ValueError("dedup compares rows across the whole file, so it does not support --chunksize.")
+
+    if command == "split":
+        if args.save_option != "folder":
+            raise ValueError("--chunksize split only supports --save-option folder.")
+        target = os.path.join(args.output, os.path.splitext(name)[0])
+        if args.rows:
+            # Row splits copy the raw bytes, so the chunk size does not apply
+            count = streaming.split_csv_rows(file_path, args.rows, target, workers=args.writers, log_callback=log)
+            return f"{name}: {count} parts written to {target}"
+        count = streaming.stream_split_by_column(file_path, _split_columns(args), target, args.chunksize, log_callback=log)
+        return f"{name}: {count} parts written to {target}"
+
+    if command in ("fixcoords", "pipeline") and args.lat and args.lon and args.method == "group":
+        # Group medians need every row of a group at once
+        raise ValueError("--chunksize only supports --method mean for coordinates.")
+    if command in ("fixcoords", "pipeline") and getattr(args, "boundaries", None):
+        raise ValueError("--boundaries needs the whole file in memory; drop --chunksize.")
+
+    target = _output_path(file_path, args.output, command, "csv")
+    if command == "pipeline":
+        steps = []
+        counts = {}
+        parse_counts = {}
+        if args.value:
+            null_options = _null_options(args)
+            steps.append(lambda chunk: streaming.replace_nulls_chunk(chunk, args.value, counts, **null_options))
+        if args.lat and args.lon:
+            bounds = imputation.parse_bounds(args.bounds) if args.bounds else None
+            lat_mean, lon_mean = streaming.coordinate_means(file_path, args.lat, args.lon, args.chunksize, bounds=bounds)
+            log(f"Coordinates fixed: Missing values replaced with column means (Lat: {lat_mean:.6f}, Lon: {lon_mean:.6f}).")
+            steps.append(lambda chunk: streaming.fill_coordinates(chunk, args.lat, args.lon, lat_mean, lon_mean,
+                                                                  parse_counts, bounds))
+        if args.pregion:
+            schema = _schema(args)
+            steps.append(lambda chunk: streaming.geocode_chunk(chunk, args.pregion, schema))
+
+        def transform(chunk):
+            for step in steps:
+                chunk = step(chunk)
+            return chunk
+
+        rows = streaming.stream_transform(file_path, target, transform, args.chunksize)
+        if args.value:
+            log(f"Replaced null-like values with '{args.value}'. {nulls.summarise_counts(counts)}")
+        if args.lat and args.lon:
+            log(coordinates.format_report(parse_counts))
+    elif command == "replace":
+        rows, counts = streaming.stream_replace_nulls(file_path, target, args.value, args.chunksize, **_null_options(args))
+        log(f"Replaced null-like values with '{args.value}'. {nulls.summarise_counts(counts)}")
+    elif command == "fixcoords":
+        parse_counts = {}
+        bounds = imputation.parse_bounds(args.bounds) if args.bounds else None
+        lat_mean, lon_mean = streaming.stream_fix_coordinates(file_path, target, args.lat, args.lon, args.chunksize,
+                                                              counts=parse_counts, bounds=bounds)
+        log(coordinates.format_report(parse_counts))
+        log(f"Coordinates fixed: Missing values replaced with column means (Lat: {lat_mean:.6f}, Lon: {lon_mean:.6f}).")
+        return f"{name}: saved {target}"
+    else:
+        rows = streaming.stream_generate_geocode(file_path, target, args.pregion, args.chunksize, schema=_schema(args))
+    return f"{name}: saved {rows} rows to {target}"
+
+
+def run_incremental(args):
+    """
+    Apply the delta files to the incremental output, one after another.
+
+    Returns:
+    - tuple: (number of failed deltas, traces when --trace is given).
+    """
+    bounds = imputation.parse_bounds(args.bounds) if args.bounds else None
+    traces = []
+    for number, file_path in enumerate(args.files):
+        name = os.path.basename(file_path)
+        trace = instrumentation.Trace(name)
+        try:
+            with instrumentation.tracing(trace):
+                report = incremental.process_delta(
+                    file_path, args.into, state_dir=args.state, pregion_value=args.pregion, schema=_schema(args),
+                    lat_col=args.lat, lon_col=args.lon, method=args.method, bounds=bounds, key_column=args.key,
+                    rebuild=args.rebuild and number == 0,
+                    log_callback=lambda message: print(f"[{name}] {message}", flush=True),
+                )
+        except Exception as e:
+            # Later deltas would be applied out of order
+            print(f"Error processing {file_path}: {e}", file=sys.stderr, flush=True)
+            return 1, traces
+        print(f"{name}: {report['new']} new and {report['changed']} changed rows merged into {args.into}", flush=True)
+        if args.trace:
+            traces.append(trace)
+            print(trace.summary(), flush=True)
+    return 0, traces
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="nbsclean", description="Headless NBS data cleaning.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("files", nargs="+", help="Input .csv, .xlsx, .parquet, .feather or .arrow files.")
+        sub.add_argument("-o", "--output", required=True, help="Output directory.")
+        sub.add_argument("--format", choices=list(engine.FILE_DIALOG_TYPES), help="Output file type (defaults to the input type).")
+        sub.add_argument("--sheet", action="append",
+                         help="Workbook sheet to load; repeat to stack several sheets (default: the first sheet).")
+        sub.add_argument("--columns", help="Comma-separated list of columns to load (default: all).")
+        sub.add_argument("--excel-engine", choices=excel_io.EXCEL_ENGINES, default="auto",
+                         help="Workbook writer; 'auto' uses constant-memory xlsxwriter when it is installed.")
+        sub.add_argument("--compact", action="store_true",
+                         help="Load with compact dtypes (categoricals, Arrow strings, downcast numbers) to save memory.")
+        sub.add_argument("--no-sidecar", dest="sidecar", action="store_false",
+                         help="Do not read or write the columnar sidecar cache of large text files.")
+        sub.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Number of files processed in parallel.")
+        sub.add_argument("--parser", choices=["auto", "c", "pyarrow"], default="auto",
+                         help="CSV parser; 'auto' uses pyarrow when it is installed.")
+        sub.add_argument("--chunksize", type=int,
+                         help="Stream CSV files in chunks of this many rows instead of loading them whole.")
+        sub.add_argument("--trace", help="Print per-stage timings and save them to this JSON file.")
+        sub.add_argument("--profile", choices=instrumentation.PROFILERS,
+                         help="Profile the run; the files are then processed one by one in this process.")
+        sub.add_argument("--profile-output",
+                         help="Profile report path (default: nbsclean.prof, or nbsclean.html for pyinstrument).")
+
+    def add_replace(sub, required):
+        sub.add_argument("--value", required=required, help="Replacement for null-like values.")
+        sub.add_argument("--tokens", help="Comma-separated text values treated as null, in addition to empty cells "
+                                          "(default: nan,NaN,#NULL!).")
+        sub.add_argument("--strip", action="store_true", help="Ignore surrounding whitespace when matching tokens.")
+        sub.add_argument("--ignore-case", action="store_true", help="Match tokens case-insensitively.")
+        sub.add_argument("--column-value", help="Per-column replacements, e.g. 'PWARD=000; NAME=UNKNOWN'.")
+
+    def add_fixcoords(sub, required):
+        sub.add_argument("--lat", required=required, help="Latitude column.")
+        sub.add_argument("--lon", required=required, help="Longitude column.")
+        sub.add_argument("--method", choices=["group", "mean"],
+                         help="Fill from hamlet/village/ward/district medians or from column means "
+                              "(default: group, or mean with --chunksize).")
+        sub.add_argument("--bounds", help="Expected 'min lat,max lat,min lon,max lon', e.g. --bounds=-12,-1,29,41; used to spot swapped "
+                              "rows, and coordinates outside it are cleared before group filling.")
+        sub.add_argument("--no-outliers", dest="outliers", action="store_false",
+                         help="Keep coordinates that lie far from the rest of their ward.")
+        sub.add_argument("--boundaries", help="GeoJSON file or shapefile of admin areas; flags rows whose "
+                                              "coordinate lies outside the area named by --area-columns.")
+        sub.add_argument("--area-columns", default="PREGION,PDISTRICT",
+                         help="Comma-separated columns naming each row's area (default: PREGION,PDISTRICT).")
+        sub.add_argument("--area-properties",
+                         help="Boundary feature properties matching --area-columns (default: the same names).")
+
+    def add_geocode(sub, required):
+        sub.add_argument("--pregion", required=required, help="Two-digit PREGION value.")
+        sub.add_argument("--schema", help="JSON code schema with field order, widths and pad characters "
+                                          "(default: the NBS CODE1/CODE2 layout).")
+
+    sub = subparsers.add_parser("replace", help="Replace null-like values.")
+    add_common(sub)
+    add_replace(sub, True)
+
+    sub = subparsers.add_parser("fixcoords", help="Convert coordinates to floats and fill missing values.")
+    add_common(sub)
+    add_fixcoords(sub, True)
+
+    sub = subparsers.add_parser("geocode", help="Generate CODE1, CODE2 and an empty GEOCODE.")
+    add_common(sub)
+    add_geocode(sub, True)
+
+    sub = subparsers.add_parser("split", help="Split by column values or by row count.")
+    add_common(sub)
+    group = sub.add_mutually_exclusive_group(required=True)
+    group.add_argument("--column",
+                       help="Split by unique values of this column; a comma-separated list writes nested folders.")
+    group.add_argument("--rows", type=int, help="Split into parts of this many rows.")
+    sub.add_argument("--save-option", choices=["folder", "single"], default="folder",
+                     help="One file per part, or one file with multiple sheets.")
+    sub.add_argument("--writers", type=int, default=1,
+                     help="Parallel writers per input file for folder output: processes for --column, "
+                          "threads copying parts for --rows with --chunksize.")
+    sub.add_argument("--no-resume", dest="resume", action="store_false",
+                     help="Rewrite every file of a --column folder split instead of skipping files an "
+                          "interrupted run of the same split already completed.")
+
+    sub = subparsers.add_parser("pipeline", help="Replace, fix coordinates and geocode in one run.")
+    add_common(sub)
+    add_replace(sub, False)
+    add_fixcoords(sub, False)
+    add_geocode(sub, False)
+
+    sub = subparsers.add_parser("run", help="Run the steps of a JSON or YAML recipe file.")
+    add_common(sub)
+    sub.add_argument("--recipe", required=True, help="Recipe listing the operations to run, see recipe.py.")
+
+    sub = subparsers.add_parser("dedup", help="Flag or remove exact and near-duplicate rows.")
+    add_common(sub)
+    sub.add_argument("--match-columns", help="Comma-separated columns that must all be equal for an exact duplicate (default: all).")
+    sub.add_argument("--compare", help="Comma-separated text columns compared for near-duplicates (default: exact duplicates only).")
+    sub.add_argument("--block-columns", default=",".join(duplicates.DEFAULT_BLOCK_COLUMNS),
+                     help="Only rows with equal values in these columns are compared (default: CODE1,CODE2).")
+    sub.add_argument("--lat", help="Latitude column; with --lon, only rows within --radius metres are compared.")
+    sub.add_argument("--lon", help="Longitude column.")
+    sub.add_argument("--radius", type=float, default=duplicates.DEFAULT_RADIUS_M,
+                     help=f"Comparison radius in metres (default: {duplicates.DEFAULT_RADIUS_M:g}).")
+    sub.add_argument("--threshold", type=float, default=duplicates.DEFAULT_THRESHOLD,
+                     help=f"Mean similarity (0-1) above which rows are near-duplicates (default: {duplicates.DEFAULT_THRESHOLD:g}).")
+    sub.add_argument("--remove", choices=["exact", "all"],
+                     help="Drop exact duplicates, or near-duplicates as well; the first row of each group is kept "
+                          "(default: only flag them).")
+    sub.add_argument("--compare-workers", type=int, default=1,
+                     help="Processes scoring the candidate pairs of each input file.")
+
+    sub = subparsers.add_parser("incremental", help="Geocode and fill coordinates of new rows only, appending them to one output.")
+    sub.add_argument("files", nargs="+", help="Delta files, applied in the order given.")
+    sub.add_argument("--into", required=True, help="CSV output accumulating every processed row.")
+    sub.add_argument("--state", help="State folder (default: the output path plus '.nbsstate').")
+    sub.add_argument("--key", help="Column identifying a row across deltas; a changed row replaces its earlier version.")
+    sub.add_argument("--rebuild", action="store_true", help="Discard the state and the output, and start from the first delta.")
+    sub.add_argument("--lat", help="Latitude column.")
+    sub.add_argument("--lon", help="Longitude column.")
+    sub.add_argument("--method", choices=list(incremental.METHODS), default="group",
+                     help="Fill from running hamlet/village/ward/district means or from the overall means (default: group).")
+    sub.add_argument("--bounds", help="Expected 'min lat,max lat,min lon,max lon'; coordinates outside it are cleared "
+                                      "before group filling.")
+    add_geocode(sub, False)
+    sub.add_argument("--trace", help="Print per-stage timings and save them to this JSON file.")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if hasattr(args, "method") and args.method is None:
+        args.method = "mean" if args.chunksize else "group"
+    if args.command == "run":
+        # Validate once before any file is read; workers receive the parsed recipe
+        try:
+            args.recipe_data = recipe.load_recipe(args.recipe)
+        except (OSError, ValueError) as e:
+            print(f"Error loading recipe {args.recipe}: {e}", file=sys.stderr)
+            return 1
+        if args.format:
+            args.recipe_data["format"] = args.format
+
+    if args.command == "incremental":
+        failures, traces = run_incremental(args)
+    elif args.profile:
+        output = args.profile_output or ("nbsclean.html" if args.profile == "pyinstrument" else "nbsclean.prof")
+        try:
+            with instrumentation.profiled(args.profile, output, log_callback=print):
+                failures, traces = _run_files(args, in_process=True)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+    else:
+        failures, traces = _run_files(args)
+
+    if args.trace:
+        instrumentation.save_traces(args.trace, traces)
+        print(f"Trace saved to {args.trace}")
+    return 1 if failures else 0
+
+
+def _run_files(args, in_process=False):
+    # Returns (number of failed files, traces of the others when --trace is given)
+    job = traced_job if args.trace else run_job
+    failures = 0
+    traces = []
+
+    def report(file_path, get_result):
+        nonlocal failures
+        try:
+            result = get_result()
+        except Exception as e:
+            failures += 1
+            print(f"Error processing {file_path}: {e}", file=sys.stderr, flush=True)
+            return
+        if args.trace:
+            message, trace = result
+            traces.append(trace)
+            print(f"{message}\n{trace.summary()}", flush=True)
+        else:
+            print(result, flush=True)
+
+    if in_process:
+        for file_path in args.files:
+            report(file_path, lambda: job(args.command, file_path, args))
+        return failures, traces
+
+    workers = max(1, min(args.workers, len(args.files)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(job, args.command, file_path, args): file_path for file_path in args.files}
+        for future in as_completed(futures):
+            report(futures[future], future.result)
+    return failures, traces
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Column-aware normalisation of null-like values.
+
+Every column is scanned once, with a strategy chosen by its dtype:
+
+- numeric, boolean and datetime columns cannot hold text tokens, so only
+  their missing-value mask is used;
+- text (object or string) columns are factorized and each distinct value
+  is looked up once in a set of null tokens, optionally after stripping
+  whitespace and folding case;
+- categorical columns look up their categories instead of their rows.
+
+Columns without a match are left untouched, so a numeric column only turns
+into text when it actually has missing values to fill with a text
+replacement. The number of values replaced in each column is returned so
+the change can be audited without a second scan.
+"""
+import numbers
+
+import numpy as np
+import pandas as pd
+
+
+# Text values treated as null; real missing values (None, NaN, NA) always are
+DEFAULT_NULL_TOKENS = ["", "nan", "NaN", "#NULL!"]
+
+
+def parse_tokens(text):
+    """
+    Parse a comma-separated token list typed by a user.
+
+    Empty cells always count as null, so "" is added to the tokens.
+    """
+    return [""] + [token.strip() for token in text.split(",") if token.strip()]
+
+
+def parse_column_replacements(text):
+    """
+    Parse per-column replacement values written as 'COLUMN=VALUE; ...'.
+
+    Raises:
+    - ValueError: If an entry has no '=' or no column name.
+    """
+    replacements = {}
+    for entry in text.split(";"):
+        if not entry.strip():
+            continue
+        column, sep, value = entry.partition("=")
+        if not sep or not column.strip():
+            raise ValueError(f"Per-column values must look like 'COLUMN=VALUE', got '{entry.strip()}'.")
+        replacements[column.strip()] = value.strip()
+    return replacements
+
+
+def _fold(value, strip_whitespace, ignore_case):
+    if strip_whitespace:
+        value = value.strip()
+    if ignore_case:
+        value = value.casefold()
+    return value
+
+
+def _token_mask(values, token_set, strip_whitespace, ignore_case):
+    # One hash lookup per distinct value instead of one comparison per row and token
+    codes, uniques = pd.factorize(values)
+    return _lookup(codes, uniques, token_set, strip_whitespace, ignore_case)
+
+
+def _lookup(codes, uniques, token_set, strip_whitespace, ignore_case):
+    is_null = np.fromiter(
+        (isinstance(value, str) and _fold(value, strip_whitespace, ignore_case) in token_set for value in uniques),
+        dtype=bool, count=len(uniques),
+    )
+    # Code -1 (a missing value) picks the trailing True entry
+    return np.append(is_null, True).take(codes)
+
+
+def null_mask(series, tokens=None, strip_whitespace=False, ignore_case=False):
+    """
+    Return a boolean array marking the null-like values of one column.
+
+    Parameters:
+    - series: The column to scan.
+    - tokens: Text values treated as null; defaults to DEFAULT_NULL_TOKENS.
+    - strip_whitespace: Match tokens after removing surrounding whitespace.
+    - ignore_case: Match tokens case-insensitively.
+    """
+    tokens = DEFAULT_NULL_TOKENS if tokens is None else tokens
+    token_set = {_fold(token, strip_whitespace, ignore_case) for token in tokens}
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _lookup(series.cat.codes.to_numpy(), series.cat.categories, token_set, strip_whitespace, ignore_case)
+    if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+        return _token_mask(series, token_set, strip_whitespace, ignore_case)
+    return series.isna().to_numpy(dtype=bool)
+
+
+def _fill(series, mask, value):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+    elif pd.api.types.is_object_dtype(series.dtype):
+        pass
+    elif pd.api.types.is_string_dtype(series.dtype):
+        if not isinstance(value, str):
+            series = series.astype(object)
+    elif not (pd.api.types.is_numeric_dtype(series.dtype) and isinstance(value, numbers.Number)):
+        # A text replacement cannot live in a numeric or datetime column
+        series = series.astype(object)
+    return series.mask(mask, value)
+
+
+def normalise_nulls(data, replacement, tokens=None, strip_whitespace=False, ignore_case=False,
+                    column_replacements=None, progress_callback=None):
+    """
+    Replace null-like values in every column, in place.
+
+    Parameters:
+    - data: The DataFrame to modify.
+    - replacement: Value written wherever a null-like value is found.
+    - tokens: Text values treated as null; defaults to DEFAULT_NULL_TOKENS.
+    - strip_whitespace: Match tokens after removing surrounding whitespace.
+    - ignore_case: Match tokens case-insensitively.
+    - column_replacements: Optional mapping of column name to the value
+      used in that column instead of `replacement`.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      after each column.
+
+    Returns:
+    - dict: Number of values replaced, per column.
+
+    Raises:
+    - ValueError: If a per-column replacement names an unknown column.
+    """
+    column_replacements = column_replacements or {}
+    unknown = [col for col in column_replacements if col not in data.columns]
+    if unknown:
+        raise ValueError(f"Column(s) not found in data: {', '.join(map(str, unknown))}")
+
+    progress = progress_callback or (lambda value: None)
+    counts = {}
+    for number, col in enumerate(data.columns, 1):
+        mask = null_mask(data[col], tokens, strip_whitespace, ignore_case)
+        counts[col] = int(mask.sum())
+        if counts[col]:
+            data[col] = _fill(data[col], mask, column_replacements.get(col, replacement))
+        progress(100 * number / len(data.columns))
+    return counts
+
+
+def add_counts(total, counts):
+    """
+    Add per-column counts into a running total, e.g. across chunks.
+    """
+    for col, count in counts.items():
+        total[col] = total.get(col, 0) + count
+    return total
+
+
+def summarise_counts(counts):
+    """
+    Return a one-line summary of the columns that had values replaced.
+    """
+    changed = [f"{col}: {count}" for col, count in counts.items() if count]
+    if not changed:
+        return "No null-like values found."
+    return f"{sum(counts.values())} values changed ({', '.join(changed)})."
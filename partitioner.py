@@ -0,0 +1,100 @@
+"""
+Sort-based single-pass partitioning of a DataFrame by one or more key columns.
+
+Instead of building boolean masks and materialising a groupby, every key
+column is factorized once, the combined codes are argsorted once (stable, so
+rows keep their original order inside a group), and the frame is reordered
+with a single `take`. Each group is then a contiguous, zero-copy `iloc`
+slice of that sorted frame.
+"""
+import numpy as np
+import pandas as pd
+
+
+class Partitioning:
+    def __init__(self, df, columns):
+        """
+        Partition `df` by the values of `columns`.
+
+        Parameters:
+        - df: The DataFrame to partition.
+        - columns: A column name or a list of column names. Groups are
+          ordered by the first column, then the second, and so on, the same
+          order as `df.groupby(columns)`.
+
+        Raises:
+        - ValueError: If no column is given or a column is missing.
+        """
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        if not self.columns:
+            raise ValueError("Please select a column for splitting.")
+        for col in self.columns:
+            if col not in df.columns:
+                raise ValueError(f"Column '{col}' not found in data.")
+
+        self.df = df
+        codes, uniques = [], []
+        for col in self.columns:
+            col_codes, col_uniques = pd.factorize(df[col], sort=True)
+            codes.append(col_codes)
+            uniques.append(col_uniques)
+
+        # Rows missing any key value cannot be assigned to a group
+        self.invalid_mask = np.zeros(len(df), dtype=bool)
+        for col_codes in codes:
+            self.invalid_mask |= col_codes < 0
+
+        # Combine the per-column codes into one code that sorts lexicographically
+        combined = codes[0].astype(np.int64)
+        for col_codes, col_uniques in zip(codes[1:], uniques[1:]):
+            combined = combined * len(col_uniques) + col_codes
+            combined, _ = pd.factorize(combined, sort=True)
+
+        # numpy's stable sort is a linear-time radix sort for 16-bit keys
+        valid_rows = np.flatnonzero(~self.invalid_mask)
+        sort_keys = combined[valid_rows]
+        if len(sort_keys) and sort_keys.max() <= np.iinfo(np.uint16).max:
+            sort_keys = sort_keys.astype(np.uint16)
+        order = valid_rows[np.argsort(sort_keys, kind="stable")]
+        self.sorted_frame = df.take(order)
+
+        # A group starts wherever the sorted code changes
+        sorted_codes = combined[order]
+        if len(order):
+            self.starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        else:
+            self.starts = np.array([], dtype=np.int64)
+        self.stops = np.r_[self.starts[1:], len(order)].astype(np.int64)
+        first_rows = order[self.starts]
+        self.keys = list(zip(*(col_uniques.take(col_codes[first_rows]) for col_codes, col_uniques in zip(codes, uniques))))
+
+    @property
+    def ngroups(self):
+        return len(self.keys)
+
+    def invalid_rows(self):
+        """
+        Return the rows with a missing value in any key column.
+        """
+        return self.df[self.invalid_mask]
+
+    def valid_rows(self):
+        """
+        Return every row that belongs to a group, ordered group by group.
+        """
+        return self.sorted_frame
+
+    def __iter__(self):
+        """
+        Yield (key, group) pairs, where key is a tuple with one value per
+        key column and group is a view into the sorted frame.
+        """
+        for key, start, stop in zip(self.keys, self.starts, self.stops):
+            yield key, self.sorted_frame.iloc[start:stop]
+
+
+def partition(df, columns):
+    """
+    Return a Partitioning of `df` by `columns`.
+    """
+    return Partitioning(df, columns)
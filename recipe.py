@@ -0,0 +1,342 @@
+"""
+Declarative cleaning recipes.
+
+A recipe lists the cleaning operations to run on a file, in order, with
+their parameters, so a session of Replace, Fix Coordinates and Geocode can
+be replayed on the next batch of files from the GUI or from nbsclean.py:
+
+    {
+      "format": "csv",
+      "steps": [
+        {"op": "replace", "value": "NA", "tokens": ["nan", "#NULL!"]},
+        {"op": "fixcoords", "lat": "LATITUDE", "lon": "LONGITUDE", "method": "mean"},
+        {"op": "geocode", "pregion": "07"},
+        {"op": "split", "column": ["PDISTRICT", "PWARD"]}
+      ]
+    }
+
+Recipes are JSON, or YAML when PyYAML is installed. Every step is applied
+to the same data in turn and written once at the end; 'split' may only be
+the last step. Files are loaded as text, as nbsclean.py and the Splitter
+load them, so codes such as '007' keep their leading zeros.
+
+Fusion only happens in streaming mode (a chunk size is given): the steps
+then become one function applied to each CSV chunk, so the file is read
+once (plus one read-only pass when coordinate means are needed) and written
+once. Without a chunk size the whole file is loaded and each step runs over
+it in turn.
+"""
+import json
+import os
+
+import coordinates
+import engine
+import geocoder
+import imputation
+import nulls
+import streaming
+
+try:
+    import yaml
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+
+# Operations a recipe step may name, and the parameters each one requires
+RECIPE_OPERATIONS = {
+    "replace": ["value"],
+    "fixcoords": ["lat", "lon"],
+    "geocode": ["pregion"],
+    "split": [],
+}
+
+RECIPE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+
+def load_recipe(file_path):
+    """
+    Load and validate a recipe from a JSON or YAML file.
+
+    Relative schema paths in geocode steps are resolved against the
+    folder of the recipe file.
+
+    Raises:
+    - ValueError: If the file cannot be parsed or the recipe is invalid.
+    """
+    with open(file_path, encoding="utf-8") as handle:
+        text = handle.read()
+    return parse_recipe(text, yaml_format=file_path.lower().endswith((".yaml", ".yml")),
+                        base_dir=os.path.dirname(os.path.abspath(file_path)))
+
+
+def parse_recipe(text, yaml_format=False, base_dir="."):
+    """
+    Parse and validate recipe text, e.g. as edited in the recipe window.
+    """
+    if yaml_format:
+        if not HAS_YAML:
+            raise ValueError("YAML recipes require PyYAML (pip install pyyaml); JSON recipes work without it.")
+        try:
+            recipe = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML recipe: {e}") from None
+    else:
+        try:
+            recipe = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON recipe: {e}") from None
+    return validate_recipe(recipe, base_dir)
+
+
+def _normalise_step(step, base_dir):
+    op = step.get("op")
+    if op not in RECIPE_OPERATIONS:
+        raise ValueError(f"Unknown recipe operation '{op}'; expected one of {', '.join(RECIPE_OPERATIONS)}.")
+    missing = [name for name in RECIPE_OPERATIONS[op] if step.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Recipe step '{op}' needs {', '.join(missing)}.")
+
+    step = dict(step)
+    if op == "replace":
+        tokens = step.get("tokens")
+        if isinstance(tokens, str):
+            step["tokens"] = nulls.parse_tokens(tokens)
+        elif tokens is not None:
+            step["tokens"] = [""] + [str(token) for token in tokens]
+        replacements = step.get("column_replacements")
+        if isinstance(replacements, str):
+            step["column_replacements"] = nulls.parse_column_replacements(replacements)
+    elif op == "fixcoords":
+        step.setdefault("method", "group")
+        if step["method"] not in ("group", "mean"):
+            raise ValueError("Recipe step 'fixcoords' method must be 'group' or 'mean'.")
+        bounds = step.get("bounds")
+        if isinstance(bounds, str):
+            step["bounds"] = imputation.parse_bounds(bounds)
+        elif bounds is not None:
+            step["bounds"] = imputation.parse_bounds(",".join(map(str, bounds)))
+        step.setdefault("replace_outliers", True)
+    elif op == "geocode":
+        step["pregion"] = str(step["pregion"])
+        schema = step.get("schema")
+        if isinstance(schema, str):
+            step["schema"] = geocoder.load_schema(os.path.join(base_dir, schema))
+        elif schema is not None:
+            step["schema"] = geocoder.validate_schema(schema)
+    else:
+        if bool(step.get("column")) == bool(step.get("rows")):
+            raise ValueError("Recipe step 'split' needs either 'column' or 'rows'.")
+        step.setdefault("save_option", "folder")
+        if step["save_option"] not in ("folder", "single"):
+            raise ValueError("Recipe step 'split' save_option must be 'folder' or 'single'.")
+    return step
+
+
+def validate_recipe(recipe, base_dir="."):
+    """
+    Check a recipe and fill in default parameters.
+
+    Parameters:
+    - recipe: A dict with a 'steps' list and an optional output 'format'.
+    - base_dir: Folder against which relative schema paths are resolved.
+
+    Returns:
+    - dict: A normalised copy of the recipe.
+
+    Raises:
+    - ValueError: If a step is unknown, incomplete or out of place.
+    """
+    if not isinstance(recipe, dict) or not isinstance(recipe.get("steps"), list) or not recipe["steps"]:
+        raise ValueError("A recipe must have a non-empty 'steps' list.")
+    if recipe.get("format") not in (None, *engine.FILE_DIALOG_TYPES):
+        raise ValueError(f"Unknown recipe output format '{recipe['format']}'.")
+
+    steps = []
+    for step in recipe["steps"]:
+        if not isinstance(step, dict):
+            raise ValueError("Every recipe step must be a mapping with an 'op' key.")
+        steps.append(_normalise_step(step, base_dir))
+    if any(step["op"] == "split" for step in steps[:-1]):
+        raise ValueError("'split' can only be the last step of a recipe.")
+    return {"format": recipe.get("format"), "steps": steps}
+
+
+def describe_recipe(recipe):
+    """
+    Return a one-line description of the steps of a recipe.
+    """
+    return " -> ".join(step["op"] for step in recipe["steps"])
+
+
+def _file_type(recipe, file_path):
+    if recipe["format"]:
+        return recipe["format"]
+    extension = os.path.splitext(file_path)[1].lower()
+    return {".xlsx": "xlsx", ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}.get(extension, "csv")
+
+
+def _targets(recipe, file_path, output_dir, file_type):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    split = recipe["steps"][-1] if recipe["steps"][-1]["op"] == "split" else None
+    if split and split["save_option"] == "folder":
+        return split, os.path.join(output_dir, stem)
+    suffix = "split" if split else "cleaned"
+    return split, os.path.join(output_dir, f"{stem}_{suffix}.{file_type}")
+
+
+def _split_key(split):
+    # A one-column list splits like a plain column name
+    column = split["column"]
+    return column[0] if isinstance(column, list) and len(column) == 1 else column
+
+
+def apply_step(data, step, log_callback=None):
+    """
+    Apply one non-split recipe step to a DataFrame.
+
+    Returns:
+    - pd.DataFrame: The updated data (geocoding returns a new frame).
+    """
+    log = log_callback or (lambda message: None)
+    if step["op"] == "replace":
+        counts = engine.replace_nulls(
+            data, step["value"], tokens=step.get("tokens"), strip_whitespace=step.get("strip_whitespace", False),
+            ignore_case=step.get("ignore_case", False), column_replacements=step.get("column_replacements"),
+        )
+        log(f"Replaced null-like values with '{step['value']}'. {nulls.summarise_counts(counts)}")
+    elif step["op"] == "fixcoords":
+        log(coordinates.format_report(engine.parse_coordinates(data, step["lat"], step["lon"], step.get("bounds"))))
+        if step["method"] == "mean":
+            lat_mean, lon_mean = engine.fix_coordinates(data, step["lat"], step["lon"])
+            log(f"Coordinates fixed: Missing values replaced with column means (Lat: {lat_mean:.6f}, Lon: {lon_mean:.6f}).")
+        else:
+            report = engine.impute_coordinates(data, step["lat"], step["lon"], bounds=step.get("bounds"),
+                                               replace_outliers=step["replace_outliers"])
+            log(f"Coordinates fixed: {imputation.format_report(report)}")
+    elif step["op"] == "geocode":
+        data = engine.generate_geocode(data, step["pregion"], log_callback=log, schema=step.get("schema"))
+    return data
+
+
+def run_recipe(recipe, file_path, output_dir, chunksize=None, log_callback=None, progress_callback=None,
+               excel_engine="auto", **load_options):
+    """
+    Run a recipe on one file, writing the result once.
+
+    Parameters:
+    - recipe: A recipe from load_recipe() or validate_recipe().
+    - file_path: The input file.
+    - output_dir: Folder receiving '<name>_cleaned.<type>', the split parts
+      in '<name>/', or '<name>_split.<type>' for a single-file split.
+    - chunksize: Stream CSV files in chunks of this many rows, with the
+      steps fused, instead of loading them whole and running the steps one
+      after another.
+    - log_callback: Optional function receiving progress messages.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+    - excel_engine: Workbook writer for '.xlsx' output.
+    - load_options: Passed to engine.load_dataset (parser, columns, ...).
+      The file is loaded as text unless a dtype is given.
+
+    Returns:
+    - str: Path of the file or folder written.
+
+    Raises:
+    - ValueError: If the recipe cannot run on this file or in this mode.
+    """
+    log = log_callback or (lambda message: None)
+    file_type = _file_type(recipe, file_path)
+    split, target = _targets(recipe, file_path, output_dir, file_type)
+    steps = recipe["steps"][:-1] if split else recipe["steps"]
+    os.makedirs(output_dir, exist_ok=True)
+
+    if chunksize:
+        _stream_recipe(steps, split, file_path, target, file_type, chunksize, log, progress_callback)
+        return target
+
+    load_options.setdefault("dtype", object)
+    data = engine.load_dataset(file_path, progress_callback=progress_callback, log_callback=log, **load_options)
+    log(f"Loaded {len(data)} rows.")
+    for step in steps:
+        data = apply_step(data, step, log)
+
+    if split and split.get("column"):
+        engine.split_by_column(data, _split_key(split), file_type, split["save_option"], target, log_callback=log,
+                               excel_engine=excel_engine, workers=split.get("workers", 1))
+    elif split:
+        engine.split_by_rows(data, split["rows"], file_type, split["save_option"], target, log_callback=log,
+                             excel_engine=excel_engine)
+    else:
+        engine.save_dataset(data, target, excel_engine=excel_engine)
+    return target
+
+
+def _stream_recipe(steps, split, file_path, target, file_type, chunksize, log, progress_callback):
+    """
+    Run the steps fused over CSV chunks, writing each chunk once.
+    """
+    if not file_path.endswith(".csv") or file_type != "csv":
+        raise ValueError("Streaming recipes only support CSV input and output.")
+    if split and (not split.get("column") or split["save_option"] != "folder"):
+        raise ValueError("Streaming recipes only support a final split by column into a folder.")
+
+    # Coordinate means see the data as the earlier steps leave it, like a full load would
+    means = {}
+    for index, step in enumerate(steps):
+        if step["op"] != "fixcoords":
+            continue
+        if step["method"] != "mean":
+            raise ValueError("Streaming recipes only support 'fixcoords' with method 'mean'.")
+        before = chunk_transform(steps[:index], means)
+        means[index] = streaming.coordinate_means(file_path, step["lat"], step["lon"], chunksize, transform=before,
+                                                  bounds=step.get("bounds"))
+        log(f"Coordinates fixed: Missing values replaced with column means "
+            f"(Lat: {means[index][0]:.6f}, Lon: {means[index][1]:.6f}).")
+
+    null_counts, parse_counts = {}, {}
+    transform = chunk_transform(steps, means, null_counts, parse_counts)
+    if split:
+        streaming.stream_split_by_column(file_path, _split_key(split), target, chunksize, log_callback=log,
+                                         progress_callback=progress_callback, transform=transform)
+    else:
+        rows = streaming.stream_transform(file_path, target, transform, chunksize, progress_callback)
+        log(f"Saved {rows} rows.")
+
+    for step in steps:
+        if step["op"] == "replace":
+            log(f"Replaced null-like values with '{step['value']}'. {nulls.summarise_counts(null_counts)}")
+            break
+    if parse_counts:
+        log(coordinates.format_report(parse_counts))
+
+
+def chunk_transform(steps, means, null_counts=None, parse_counts=None):
+    """
+    Fuse non-split recipe steps into one function applied to each chunk.
+
+    Parameters:
+    - steps: The recipe steps to apply, in order.
+    - means: Step index to the (latitude, longitude) means used by each
+      'fixcoords' step.
+    - null_counts: Optional dict receiving values replaced per column.
+    - parse_counts: Optional dict receiving coordinate parse statuses.
+    """
+    null_counts = {} if null_counts is None else null_counts
+    parse_counts = {} if parse_counts is None else parse_counts
+
+    def transform(chunk):
+        for index, step in enumerate(steps):
+            if step["op"] == "replace":
+                streaming.replace_nulls_chunk(
+                    chunk, step["value"], null_counts, tokens=step.get("tokens"),
+                    strip_whitespace=step.get("strip_whitespace", False), ignore_case=step.get("ignore_case", False),
+                    column_replacements=step.get("column_replacements"),
+                )
+            elif step["op"] == "fixcoords":
+                lat_mean, lon_mean = means[index]
+                streaming.fill_coordinates(chunk, step["lat"], step["lon"], lat_mean, lon_mean, parse_counts,
+                                           step.get("bounds"))
+            elif step["op"] == "geocode":
+                chunk = streaming.geocode_chunk(chunk, step["pregion"], step.get("schema"))
+        return chunk
+    return transform
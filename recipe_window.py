@@ -0,0 +1,219 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import os
+import engine
+import recipe
+import streaming
+
+
+# Recipe shown when the window opens, as a starting point to edit
+EXAMPLE_RECIPE = """{
+  "format": "csv",
+  "steps": [
+    {"op": "replace", "value": "NA"},
+    {"op": "fixcoords", "lat": "LATITUDE", "lon": "LONGITUDE", "method": "mean"},
+    {"op": "geocode", "pregion": "07"}
+  ]
+}
+"""
+
+
+class RecipeWindow:
+    def __init__(self, root, log_callback, progress_callback, task_runner):
+        """
+        Initialize the Recipe Runner window.
+
+        A recipe lists cleaning steps (replace, fixcoords, geocode, split)
+        that are run on every selected file with a single write per file,
+        exactly as `nbsclean.py run --recipe` does.
+
+        Parameters:
+        - root: The main application root.
+        - log_callback: Function to log messages to the main log screen.
+        - progress_callback: Function to update the main progress bar.
+        - task_runner: The application's TaskRunner; each file is run as
+          one task on its worker thread, so a batch can be cancelled file
+          by file.
+        """
+        self.root = root
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.task_runner = task_runner
+        self.recipe_path = None
+        self.input_files = []
+        self.output_dir = None
+
+        # Create the Recipe Runner window
+        self.window = tk.Toplevel(root)
+        self.window.title("Recipe Runner")
+        self.window.geometry("700x720")
+
+        #logo
+        logo = tk.PhotoImage(file="icons/logo.png")  # Replace with your logo file path
+        self.window.iconphoto(False, logo)
+
+        # Initialize UI
+        self.initialize_ui()
+
+    def initialize_ui(self):
+        """
+        Set up the recipe editor, file selection and run controls.
+        """
+        # Title
+        ttk.Label(self.window, text="Recipe Runner", font=("Arial", 16, "bold")).pack(pady=10)
+
+        # Recipe editor (JSON, or YAML when PyYAML is installed)
+        frame_recipe = ttk.Frame(self.window, padding=(10, 0))
+        frame_recipe.pack(fill=tk.BOTH, expand=True)
+        frame_recipe_buttons = ttk.Frame(frame_recipe)
+        frame_recipe_buttons.pack(fill=tk.X)
+        ttk.Label(frame_recipe_buttons, text="Recipe:", font=("Arial", 12)).pack(side=tk.LEFT)
+        ttk.Button(frame_recipe_buttons, text="Open", command=self.open_recipe).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_recipe_buttons, text="Save As", command=self.save_recipe).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_recipe_buttons, text="Check", command=self.check_recipe).pack(side=tk.LEFT, padx=5)
+        self.recipe_text = tk.Text(frame_recipe, height=14, wrap="none", font=("Courier", 10))
+        self.recipe_text.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.recipe_text.insert("1.0", EXAMPLE_RECIPE)
+
+        # Input files
+        frame_files = ttk.Frame(self.window, padding=(10, 5))
+        frame_files.pack(fill=tk.X)
+        frame_file_buttons = ttk.Frame(frame_files)
+        frame_file_buttons.pack(fill=tk.X)
+        ttk.Label(frame_file_buttons, text="Input files:", font=("Arial", 12)).pack(side=tk.LEFT)
+        ttk.Button(frame_file_buttons, text="Add Files", command=self.add_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_file_buttons, text="Clear", command=self.clear_files).pack(side=tk.LEFT, padx=5)
+        self.file_list = tk.Listbox(frame_files, height=5)
+        self.file_list.pack(fill=tk.X, pady=5)
+
+        # Output folder
+        frame_output = ttk.Frame(self.window, padding=(10, 5))
+        frame_output.pack(fill=tk.X)
+        ttk.Button(frame_output, text="Output Folder", command=self.choose_output_dir).pack(side=tk.LEFT)
+        self.output_label = ttk.Label(frame_output, text="No folder selected")
+        self.output_label.pack(side=tk.LEFT, padx=10)
+
+        # Streaming mode for CSV files larger than memory
+        frame_streaming = ttk.Frame(self.window, padding=(10, 5))
+        frame_streaming.pack(fill=tk.X)
+        self.streaming_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_streaming, text="Stream CSV files in chunks of", variable=self.streaming_mode).pack(side=tk.LEFT)
+        self.chunk_size = tk.StringVar(value=str(streaming.DEFAULT_CHUNKSIZE))
+        ttk.Entry(frame_streaming, textvariable=self.chunk_size, width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Label(frame_streaming, text="rows").pack(side=tk.LEFT)
+
+        # Buttons
+        ttk.Button(self.window, text="Run Recipe", command=self.start_run).pack(pady=10)
+        ttk.Button(self.window, text="Close", command=self.window.destroy).pack(pady=5)
+
+    def parse_recipe(self):
+        """
+        Parse and validate the recipe in the editor.
+        """
+        text = self.recipe_text.get("1.0", tk.END)
+        yaml_format = not text.lstrip().startswith("{")
+        base_dir = os.path.dirname(self.recipe_path) if self.recipe_path else os.getcwd()
+        return recipe.parse_recipe(text, yaml_format=yaml_format, base_dir=base_dir)
+
+    def open_recipe(self):
+        file_path = filedialog.askopenfilename(
+            title="Open Recipe",
+            filetypes=[("Recipe files", " ".join("*" + ext for ext in recipe.RECIPE_EXTENSIONS)), ("All Files", "*.*")],
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, encoding="utf-8") as handle:
+                text = handle.read()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not open recipe: {e}")
+            return
+        self.recipe_path = file_path
+        self.recipe_text.delete("1.0", tk.END)
+        self.recipe_text.insert("1.0", text)
+        self.log_callback(f"Opened recipe: {file_path}")
+
+    def save_recipe(self):
+        try:
+            self.parse_recipe()
+        except Exception as e:
+            messagebox.showerror("Error", f"Recipe is not valid: {e}")
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="Save Recipe As", defaultextension=".json",
+            filetypes=[("JSON recipe", "*.json"), ("YAML recipe", "*.yaml *.yml")],
+        )
+        if not file_path:
+            return
+        with open(file_path, "w", encoding="utf-8") as handle:
+            handle.write(self.recipe_text.get("1.0", tk.END).rstrip() + "\n")
+        self.recipe_path = file_path
+        self.log_callback(f"Recipe saved as: {file_path}")
+
+    def check_recipe(self):
+        try:
+            parsed = self.parse_recipe()
+        except Exception as e:
+            messagebox.showerror("Error", f"Recipe is not valid: {e}")
+            return
+        self.log_callback(f"Recipe OK: {recipe.describe_recipe(parsed)}")
+        messagebox.showinfo("Recipe", f"Recipe OK: {recipe.describe_recipe(parsed)}")
+
+    def add_files(self):
+        filetypes = [("Data Files", " ".join("*" + ext for ext in engine.SUPPORTED_EXTENSIONS))]
+        for file_path in filedialog.askopenfilenames(title="Select Input Files", filetypes=filetypes):
+            if file_path not in self.input_files:
+                self.input_files.append(file_path)
+                self.file_list.insert(tk.END, file_path)
+
+    def clear_files(self):
+        self.input_files = []
+        self.file_list.delete(0, tk.END)
+
+    def choose_output_dir(self):
+        output_dir = filedialog.askdirectory(title="Select Output Folder")
+        if output_dir:
+            self.output_dir = output_dir
+            self.output_label.config(text=output_dir)
+
+    def start_run(self):
+        """
+        Validate the inputs and queue one recipe task per input file.
+        """
+        try:
+            parsed = self.parse_recipe()
+            chunksize = int(self.chunk_size.get().strip()) if self.streaming_mode.get() else None
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if not self.input_files:
+            messagebox.showerror("Error", "Please add at least one input file!")
+            return
+        if not self.output_dir:
+            messagebox.showerror("Error", "Please choose an output folder!")
+            return
+
+        self.log_callback(f"Running recipe ({recipe.describe_recipe(parsed)}) on {len(self.input_files)} file(s)...")
+        for file_path in self.input_files:
+            name = os.path.basename(file_path)
+            self.task_runner.submit(
+                f"Recipe on {name}",
+                lambda task, file_path=file_path, output_dir=self.output_dir: self.run(task, parsed, file_path, output_dir,
+                                                                                       chunksize),
+                on_success=lambda target, name=name: self.log_callback(f"[{name}] Saved {target}"),
+                on_error=lambda e, name=name: self.log_callback(f"[{name}] Error running recipe: {e}"),
+            )
+
+    def run(self, task, parsed, file_path, output_dir, chunksize):
+        """
+        Run the recipe on one input file; runs on the worker thread.
+        """
+        name = os.path.basename(file_path)
+        task.progress(0, "blue")
+        target = recipe.run_recipe(
+            parsed, file_path, output_dir, chunksize=chunksize,
+            log_callback=lambda message: task.log(f"[{name}] {message}"),
+            progress_callback=lambda progress: task.progress(progress, "blue"),
+        )
+        task.progress(100, "blue")
+        return target
@@ -1,10 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
+import engine
+import nulls
 
 
 class ReplacerWindow:
-    def __init__(self, root, data, log_callback, update_data_callback):
+    def __init__(self, root, data, log_callback, update_data_callback, task_runner):
         """
         Initialize the Replacer Tool window.
 
@@ -13,16 +14,19 @@ class ReplacerWindow:
         - data: The DataFrame loaded in the main application.
         - log_callback: Function to log messages to the main log screen.
         - update_data_callback: Function to update the DataFrame in the main application.
+        - task_runner: The application's TaskRunner; replacing and saving
+          run on its worker thread.
         """
         self.root = root
         self.data = data
         self.log_callback = log_callback
         self.update_data_callback = update_data_callback
+        self.task_runner = task_runner
 
         # Create the Replacer window
         self.window = tk.Toplevel(root)
         self.window.title("Replacer Tool")
-        self.window.geometry("500x400")
+        self.window.geometry("500x640")
         self.window.resizable(False, False)
 
         # Initialize UI
@@ -46,11 +50,27 @@ class ReplacerWindow:
         self.replace_value = tk.StringVar(value="NA")
         ttk.Entry(self.window, textvariable=self.replace_value, width=30).pack(pady=5)
 
+        # Null tokens (empty cells always count as null)
+        ttk.Label(self.window, text="Null-like values (comma-separated):", font=("Arial", 12)).pack(pady=5)
+        self.null_tokens = tk.StringVar(value=", ".join(token for token in nulls.DEFAULT_NULL_TOKENS if token))
+        ttk.Entry(self.window, textvariable=self.null_tokens, width=40).pack(pady=5)
+        self.strip_whitespace = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.window, text="Ignore surrounding whitespace", variable=self.strip_whitespace).pack(anchor=tk.W, padx=40)
+        self.ignore_case = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.window, text="Ignore case", variable=self.ignore_case).pack(anchor=tk.W, padx=40)
+
+        # Per-column replacement values
+        ttk.Label(self.window, text="Per-column values (optional, COLUMN=VALUE; ...):", font=("Arial", 12)).pack(pady=5)
+        self.column_values = tk.StringVar()
+        ttk.Entry(self.window, textvariable=self.column_values, width=40).pack(pady=5)
+
         # File type selection
         ttk.Label(self.window, text="Save File As:", font=("Arial", 12)).pack(pady=5)
         self.file_type = tk.StringVar(value="csv")
         ttk.Radiobutton(self.window, text="CSV (default)", variable=self.file_type, value="csv").pack(anchor=tk.W, padx=40)
         ttk.Radiobutton(self.window, text="Excel (XLSX)", variable=self.file_type, value="xlsx").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Parquet", variable=self.file_type, value="parquet").pack(anchor=tk.W, padx=40)
+        ttk.Radiobutton(self.window, text="Feather (Arrow IPC)", variable=self.file_type, value="feather").pack(anchor=tk.W, padx=40)
 
         # Replace and Save button
         ttk.Button(self.window, text="Replace Values and Save", command=self.replace_and_save).pack(pady=10)
@@ -60,7 +80,8 @@ class ReplacerWindow:
 
     def replace_and_save(self):
         """
-        Replace null-like values and save the modified file.
+        Ask for the output file, then replace null-like values and save the
+        modified file on the task runner's worker thread.
         """
         replacement = self.replace_value.get()
         if not replacement:
@@ -68,33 +89,46 @@ class ReplacerWindow:
             return
 
         try:
-            # Replace null-like values
-            null_like_values = [None, "", "nan", "NaN", "#NULL!", pd.NA]
-            self.data.replace(null_like_values, replacement, inplace=True)
-
-            # Log the action
-            self.log_callback(f"Replaced null-like values with '{replacement}'.")
-
-            # Save the modified file
-            if self.file_type.get() == "csv":
-                save_file = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")], title="Save File As")
-                if not save_file:
-                    messagebox.showinfo("Info", "Save operation canceled.")
-                    return
-                self.data.to_csv(save_file, index=False)
-            elif self.file_type.get() == "xlsx":
-                save_file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")], title="Save File As")
-                if not save_file:
-                    messagebox.showinfo("Info", "Save operation canceled.")
-                    return
-                self.data.to_excel(save_file, index=False)
-
-            # Log the save action
-            self.log_callback(f"File saved as: {save_file}")
-
-            # Update the data in the main application
-            self.update_data_callback(self.data)
-
-            messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
-        except Exception as e:
+            options = {
+                "tokens": nulls.parse_tokens(self.null_tokens.get()),
+                "strip_whitespace": self.strip_whitespace.get(),
+                "ignore_case": self.ignore_case.get(),
+                "column_replacements": nulls.parse_column_replacements(self.column_values.get()),
+            }
+        except ValueError as e:
             messagebox.showerror("Error", f"An error occurred: {e}")
+            return
+
+        file_type = self.file_type.get()
+        save_file = filedialog.asksaveasfilename(defaultextension=f".{file_type}", filetypes=[engine.FILE_DIALOG_TYPES[file_type]], title="Save File As")
+        if not save_file:
+            messagebox.showinfo("Info", "Save operation canceled.")
+            return
+
+        self.task_runner.submit(
+            "Replace null-like values",
+            lambda task: self.replace(task, replacement, options, save_file),
+            on_success=self.on_replaced,
+            on_error=lambda e: messagebox.showerror("Error", f"An error occurred: {e}"),
+        )
+
+    def replace(self, task, replacement, options, save_file):
+        """
+        Replace null-like values and save the result; runs on the worker thread.
+        """
+        counts = engine.replace_nulls(self.data, replacement, progress_callback=task.progress, **options)
+
+        # Log the action
+        task.log(f"Replaced null-like values with '{replacement}'. {nulls.summarise_counts(counts)}")
+
+        # Save the modified file
+        engine.save_dataset(self.data, save_file)
+
+        # Log the save action
+        task.log(f"File saved as: {save_file}")
+        return save_file
+
+    def on_replaced(self, save_file):
+        # Update the data in the main application
+        self.update_data_callback(self.data)
+        messagebox.showinfo("Success", f"File saved successfully as '{save_file}'.")
@@ -0,0 +1,249 @@
+"""
+Row sources for the paged data viewer.
+
+A row source hands out small pages of rows by position, either from the
+DataFrame already in memory or straight from a columnar file: Arrow IPC
+(Feather v2) files are memory-mapped and read one record batch at a time,
+and Parquet files one row group at a time. Opening a source reads no rows.
+
+A RowView keeps the current sort and filter as an array of row positions
+into its source. Sorting and filtering read a single column with vectorized
+operations and only replace that array; the rows themselves are never
+copied or reordered.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Parquet row groups kept decoded while scrolling
+ROW_GROUP_CACHE = 4
+
+# Arrow record batches kept while scrolling
+BATCH_CACHE = 4
+
+
+class FrameSource:
+    def __init__(self, data):
+        """
+        Serve rows from a DataFrame in memory, without copying it.
+        """
+        self.data = data
+        self.columns = [str(col) for col in data.columns]
+
+    def __len__(self):
+        return len(self.data)
+
+    def take(self, positions):
+        """
+        Return the rows at `positions` as a DataFrame.
+        """
+        return self.data.iloc[positions]
+
+    def column(self, name):
+        """
+        Return one whole column as a Series.
+        """
+        return self.data.iloc[:, self.columns.index(name)]
+
+
+class ArrowFileSource:
+    def __init__(self, file_path):
+        """
+        Serve rows from a memory-mapped Arrow IPC (Feather v2) file, reading
+        only the record batches a page touches.
+
+        Uncompressed batches are mapped without reading them; compressed
+        ones (pandas writes lz4 by default) are decompressed when a page
+        first touches them. Batch sizes are found as the pages move
+        forward, from a single column.
+        """
+        self.file_path = file_path
+        self.reader = pa.ipc.open_file(pa.memory_map(file_path, "r"))
+        self.columns = self.reader.schema.names
+        self.rows = self.reader.count_rows()
+        self.offsets = [0]
+        self._batches = OrderedDict()
+
+    def __len__(self):
+        return self.rows
+
+    def _column_reader(self, index):
+        # A reader decoding one column only
+        options = pa.ipc.IpcReadOptions(included_fields=[index])
+        return pa.ipc.open_file(pa.memory_map(self.file_path, "r"), options=options)
+
+    def _batch(self, index):
+        if index in self._batches:
+            self._batches.move_to_end(index)
+        else:
+            self._batches[index] = self.reader.get_batch(index)
+            if len(self._batches) > BATCH_CACHE:
+                self._batches.popitem(last=False)
+        return self._batches[index]
+
+    def _offsets_upto(self, position):
+        # Batch start offsets, extended until they cover `position`
+        sizes_reader = None
+        while self.offsets[-1] <= position and len(self.offsets) <= self.reader.num_record_batches:
+            index = len(self.offsets) - 1
+            if index in self._batches:
+                size = self._batches[index].num_rows
+            else:
+                sizes_reader = sizes_reader or self._column_reader(0)
+                size = sizes_reader.get_batch(index).num_rows
+            self.offsets.append(self.offsets[-1] + size)
+        return np.asarray(self.offsets, dtype=np.int64)
+
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        offsets = self._offsets_upto(int(positions.max()) if len(positions) else 0)
+        return _take_chunks(positions, offsets, self._batch, self.reader.schema)
+
+    def column(self, name):
+        index = self.columns.index(name)
+        return self._column_reader(index).read_all().column(name).to_pandas()
+
+
+class ParquetFileSource:
+    def __init__(self, file_path):
+        """
+        Serve rows from a Parquet file, decoding only the row groups a page
+        touches. Row group sizes come from the file footer.
+        """
+        self.file_path = file_path
+        self.parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        metadata = self.parquet_file.metadata
+        self.columns = self.parquet_file.schema_arrow.names
+        sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+        self._groups = OrderedDict()
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _row_group(self, index):
+        if index in self._groups:
+            self._groups.move_to_end(index)
+        else:
+            self._groups[index] = self.parquet_file.read_row_group(index)
+            if len(self._groups) > ROW_GROUP_CACHE:
+                self._groups.popitem(last=False)
+        return self._groups[index]
+
+    def take(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        return _take_chunks(positions, self.offsets, self._row_group, self.parquet_file.schema_arrow)
+
+    def column(self, name):
+        return self.parquet_file.read(columns=[name]).column(name).to_pandas()
+
+
+def _take_chunks(positions, offsets, read_chunk, schema):
+    # Rows at `positions` from a file stored in chunks (record batches or
+    # row groups) starting at `offsets`, touching only the chunks needed
+    chunks = np.searchsorted(offsets, positions, side="right") - 1
+    pieces = []
+    for index in np.unique(chunks):
+        local = positions[chunks == index] - offsets[index]
+        chunk = read_chunk(int(index)).take(pa.array(local))
+        if isinstance(chunk, pa.RecordBatch):
+            chunk = pa.Table.from_batches([chunk])
+        pieces.append((np.flatnonzero(chunks == index), chunk))
+    if not pieces:
+        return schema.empty_table().to_pandas()
+    # Restore the requested order, which may jump between chunks after a sort
+    order = np.concatenate([rows for rows, _ in pieces])
+    table = pa.concat_tables([table for _, table in pieces])
+    return table.take(pa.array(np.argsort(order, kind="stable"))).to_pandas()
+
+
+def open_file_source(file_path):
+    """
+    Return a row source reading directly from a columnar file.
+
+    Raises:
+    - ValueError: If the file is not Parquet/Feather/Arrow or pyarrow is missing.
+    """
+    if not HAS_PYARROW:
+        raise ValueError("Viewing files without loading them requires pyarrow (pip install pyarrow).")
+    if file_path.endswith(".parquet"):
+        return ParquetFileSource(file_path)
+    if file_path.endswith((".feather", ".arrow")):
+        return ArrowFileSource(file_path)
+    raise ValueError("Only Parquet, Feather and Arrow files can be viewed without loading them.")
+
+
+class RowView:
+    def __init__(self, source):
+        """
+        A sortable, filterable window onto a row source.
+
+        Parameters:
+        - source: A FrameSource, ArrowFileSource or ParquetFileSource.
+        """
+        self.source = source
+        self.positions = None  # None means every row, in source order
+
+    def __len__(self):
+        return len(self.source) if self.positions is None else len(self.positions)
+
+    def page(self, start, stop):
+        """
+        Return rows [start, stop) of the current view and their positions
+        in the source.
+
+        Returns:
+        - tuple: (source positions array, DataFrame of those rows).
+        """
+        stop = min(stop, len(self))
+        if self.positions is None:
+            positions = np.arange(start, max(start, stop), dtype=np.int64)
+        else:
+            positions = self.positions[start:stop]
+        return positions, self.source.take(positions)
+
+    def _current_values(self, column):
+        values = self.source.column(column)
+        if self.positions is not None:
+            values = values.take(self.positions)
+        return values.reset_index(drop=True)
+
+    def sort(self, column, ascending=True):
+        """
+        Order the current rows by one column; missing values go last.
+        """
+        values = self._current_values(column)
+        try:
+            order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        except TypeError:
+            # Columns mixing numbers and text sort by their text
+            order = values.astype(str).sort_values(ascending=ascending, kind="stable").index.to_numpy()
+        base = np.arange(len(self.source), dtype=np.int64) if self.positions is None else self.positions
+        self.positions = base[order]
+
+    def filter(self, column, text):
+        """
+        Keep the current rows whose `column` contains `text`, ignoring case.
+
+        Returns:
+        - int: Number of rows left.
+        """
+        values = self._current_values(column)
+        mask = values.astype(str).str.contains(text, case=False, regex=False).to_numpy(dtype=bool)
+        base = np.arange(len(self.source), dtype=np.int64) if self.positions is None else self.positions
+        self.positions = base[mask]
+        return len(self.positions)
+
+    def reset(self):
+        """
+        Drop every sort and filter.
+        """
+        self.positions = None
@@ -1,12 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import os
-import pandas as pd
 import threading
+import engine
+import excel_io
+import writer_pool
+import streaming
 
 
 class SplitterWindow:
-    def __init__(self, root, file_path, log_callback, progress_callback):
+    def __init__(self, root, file_path, log_callback, progress_callback, task_runner, dataset_manager=None):
         """
         Initialize the Splitter window.
 
@@ -15,21 +18,34 @@ class SplitterWindow:
         - file_path: Path of the file to be split.
         - log_callback: Function to log messages to the main log screen.
         - progress_callback: Function to update the main progress bar.
+        - task_runner: The application's TaskRunner; loads and splits run on
+          its worker thread.
+        - dataset_manager: Optional shared DatasetManager. When it holds the
+          data of `file_path`, including edits made by other tools, that copy
+          is split instead of parsing the file again.
         """
         self.root = root
         self.file_path = file_path
         self.log_callback = log_callback
         self.progress_callback = progress_callback
+        self.task_runner = task_runner
+        self.dataset_manager = dataset_manager
         self.df = None
         self.columns = []
+        self.split_task = None
+        self._load_lock = threading.Lock()
 
         # Initialize UI first
         self.initialize_ui()
 
-        
-
         # Load data in the background
-        threading.Thread(target=self.load_data).start()
+        streaming_mode, compact = self.streaming_mode.get(), self.compact_load.get()
+        self.task_runner.submit(
+            "Load data for Splitter",
+            lambda task: self.load_data(task, streaming_mode, compact),
+            on_success=lambda result: self.update_column_dropdowns(),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to load data: {e}"),
+        )
 
     def initialize_ui(self):
         """
@@ -37,7 +53,7 @@ class SplitterWindow:
         """
         self.window = tk.Toplevel(self.root)
         self.window.title("Splitter Tool")
-        self.window.geometry("800x600")
+        self.window.geometry("800x830")
         self.window.resizable(True, True)
 
         #logo
@@ -59,18 +75,61 @@ class SplitterWindow:
         self.column_dropdown = ttk.Combobox(frame_column_split, textvariable=self.column_name, values=self.columns, state="readonly")
         self.column_dropdown.pack(fill=tk.X, padx=10, pady=5)
 
+        # Optional second key: split by the first column, then this one, into nested folders
+        ttk.Label(frame_column_split, text="Then by Column (optional, nested folders):", font=("Arial", 10)).pack(anchor=tk.W, padx=10)
+        self.sub_column_name = tk.StringVar()
+        self.sub_column_dropdown = ttk.Combobox(frame_column_split, textvariable=self.sub_column_name, values=[""] + self.columns, state="readonly")
+        self.sub_column_dropdown.pack(fill=tk.X, padx=10, pady=5)
+
         self.file_type = tk.StringVar(value="csv")
         self.save_option = tk.StringVar(value="folder")
 
         ttk.Label(frame_column_split, text="File Type:", font=("Arial", 12)).pack(anchor=tk.W, pady=5)
         ttk.Radiobutton(frame_column_split, text="CSV (default)", variable=self.file_type, value="csv").pack(anchor=tk.W, padx=20)
         ttk.Radiobutton(frame_column_split, text="Excel (XLSX)", variable=self.file_type, value="xlsx").pack(anchor=tk.W, padx=20)
+        ttk.Radiobutton(frame_column_split, text="Parquet", variable=self.file_type, value="parquet").pack(anchor=tk.W, padx=20)
+        ttk.Radiobutton(frame_column_split, text="Feather (Arrow IPC)", variable=self.file_type, value="feather").pack(anchor=tk.W, padx=20)
+
+        # Excel writer: xlsxwriter streams rows to disk, openpyxl builds the workbook in memory
+        self.excel_engine = tk.StringVar(value="auto")
+        frame_excel_engine = ttk.Frame(frame_column_split)
+        frame_excel_engine.pack(anchor=tk.W, padx=20)
+        ttk.Label(frame_excel_engine, text="Excel writer:").pack(side=tk.LEFT)
+        ttk.Combobox(frame_excel_engine, textvariable=self.excel_engine, values=excel_io.EXCEL_ENGINES, state="readonly", width=12).pack(side=tk.LEFT, padx=5)
+
+        # Parallel writers for folder output
+        self.writer_count = tk.StringVar(value=str(writer_pool.default_workers()))
+        frame_writers = ttk.Frame(frame_column_split)
+        frame_writers.pack(anchor=tk.W, padx=20, pady=(5, 0))
+        ttk.Label(frame_writers, text="Parallel writers (folder output):").pack(side=tk.LEFT)
+        ttk.Spinbox(frame_writers, from_=1, to=64, textvariable=self.writer_count, width=5).pack(side=tk.LEFT, padx=5)
+
+        # Compact dtypes shrink the in-memory copy the split works on
+        self.compact_load = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_column_split, text="Compact load (categoricals, Arrow strings)", variable=self.compact_load).pack(anchor=tk.W, padx=20)
+
+        # Folder splits keep a manifest, so an interrupted split skips the files it already wrote
+        self.resume_split = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame_column_split, text="Resume an interrupted split (folder output)", variable=self.resume_split).pack(anchor=tk.W, padx=20)
 
         ttk.Label(frame_column_split, text="Save Option:", font=("Arial", 12)).pack(anchor=tk.W, pady=5)
         ttk.Radiobutton(frame_column_split, text="Save in Folder (Multiple Files)", variable=self.save_option, value="folder").pack(anchor=tk.W, padx=20)
         ttk.Radiobutton(frame_column_split, text="Save as Single File (Multiple Sheets)", variable=self.save_option, value="single").pack(anchor=tk.W, padx=20)
 
-        ttk.Button(frame_column_split, text="Split by Column", command=self.start_split_by_column).pack(pady=10)
+        # Streaming mode keeps memory bounded for CSV files larger than RAM
+        is_large_csv = self.file_path.endswith(".csv") and os.path.getsize(self.file_path) > streaming.STREAMING_THRESHOLD_BYTES
+        self.streaming_mode = tk.BooleanVar(value=is_large_csv)
+        self.chunk_size = tk.StringVar(value=str(streaming.DEFAULT_CHUNKSIZE))
+        frame_streaming = ttk.Frame(frame_column_split)
+        frame_streaming.pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(frame_streaming, text="Stream from disk (CSV to folder, bounded memory)", variable=self.streaming_mode).pack(side=tk.LEFT, padx=20)
+        ttk.Label(frame_streaming, text="Chunk size (rows):").pack(side=tk.LEFT)
+        ttk.Entry(frame_streaming, textvariable=self.chunk_size, width=12).pack(side=tk.LEFT, padx=5)
+
+        frame_split_buttons = ttk.Frame(frame_column_split)
+        frame_split_buttons.pack(pady=10)
+        ttk.Button(frame_split_buttons, text="Split by Column", command=self.start_split_by_column).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_split_buttons, text="Cancel", command=self.cancel_split).pack(side=tk.LEFT, padx=5)
 
         # Section: Split by Rows
         frame_row_split = ttk.Frame(self.window, padding=(10, 10))
@@ -85,165 +144,242 @@ class SplitterWindow:
         # Close button
         ttk.Button(self.window, text="Close", command=self.window.destroy).pack(pady=20)
 
-    def load_data(self):
+    def load_data(self, task, streaming_mode, compact):
         """
-        Load the dataset in the background.
+        Load the dataset on the task runner's worker thread.
+
+        In streaming mode only the header is read; the full frame is loaded
+        later if a split needs it.
         """
-        try:
-            self.log_callback("Loading data for Splitter...")
-            self.df = self._load_data()
-            self.df = self.df.astype(object)  # Convert all columns to object
-            self.columns = self.df.columns.tolist()
+        if streaming_mode:
+            task.log("Streaming mode: reading column names only...")
+            self.columns = streaming.read_csv_columns(self.file_path)
+        else:
+            task.log("Loading data for Splitter...")
+            self._ensure_loaded(task, compact)
+        task.log("Data loaded successfully for Splitter.")
 
-            # Update the dropdown with column names
-            self.window.after(0, lambda: self.column_dropdown.config(values=self.columns))
+    def update_column_dropdowns(self):
+        """
+        Fill both column dropdowns with the loaded column names.
+        """
+        self.column_dropdown.config(values=self.columns)
+        self.sub_column_dropdown.config(values=[""] + self.columns)
 
-            self.log_callback("Data loaded successfully for Splitter.")
-        except Exception as e:
-            self.log_callback(f"Error loading data for Splitter: {e}")
-            messagebox.showerror("Error", f"Failed to load data: {e}")
+    def split_columns(self):
+        """
+        Return the selected split key: one column name, or a list of two.
+        """
+        column_name = self.column_name.get()
+        sub_column_name = self.sub_column_name.get()
+        if sub_column_name and sub_column_name != column_name:
+            return [column_name, sub_column_name]
+        return column_name
 
-    def start_split_by_column(self):
+    def _ensure_loaded(self, task, compact):
         """
-        Start splitting by column in a separate thread.
+        Borrow the latest shared copy of the dataset if it was loaded as
+        text, or load the file as text. A copy parsed with inferred types
+        would turn split keys such as '007' into 7.0.
         """
-        threading.Thread(target=self.split_by_column).start()
+        with self._load_lock:
+            if self.dataset_manager is not None:
+                current = self.dataset_manager.borrow(self.file_path, dtype=object)
+                if current is not None and current is not self.df:
+                    self.df = current
+                    task.log("Splitter is using the data already loaded in the main window.")
+                elif self.df is None and self.dataset_manager.borrow(self.file_path) is not None:
+                    task.log("The main window parsed this file with inferred types; loading it as text so split keys keep their leading zeros.")
+            if self.df is None:
+                self.df = self._load_data(task, compact)
+            self.columns = self.df.columns.tolist()
 
-    def split_by_column(self):
+    def start_split_by_column(self):
         """
-        Split data by unique values in the selected column and handle invalid rows.
+        Check the split options and ask for the target here, on the Tk
+        thread, then split on the task runner's worker thread.
         """
         column_name = self.column_name.get()
         if not column_name:
             messagebox.showerror("Error", "Please select a column for splitting.")
             return
 
-        # Detect invalid rows (where column_name is null or empty)
-        invalid_rows = self.df[self.df[column_name].isna()]
-
+        split_key = self.split_columns()
+        file_type = self.file_type.get()
+        save_option = self.save_option.get()
         try:
-            grouped = self.df[~self.df[column_name].isna()].groupby(column_name)
-
-            if self.save_option.get() == "folder":
-                save_folder = filedialog.askdirectory(title="Select Folder to Save Files")
-                if not save_folder:
-                    messagebox.showinfo("Info", "Save operation canceled.")
-                    return
-            else:
-                default_extension = ".xlsx" if self.file_type.get() == "xlsx" else ".csv"
-                file_types = [("CSV files", "*.csv"), ("Excel files", "*.xlsx")]
-                save_file = filedialog.asksaveasfilename(defaultextension=default_extension, filetypes=file_types, title="Save File As")
-                if not save_file:
-                    messagebox.showinfo("Info", "Save operation canceled.")
-                    return
-
-            # Save invalid rows to a separate file
-            if not invalid_rows.empty:
-                invalid_file_path = os.path.join(save_folder if self.save_option.get() == "folder" else os.path.dirname(save_file), "Invalid_Rows.xlsx")
-                invalid_rows.to_excel(invalid_file_path, index=False, engine="openpyxl")
-                self.log_callback(f"Saved invalid rows to: {invalid_file_path}")
+            if self.streaming_mode.get():
+                if not self.file_path.endswith(".csv"):
+                    raise ValueError("Streaming mode only supports '.csv' files.")
+                if file_type != "csv" or save_option != "folder":
+                    raise ValueError("Streaming mode saves CSV files in a folder. Select 'CSV' and 'Save in Folder'.")
+                chunksize = int(self.chunk_size.get().strip())
             else:
-                self.log_callback("No invalid rows detected.")
-
-            self.progress_callback(0, "green")
-            total_groups = grouped.ngroups
-            progress_increment = 100 / total_groups
-
-            if self.save_option.get() == "folder":
-                os.makedirs(save_folder, exist_ok=True)
-                for i, (group_name, group_data) in enumerate(grouped, start=1):
-                    file_name = f"{save_folder}/{group_name}"
-                    file_name += ".csv" if self.file_type.get() == "csv" else ".xlsx"
-                    if self.file_type.get() == "csv":
-                        group_data.to_csv(file_name, index=False)
-                    else:
-                        group_data.to_excel(file_name, index=False, engine="openpyxl")
-                    self.progress_callback(int(i * progress_increment), "green")
-                    self.log_callback(f"Saved: {file_name}")
-                messagebox.showinfo("Success", f"Data split by column '{column_name}' and saved in '{save_folder}'.")
-            elif self.save_option.get() == "single":
-                # Save all splits in a single file
-                if self.file_type.get() == "csv":
-                    combined_csv = pd.concat([grouped.get_group(name).assign(**{column_name: name}) for name in grouped.groups])
-                    combined_csv.to_csv(save_file, index=False)
-                else:
-                    with pd.ExcelWriter(save_file, engine="openpyxl") as writer:
-                        for i, (group_name, group_data) in enumerate(grouped, start=1):
-                            sheet_name = str(group_name)[:31]  # Ensure sheet name length <= 31 characters
-                            group_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                            self.progress_callback(int(i * progress_increment), "green")
-                            self.log_callback(f"Added sheet: {sheet_name}")
-                messagebox.showinfo("Success", f"Data saved as a single file: {save_file}.")
-        except Exception as e:
-            self.progress_callback(0, "green")
+                chunksize = None
+            workers = int(self.writer_count.get())
+        except ValueError as e:
             messagebox.showerror("Error", str(e))
+            return
 
-    def start_split_by_rows(self):
+        save_target = self._ask_save_target()
+        if not save_target:
+            messagebox.showinfo("Info", "Save operation canceled.")
+            return
+
+        if chunksize:
+            work = lambda task: self.stream_split_by_column(task, split_key, save_target, chunksize)
+        else:
+            options = {"excel_engine": self.excel_engine.get(), "workers": workers, "compact": self.compact_load.get(),
+                       "resume": self.resume_split.get()}
+            work = lambda task: self.split_by_column(task, split_key, file_type, save_option, save_target, **options)
+
+        if save_option == "folder":
+            message = f"Data split by column '{column_name}' and saved in '{save_target}'."
+        else:
+            message = f"Data saved as a single file: {save_target}."
+        self.progress_callback(0, "green")
+        self.split_task = self.task_runner.submit(
+            f"Split by column '{column_name}'", work,
+            on_success=lambda result: messagebox.showinfo("Success", message),
+            on_error=self.on_split_error,
+        )
+
+    def cancel_split(self):
         """
-        Start splitting by rows in a separate thread.
+        Stop the last split started from this window. Writes already
+        running finish; a folder split can be resumed later.
         """
-        threading.Thread(target=self.split_by_rows).start()
+        if self.split_task is None or self.split_task.cancelled:
+            self.log_callback("No split to cancel.")
+            return
+        self.split_task.cancel()
+        self.log_callback(f"Cancelling: {self.split_task.name}...")
 
-    def split_by_rows(self):
+    def split_by_column(self, task, split_key, file_type, save_option, save_target, excel_engine, workers, compact,
+                        resume):
         """
-        Split data into parts with a specified number of rows per part.
+        Split data by unique values in the selected column and handle invalid rows.
+        """
+        self._ensure_loaded(task, compact)
+        engine.split_by_column(
+            self.df,
+            split_key,
+            file_type,
+            save_option,
+            save_target,
+            log_callback=task.log,
+            progress_callback=lambda progress: task.progress(progress, "green"),
+            excel_engine=excel_engine,
+            workers=workers,
+            resume=resume,
+        )
+
+    def stream_split_by_column(self, task, column_name, save_folder, chunksize):
+        """
+        Split a CSV file by column chunk by chunk, without loading it whole.
+        """
+        streaming.stream_split_by_column(
+            self.file_path,
+            column_name,
+            save_folder,
+            chunksize=chunksize,
+            log_callback=task.log,
+            progress_callback=lambda progress: task.progress(progress, "green"),
+        )
+
+    def start_split_by_rows(self):
+        """
+        Check the row count and ask for the target here, on the Tk thread,
+        then split on the task runner's worker thread.
         """
         try:
             rows_per_part = int(self.row_count.get().strip())
-            if rows_per_part <= 0:
-                messagebox.showerror("Error", "Row count must be a positive integer.")
-                return
-
-            splits = [
-                self.df.iloc[i * rows_per_part: (i + 1) * rows_per_part]
-                for i in range((len(self.df) + rows_per_part - 1) // rows_per_part)
-            ]
-
-            if self.save_option.get() == "folder":
-                save_folder = filedialog.askdirectory(title="Select Folder to Save Files")
-                if not save_folder:
-                    messagebox.showinfo("Info", "Save operation canceled.")
-                    return
-            else:
-                default_extension = ".xlsx" if self.file_type.get() == "xlsx" else ".csv"
-                file_types = [("CSV files", "*.csv"), ("Excel files", "*.xlsx")]
-                save_file = filedialog.asksaveasfilename(defaultextension=default_extension, filetypes=file_types, title="Save File As")
-                if not save_file:
-                    messagebox.showinfo("Info", "Save operation canceled.")
-                    return
-
-            self.progress_callback(0, "green")
-            progress_increment = 100 / len(splits)
-
-            if self.save_option.get() == "folder":
-                os.makedirs(save_folder, exist_ok=True)
-                for i, split_data in enumerate(splits, start=1):
-                    file_name = f"{save_folder}/Part_{i}"
-                    file_name += ".csv" if self.file_type.get() == "csv" else ".xlsx"
-                    if self.file_type.get() == "csv":
-                        split_data.to_csv(file_name, index=False)
-                    else:
-                        split_data.to_excel(file_name, index=False, engine="openpyxl")
-                    self.progress_callback(int(i * progress_increment), "green")
-                    self.log_callback(f"Saved: {file_name}")
-                messagebox.showinfo("Success", f"Data split into parts and saved in '{save_folder}'.")
-            elif self.save_option.get() == "single":
-                if self.file_type.get() == "csv":
-                    combined_csv = pd.concat(splits)
-                    combined_csv.to_csv(save_file, index=False)
-                else:
-                    with pd.ExcelWriter(save_file, engine="openpyxl") as writer:
-                        for i, split_data in enumerate(splits, start=1):
-                            sheet_name = f"Part_{i}"
-                            split_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                            self.progress_callback(int(i * progress_increment), "green")
-                            self.log_callback(f"Added sheet: {sheet_name}")
-                messagebox.showinfo("Success", f"Data saved as a single file: {save_file}.")
-        except Exception as e:
-            self.progress_callback(0, "green")
+        except ValueError as e:
             messagebox.showerror("Error", str(e))
+            return
+        if rows_per_part <= 0:
+            messagebox.showerror("Error", "Row count must be a positive integer.")
+            return
+
+        file_type = self.file_type.get()
+        save_option = self.save_option.get()
+        streaming_mode = self.streaming_mode.get()
+        try:
+            if streaming_mode and (not self.file_path.endswith(".csv") or file_type != "csv" or save_option != "folder"):
+                raise ValueError("Streaming mode saves CSV files in a folder. Select 'CSV' and 'Save in Folder'.")
+            workers = int(self.writer_count.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        save_target = self._ask_save_target()
+        if not save_target:
+            messagebox.showinfo("Info", "Save operation canceled.")
+            return
+
+        excel_engine = self.excel_engine.get()
+        compact = self.compact_load.get()
+        if streaming_mode:
+            work = lambda task: self.stream_split_by_rows(task, rows_per_part, save_target, workers)
+        else:
+            work = lambda task: self.split_by_rows(task, rows_per_part, file_type, save_option, save_target, excel_engine, compact)
+        if save_option == "folder":
+            message = f"Data split into parts and saved in '{save_target}'."
+        else:
+            message = f"Data saved as a single file: {save_target}."
+        self.progress_callback(0, "green")
+        self.split_task = self.task_runner.submit(
+            f"Split into parts of {rows_per_part} rows", work,
+            on_success=lambda result: messagebox.showinfo("Success", message),
+            on_error=self.on_split_error,
+        )
+
+    def split_by_rows(self, task, rows_per_part, file_type, save_option, save_target, excel_engine, compact):
+        """
+        Split data into parts with a specified number of rows per part.
+        """
+        self._ensure_loaded(task, compact)
+        engine.split_by_rows(
+            self.df,
+            rows_per_part,
+            file_type,
+            save_option,
+            save_target,
+            log_callback=task.log,
+            progress_callback=lambda progress: task.progress(progress, "green"),
+            excel_engine=excel_engine,
+        )
+
+    def stream_split_by_rows(self, task, rows_per_part, save_folder, workers):
+        """
+        Split a CSV file into parts by copying its bytes, without loading it.
+        """
+        streaming.split_csv_rows(
+            self.file_path,
+            rows_per_part,
+            save_folder,
+            workers=workers,
+            log_callback=task.log,
+            progress_callback=lambda progress: task.progress(progress, "green"),
+        )
+
+    def on_split_error(self, error):
+        self.progress_callback(0, "green")
+        messagebox.showerror("Error", str(error))
+
+    def _ask_save_target(self):
+        """
+        Ask for a folder or a file depending on the selected save option.
 
-    def _load_data(self):
+        Returns:
+        - str: The chosen folder or file path, empty if canceled.
+        """
+        if self.save_option.get() == "folder":
+            return filedialog.askdirectory(title="Select Folder to Save Files")
+        file_type = self.file_type.get()
+        return filedialog.asksaveasfilename(defaultextension=f".{file_type}", filetypes=[engine.FILE_DIALOG_TYPES[file_type]], title="Save File As")
+
+    def _load_data(self, task, compact):
         """
         Load the data based on file type.
 
@@ -253,9 +389,9 @@ class SplitterWindow:
         Raises:
         - ValueError: If the file type is unsupported.
         """
-        if self.file_path.endswith(".csv"):
-            return pd.read_csv(self.file_path, dtype=object, low_memory=False)
-        elif self.file_path.endswith(".xlsx"):
-            return pd.read_excel(self.file_path, dtype=object)
-        else:
-            raise ValueError("Unsupported file type. Only '.csv' and '.xlsx' are supported.")
+        options = {"log_callback": task.log, "progress_callback": lambda progress: task.progress(progress, "green")}
+        if compact:
+            options["compact_load"] = True
+        if self.dataset_manager is not None:
+            return self.dataset_manager.load(self.file_path, dtype=object, **options)
+        return engine.load_dataset(self.file_path, dtype=object, **options)
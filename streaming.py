@@ -0,0 +1,481 @@
+"""
+Chunked streaming versions of the engine operations for CSV files larger
+than memory.
+
+The source is read with pandas `chunksize` iteration and every chunk is
+written out before the next one is parsed, so resident memory stays bounded
+by the chunk size rather than the file size. All columns are read as text
+(`dtype=object`) so values are written back exactly as they appear in the
+source and the output does not change type from one chunk to the next.
+
+Splitting by row count needs no parsing at all: split_csv_rows finds the
+record boundaries in the raw bytes and copies the header plus each part's
+byte range straight to its file, so it runs at disk speed.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+import coordinates
+import engine
+import instrumentation
+import nulls
+import partitioner
+import writer_pool
+
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# CSV files above this size open in streaming mode by default in the GUI
+STREAMING_THRESHOLD_BYTES = 1024 ** 3
+
+# Bytes scanned at a time when splitting a CSV file by row count
+SCAN_BUFFER_BYTES = 16 * 1024 * 1024
+
+# Bytes copied at a time when the OS cannot copy a file range itself
+COPY_BLOCK_BYTES = 4 * 1024 * 1024
+
+_QUOTE = ord('"')
+_QUOTE_BYTE = b'"'
+_NEWLINE = ord("\n")
+
+
+def read_csv_columns(file_path):
+    """
+    Return the column names of a CSV file by parsing only its header.
+    """
+    return pd.read_csv(file_path, nrows=0).columns.tolist()
+
+
+def iter_csv_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None):
+    """
+    Iterate over a CSV file in chunks of at most `chunksize` rows.
+
+    Parameters:
+    - file_path: Path of the CSV file.
+    - chunksize: Maximum number of rows per chunk.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      based on the bytes consumed so far.
+
+    Yields:
+    - pd.DataFrame: The next chunk, with every column as object dtype.
+    """
+    if not file_path.endswith(".csv"):
+        raise ValueError("Streaming mode only supports '.csv' files.")
+    chunksize = int(chunksize)
+    if chunksize <= 0:
+        raise ValueError("Chunk size must be a positive integer.")
+
+    total_bytes = os.path.getsize(file_path) or 1
+    with open(file_path, "rb") as handle:
+        for chunk in pd.read_csv(handle, dtype=object, chunksize=chunksize):
+            yield chunk
+            if progress_callback:
+                progress_callback(min(100, int(handle.tell() * 100 / total_bytes)))
+
+
+class ChunkedCSVWriter:
+    """
+    Append DataFrame chunks to a single CSV file, writing the header once.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.rows_written = 0
+        self._handle = None
+
+    @instrumentation.timed("write chunk")
+    def write(self, chunk):
+        if self._handle is None:
+            self._handle = open(self.file_path, "w", newline="", encoding="utf-8")
+            chunk.to_csv(self._handle, index=False)
+        else:
+            chunk.to_csv(self._handle, index=False, header=False)
+        self.rows_written += len(chunk)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@instrumentation.timed("stream")
+def stream_transform(src_path, dst_path, transform, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None):
+    """
+    Apply `transform` to every chunk of `src_path` and write the results to `dst_path`.
+
+    Parameters:
+    - src_path: Source CSV path.
+    - dst_path: Destination CSV path.
+    - transform: Function taking a chunk and returning the chunk to write.
+    - chunksize: Maximum number of rows held in memory at once.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+
+    Returns:
+    - int: Number of rows written.
+    """
+    with ChunkedCSVWriter(dst_path) as writer:
+        for chunk in iter_csv_chunks(src_path, chunksize, progress_callback):
+            writer.write(transform(chunk))
+    instrumentation.count_rows(writer.rows_written)
+    instrumentation.add_bytes(read=instrumentation.file_size(src_path), written=instrumentation.file_size(dst_path))
+    return writer.rows_written
+
+
+def replace_nulls_chunk(chunk, replacement, counts, **options):
+    """
+    Replace null-like values in one chunk and add its per-column counts to
+    `counts`. Returns the chunk so it can be used as a transform step.
+    """
+    nulls.add_counts(counts, engine.replace_nulls(chunk, replacement, **options))
+    return chunk
+
+
+def stream_replace_nulls(src_path, dst_path, replacement, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None,
+                         **options):
+    """
+    Streaming counterpart of engine.replace_nulls. Extra keyword arguments
+    (tokens, strip_whitespace, ...) are passed through to it.
+
+    Returns:
+    - tuple: (number of rows written, dict of values replaced per column).
+    """
+    if replacement is None or replacement == "":
+        raise ValueError("Replacement value cannot be empty!")
+    counts = {}
+    rows = stream_transform(
+        src_path, dst_path,
+        lambda chunk: replace_nulls_chunk(chunk, replacement, counts, **options),
+        chunksize, progress_callback,
+    )
+    return rows, counts
+
+
+@instrumentation.timed("coordinate means")
+def coordinate_means(src_path, lat_col, lon_col, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None, transform=None,
+                     bounds=None):
+    """
+    Compute the latitude and longitude means of a CSV file from running sums
+    and counts, one chunk at a time. `transform` is applied to each chunk
+    first, e.g. the steps that run before the coordinates in a recipe.
+    `bounds` is used to spot swapped rows, as in engine.parse_coordinates.
+
+    Returns:
+    - tuple: (latitude mean, longitude mean).
+    """
+    if not lat_col or not lon_col:
+        raise ValueError("Please select both latitude and longitude columns!")
+
+    sums = {lat_col: 0.0, lon_col: 0.0}
+    counts = {lat_col: 0, lon_col: 0}
+    rows = 0
+    for chunk in iter_csv_chunks(src_path, chunksize, progress_callback):
+        rows += len(chunk)
+        if transform:
+            chunk = transform(chunk)
+        for col in (lat_col, lon_col):
+            if col not in chunk.columns:
+                raise ValueError(f"Column '{col}' not found in data.")
+        lat, lon, _ = coordinates.parse_pair(chunk[lat_col], chunk[lon_col], bounds)
+        for col, values in ((lat_col, lat), (lon_col, lon)):
+            sums[col] += np.nansum(values)
+            counts[col] += int(np.count_nonzero(~np.isnan(values)))
+
+    instrumentation.count_rows(rows)
+    instrumentation.add_bytes(read=instrumentation.file_size(src_path))
+    lat_mean = sums[lat_col] / counts[lat_col] if counts[lat_col] else float("nan")
+    lon_mean = sums[lon_col] / counts[lon_col] if counts[lon_col] else float("nan")
+    return lat_mean, lon_mean
+
+
+def fill_coordinates(chunk, lat_col, lon_col, lat_mean, lon_mean, counts=None, bounds=None):
+    """
+    Convert one chunk's coordinate columns to floats and fill the gaps with
+    precomputed means. Parse statuses are written per row and, when
+    `counts` is given, added into it. `bounds` is used to spot swapped rows
+    and should match the one the means were computed with.
+    """
+    lat, lon, status = coordinates.parse_pair(chunk[lat_col], chunk[lon_col], bounds)
+    chunk[lat_col] = np.where(np.isnan(lat), lat_mean, lat)
+    chunk[lon_col] = np.where(np.isnan(lon), lon_mean, lon)
+    chunk[coordinates.STATUS_COLUMN] = pd.Series(coordinates.status_labels(status), index=chunk.index, dtype=object)
+    if counts is not None:
+        coordinates.count_statuses(status, counts)
+    return chunk
+
+
+def geocode_chunk(chunk, pregion_value, schema=None):
+    """
+    Generate geocodes for one text-typed chunk. Padded fields parse their
+    text as numbers, so every chunk yields the same codes as a full load.
+    """
+    return engine.generate_geocode(chunk, pregion_value, schema=schema)
+
+
+def stream_fix_coordinates(src_path, dst_path, lat_col, lon_col, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None,
+                           counts=None, bounds=None):
+    """
+    Streaming counterpart of engine.fix_coordinates.
+
+    The file is read twice: a first pass accumulates sums and counts to get
+    the global means, a second pass converts, fills and writes each chunk.
+
+    Returns:
+    - tuple: (latitude mean, longitude mean) used for filling.
+    """
+    first_half = (lambda p: progress_callback(p // 2)) if progress_callback else None
+    lat_mean, lon_mean = coordinate_means(src_path, lat_col, lon_col, chunksize, first_half, bounds=bounds)
+
+    second_half = (lambda p: progress_callback(50 + p // 2)) if progress_callback else None
+    stream_transform(
+        src_path, dst_path,
+        lambda chunk: fill_coordinates(chunk, lat_col, lon_col, lat_mean, lon_mean, counts, bounds),
+        chunksize, second_half,
+    )
+    return lat_mean, lon_mean
+
+
+def stream_generate_geocode(src_path, dst_path, pregion_value, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None,
+                            schema=None):
+    """
+    Streaming counterpart of engine.generate_geocode.
+
+    Returns:
+    - int: Number of rows written.
+    """
+    return stream_transform(
+        src_path, dst_path,
+        lambda chunk: geocode_chunk(chunk, pregion_value, schema),
+        chunksize, progress_callback,
+    )
+
+
+@instrumentation.timed("stream split")
+def stream_split_by_column(src_path, column_name, save_folder, chunksize=DEFAULT_CHUNKSIZE,
+                           log_callback=None, progress_callback=None, transform=None):
+    """
+    Streaming counterpart of engine.split_by_column for CSV folder output.
+
+    Each chunk's groups are appended to one CSV file per value as the source
+    is read. Rows without a value are appended to 'Invalid_Rows.csv'.
+    `column_name` may be a list of columns for nested folder output.
+    `transform`, when given, is applied to each chunk before it is split.
+
+    Returns:
+    - int: Number of group files written.
+    """
+    log = log_callback or (lambda message: None)
+    os.makedirs(save_folder, exist_ok=True)
+    started = set()
+
+    def append(file_name, rows):
+        # Files from a previous run are truncated on their first write
+        if file_name in started:
+            rows.to_csv(file_name, mode="a", index=False, header=False)
+        else:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            rows.to_csv(file_name, index=False)
+            started.add(file_name)
+
+    invalid_file_path = os.path.join(save_folder, "Invalid_Rows.csv")
+    rows = 0
+    for chunk in iter_csv_chunks(src_path, chunksize, progress_callback):
+        rows += len(chunk)
+        if transform:
+            chunk = transform(chunk)
+        partitioning = partitioner.partition(chunk, column_name)
+        if partitioning.invalid_mask.any():
+            append(invalid_file_path, partitioning.invalid_rows())
+        for key, group_data in partitioning:
+            append(engine.group_file_name(save_folder, key if len(key) > 1 else key[0], "csv"), group_data)
+
+    instrumentation.count_rows(rows)
+    instrumentation.add_bytes(read=instrumentation.file_size(src_path),
+                              written=sum(instrumentation.file_size(file_name) for file_name in started))
+    group_files = started - {invalid_file_path}
+    if invalid_file_path in started:
+        log(f"Saved invalid rows to: {invalid_file_path}")
+    else:
+        log("No invalid rows detected.")
+    log(f"Saved {len(group_files)} files to: {save_folder}")
+    return len(group_files)
+
+
+def _record_ends(block, in_quotes):
+    """
+    Return the offsets just past every newline in `block` that ends a CSV
+    record, and whether the block ends inside a quoted field.
+
+    A newline ends a record when an even number of quote characters lie
+    between it and the start of the record: an escaped quote ('""') counts
+    twice, so only field-opening and -closing quotes change the state.
+    """
+    data = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(data == _NEWLINE)
+    quotes = np.flatnonzero(data == _QUOTE)
+    if not len(quotes):
+        return (newlines[:0] if in_quotes else newlines) + 1, in_quotes
+    quoted = (np.searchsorted(quotes, newlines) + in_quotes) % 2 == 1
+    return newlines[~quoted] + 1, (len(quotes) + in_quotes) % 2 == 1
+
+
+def record_starts(block):
+    """
+    Return the offset of every record in a block of complete CSV records,
+    such as the text DataFrame.to_csv returns, encoded.
+    """
+    ends, _ = _record_ends(block, False)
+    return np.concatenate([[0], ends[:-1]]).astype(np.int64) if len(ends) else np.zeros(0, dtype=np.int64)
+
+
+def iter_csv_parts(src_path, rows_per_part, buffer_bytes=SCAN_BUFFER_BYTES, progress_callback=None):
+    """
+    Scan a CSV file's bytes and yield the byte range of every part of
+    `rows_per_part` records, after the header.
+
+    Parameters:
+    - src_path: Path of the CSV file.
+    - rows_per_part: Maximum number of records in each part.
+    - buffer_bytes: Bytes read and scanned at a time.
+    - progress_callback: Optional function receiving a 0-100 percentage
+      based on the bytes scanned so far.
+
+    Yields:
+    - tuple: (header bytes, start offset, end offset) of the next part.
+    """
+    total_bytes = os.path.getsize(src_path) or 1
+    header = None
+    part_start = None
+    rows_in_part = 0
+    offset = 0
+    in_quotes = False
+    with open(src_path, "rb") as handle:
+        for block in iter(lambda: handle.read(buffer_bytes), b""):
+            offset += len(block)
+            if header is not None and not in_quotes and _QUOTE_BYTE not in block:
+                # Without quotes every newline ends a record; blocks that end no part are only counted
+                count = int(np.count_nonzero(np.frombuffer(block, dtype=np.uint8) == _NEWLINE))
+                if rows_in_part + count < rows_per_part:
+                    rows_in_part += count
+                    if progress_callback:
+                        progress_callback(min(100, int(offset * 100 / total_bytes)))
+                    continue
+            ends, in_quotes = _record_ends(block, in_quotes)
+            ends += offset - len(block)
+            if header is None:
+                if not len(ends):
+                    continue
+                part_start, ends = int(ends[0]), ends[1:]
+                with open(src_path, "rb") as header_handle:
+                    header = header_handle.read(part_start)
+            # The records closing a part are every rows_per_part-th end, counted across blocks
+            for end in ends[rows_per_part - rows_in_part - 1::rows_per_part]:
+                yield header, part_start, int(end)
+                part_start = int(end)
+            rows_in_part = (rows_in_part + len(ends)) % rows_per_part
+            if progress_callback:
+                progress_callback(min(100, int(offset * 100 / total_bytes)))
+
+    # The records after the last full part, including a last line with no newline
+    if header is not None and part_start < offset:
+        yield header, part_start, offset
+
+
+def _copy_range(src, dst, start, end):
+    # Copy bytes [start, end) of one open file to the end of another, in the kernel when it can
+    remaining = end - start
+    if hasattr(os, "copy_file_range"):
+        try:
+            while remaining:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining, end - remaining)
+                if not copied:
+                    break
+                remaining -= copied
+        except OSError:
+            pass
+    src.seek(end - remaining)
+    while remaining:
+        block = src.read(min(COPY_BLOCK_BYTES, remaining))
+        if not block:
+            break
+        dst.write(block)
+        remaining -= len(block)
+
+
+def write_csv_part(part, file_name):
+    """
+    Write one part found by iter_csv_parts: the header, then the part's
+    bytes copied from the source. Module-level so writer threads can run it.
+
+    Parameters:
+    - part: Tuple of (source path, header bytes, start offset, end offset).
+    - file_name: Destination path.
+
+    Returns:
+    - int: Bytes written.
+    """
+    src_path, header, start, end = part
+    with open(src_path, "rb") as src, open(file_name, "wb") as dst:
+        dst.write(header)
+        dst.flush()
+        _copy_range(src, dst, start, end)
+    return len(header) + end - start
+
+
+@instrumentation.timed("stream split rows")
+def split_csv_rows(src_path, rows_per_part, save_folder, workers=1, buffer_bytes=SCAN_BUFFER_BYTES,
+                   log_callback=None, progress_callback=None):
+    """
+    Streaming counterpart of engine.split_by_rows for CSV folder output.
+
+    Records are found in the raw bytes (quoted fields may hold newlines)
+    and copied unchanged, so every value, quote and line ending is kept
+    exactly as in the source. Blank lines count as records. The file must
+    use '\n' or '\r\n' line endings and an ASCII-compatible encoding such
+    as UTF-8.
+
+    Parameters:
+    - src_path: Source CSV path.
+    - rows_per_part: Maximum number of records in each part.
+    - save_folder: Folder receiving Part_1.csv, Part_2.csv, ...
+    - workers: Parts copied in parallel threads while scanning continues.
+    - buffer_bytes: Bytes read and scanned at a time.
+    - log_callback: Optional function receiving progress messages.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+
+    Returns:
+    - int: Number of parts written.
+
+    Raises:
+    - ValueError: If the file is not a CSV file or the row count is invalid.
+    """
+    if not src_path.endswith(".csv"):
+        raise ValueError("Streaming mode only supports '.csv' files.")
+    rows_per_part = int(rows_per_part)
+    if rows_per_part <= 0:
+        raise ValueError("Row count must be a positive integer.")
+    os.makedirs(save_folder, exist_ok=True)
+
+    written = 0
+
+    def record(file_name, size):
+        nonlocal written
+        written += size
+
+    parts = (
+        (os.path.join(save_folder, f"Part_{number}.csv"), (src_path, header, start, end))
+        for number, (header, start, end) in enumerate(
+            iter_csv_parts(src_path, rows_per_part, buffer_bytes, progress_callback), start=1)
+    )
+    count = writer_pool.write_partitions(parts, write_csv_part, workers=workers, executor="thread",
+                                         log_callback=log_callback, result_callback=record)
+    instrumentation.add_bytes(read=instrumentation.file_size(src_path), written=written)
+    if log_callback:
+        log_callback(f"Saved {count} files to: {save_folder}")
+    return count
@@ -0,0 +1,284 @@
+"""
+Background task runner for the GUI.
+
+Tk widgets may only be touched from the thread running the main loop, and
+any operation that takes more than a moment must not run on it. Heavy work
+is therefore submitted to a TaskRunner: tasks run one after another on a
+single worker thread, and everything they report (log lines, progress,
+their result or error) is posted to a queue as an event.
+
+The Tk loop drains that queue with `after()` every POLL_INTERVAL_MS. Each
+drain writes the waiting log lines in one insert and draws only the latest
+progress value, so a task reporting thousands of updates per second costs
+the GUI a few redraws per second.
+
+Cancellation is cooperative: every log or progress report made by a task
+checks its cancel flag and raises TaskCancelled, which stops the engine
+functions at their next report without them knowing about the GUI. The
+long in-memory steps (null replacement, geocoding, coordinate filling and
+duplicate scoring) report progress per column, field, level or slice of
+pairs, so a cancel takes effect partway through them.
+
+Every task runs inside an instrumentation trace; when it recorded any
+engine stages, their timing table is written to the log afterwards and the
+trace is kept for export.
+"""
+import collections
+import contextlib
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import instrumentation
+
+
+# How often the Tk loop drains the event queue, in milliseconds
+POLL_INTERVAL_MS = 50
+
+# Events handled per drain; the rest wait for the next one so the GUI stays responsive
+MAX_EVENTS_PER_POLL = 500
+
+# Traces of the most recent tasks kept for export
+TRACE_HISTORY = 50
+
+# Folder receiving the reports of profiled tasks
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "nbs_profiles")
+
+
+class TaskCancelled(Exception):
+    """
+    Raised inside a task when the user has cancelled it.
+    """
+
+
+class Task:
+    def __init__(self, runner, name, work, on_success=None, on_error=None):
+        """
+        One unit of background work.
+
+        Parameters:
+        - runner: The TaskRunner executing the task.
+        - name: Short description shown in the log.
+        - work: Function called on the worker thread with this task; its
+          return value is passed to `on_success`.
+        - on_success: Optional function called on the Tk thread with the result.
+        - on_error: Optional function called on the Tk thread with the exception.
+        """
+        self.runner = runner
+        self.name = name
+        self.work = work
+        self.on_success = on_success
+        self.on_error = on_error
+        self.trace = instrumentation.Trace(name)
+        self._cancel_event = threading.Event()
+        self._last_progress = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """
+        Raise TaskCancelled if the task has been cancelled.
+        """
+        if self._cancel_event.is_set():
+            raise TaskCancelled(f"{self.name} was cancelled.")
+
+    def log(self, message):
+        """
+        Post a log line; usable as an engine `log_callback`.
+        """
+        self.check_cancelled()
+        self.runner.post_log(message)
+
+    def progress(self, value, color="yellow"):
+        """
+        Post a 0-100 progress value; usable as an engine `progress_callback`.
+
+        Only whole-percent changes are posted, so a task reporting every row
+        does not flood the queue.
+        """
+        self.check_cancelled()
+        step = (int(value), color)
+        if step != self._last_progress:
+            self._last_progress = step
+            self.runner.post_progress(value, color)
+
+
+class TaskRunner:
+    def __init__(self, root, log_callback, progress_callback, status_callback=None):
+        """
+        Run tasks on a worker thread and relay their events to the Tk thread.
+
+        Parameters:
+        - root: The Tk root whose loop drains the event queue.
+        - log_callback: Function writing a block of log text; called on the Tk thread.
+        - progress_callback: Function receiving (value, color); called on the Tk thread.
+        - status_callback: Optional function receiving the number of queued
+          and running tasks whenever it changes.
+        """
+        self.root = root
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+        self.current = None
+        self.traces = collections.deque(maxlen=TRACE_HISTORY)
+        self.profile_next = None
+        self._events = queue.Queue()
+        self._tasks = queue.Queue()
+        self._pending = []
+        self._lock = threading.Lock()
+
+        threading.Thread(target=self._run_tasks, daemon=True).start()
+        self.root.after(POLL_INTERVAL_MS, self._drain)
+
+    def submit(self, name, work, on_success=None, on_error=None):
+        """
+        Queue a task; it starts when the tasks before it have finished.
+
+        Returns:
+        - Task: The queued task, which can be cancelled.
+        """
+        task = Task(self, name, work, on_success, on_error)
+        with self._lock:
+            self._pending.append(task)
+        self._tasks.put(task)
+        if self.current is not None:
+            self.post_log(f"Queued: {name}")
+        self._post_status()
+        return task
+
+    def cancel_current(self):
+        """
+        Cancel the running task; queued tasks still run.
+
+        Returns:
+        - bool: False if no task was running.
+        """
+        task = self.current
+        if task is None:
+            return False
+        task.cancel()
+        self.post_log(f"Cancelling: {task.name}...")
+        return True
+
+    def cancel_all(self):
+        """
+        Cancel the running task and every queued one.
+        """
+        with self._lock:
+            tasks = list(self._pending)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.post_log(f"Cancelling {len(tasks)} task(s)...")
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def post_log(self, message):
+        """
+        Queue a log line for the Tk thread; safe to call from any thread.
+        """
+        self._events.put(("log", message))
+
+    def post_progress(self, value, color="yellow"):
+        """
+        Queue a progress update for the Tk thread; safe to call from any thread.
+        """
+        self._events.put(("progress", value, color))
+
+    def call(self, function, *args):
+        """
+        Run `function(*args)` on the Tk thread, e.g. to show a dialog.
+        """
+        self._events.put(("call", function, args))
+
+    def _post_status(self):
+        if self.status_callback:
+            self.call(self.status_callback, self.pending_count())
+
+    def _run_tasks(self):
+        while True:
+            task = self._tasks.get()
+            if task.cancelled:
+                self.post_log(f"Cancelled before it started: {task.name}")
+                self._finish(task)
+                continue
+
+            self.current = task
+            self.post_log(f"Started: {task.name}")
+            start_time = time.perf_counter()
+            try:
+                with instrumentation.tracing(task.trace), self._profiler(task):
+                    result = task.work(task)
+            except TaskCancelled:
+                self.post_log(f"Cancelled: {task.name}")
+                self.post_progress(0)
+            except Exception as e:
+                self.post_log(f"Failed: {task.name} ({e})")
+                if task.on_error:
+                    self.call(task.on_error, e)
+            else:
+                self.post_log(f"Finished: {task.name} in {time.perf_counter() - start_time:.1f}s")
+                if task.on_success:
+                    self.call(task.on_success, result)
+            finally:
+                if len(task.trace):
+                    self.traces.append(task.trace)
+                    self.post_log(task.trace.summary())
+                self.current = None
+                self._finish(task)
+
+    def _profiler(self, task):
+        # Profile the task if one was requested with profile_next
+        profiler, self.profile_next = self.profile_next, None
+        if profiler is None:
+            return contextlib.nullcontext()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        extension = "html" if profiler == "pyinstrument" else "prof"
+        output_path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
+        return instrumentation.profiled(profiler, output_path, self.post_log)
+
+    def _finish(self, task):
+        with self._lock:
+            self._pending.remove(task)
+        self._post_status()
+
+    def _drain(self):
+        """
+        Handle waiting events on the Tk thread, then schedule the next drain.
+        """
+        lines = []
+        progress = None
+        for _ in range(MAX_EVENTS_PER_POLL):
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "log":
+                lines.append(event[1])
+            elif event[0] == "progress":
+                # Only the latest value is drawn
+                progress = event[1:]
+            else:
+                # Keep log order: flush the lines posted before this call
+                if lines:
+                    self.log_callback("\n".join(lines))
+                    lines = []
+                try:
+                    event[1](*event[2])
+                except Exception as e:
+                    lines.append(f"Error in GUI update: {e}")
+
+        if lines:
+            self.log_callback("\n".join(lines))
+        if progress is not None:
+            self.progress_callback(*progress)
+        self.root.after(POLL_INTERVAL_MS, self._drain)
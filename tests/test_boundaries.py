@@ -0,0 +1,43 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import boundaries
+
+
+def _square(lon, lat):
+    return {"type": "Polygon", "coordinates": [[[lon, lat], [lon + 1, lat], [lon + 1, lat + 1], [lon, lat + 1],
+                                                [lon, lat]]]}
+
+
+def _boundary_file(tmp_path):
+    path = tmp_path / "districts.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"REGION": 7, "DISTRICT": 1}, "geometry": _square(35, -7)},
+        {"type": "Feature", "properties": {"REGION": 7, "DISTRICT": 2}, "geometry": _square(36, -7)},
+    ]}))
+    return str(path)
+
+
+def test_validate_points_flags_rows_outside_their_district(tmp_path):
+    areas = boundaries.load_boundaries(_boundary_file(tmp_path), ["REGION", "DISTRICT"])
+    # Zero-padded text codes name the same areas as the numeric properties
+    data = pd.DataFrame({
+        "PREGION": ["07", "07", "07", "07", "07"],
+        "PDISTRICT": ["01", "01", "02", "09", "01"],
+        "LAT": [-6.5, -6.5, -6.5, -6.5, np.nan],
+        "LON": [35.5, 36.5, 36.5, 35.5, 35.5],
+    })
+
+    report = boundaries.validate_points(data, "LAT", "LON", ["PREGION", "PDISTRICT"], areas)
+
+    assert report == {"inside": 2, "outside": 1, "no_boundary": 1, "no_coordinates": 1}
+    assert data[boundaries.STATUS_COLUMN].tolist() == ["", "outside", "", "no_boundary", "no_coordinates"]
+    assert data[boundaries.FOUND_COLUMN].tolist() == ["", "7|2", "", "", ""]
+
+
+def test_area_keys_are_missing_when_any_part_is():
+    keys = boundaries.area_keys([pd.Series(["07", "7", None]), pd.Series([1.0, "01", "3"])])
+
+    assert keys.tolist() == ["7|1", "7|1", None]
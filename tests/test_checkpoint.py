@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+
+import checkpoint
+import engine
+
+
+def _data():
+    return pd.DataFrame({"PDISTRICT": ["007", "01", "007", "02"], "NAME": ["Amani", "Baraka", "Chiku", "Dalila"]})
+
+
+def _split(target, messages=None):
+    return engine.split_by_column(_data(), "PDISTRICT", "csv", "folder", str(target),
+                                  log_callback=messages.append if messages is not None else None)
+
+
+def test_resume_skips_only_files_recorded_intact(tmp_path):
+    target = tmp_path / "split"
+    _split(target)
+    manifest = target / checkpoint.MANIFEST_NAME
+    lines = manifest.read_text().splitlines()
+    # A crash after 007.csv and 01.csv, with the last manifest line cut off
+    assert [line for line in lines if "02.csv" in line]
+    manifest.write_text("\n".join(line for line in lines if "02.csv" not in line) + "\n" + lines[-1][:10])
+    os.remove(target / "02.csv")
+    # A recorded file changed on disk without changing size
+    original = (target / "01.csv").read_bytes()
+    (target / "01.csv").write_bytes(original.replace(b"Baraka", b"Bakari"))
+
+    messages = []
+    assert _split(target, messages) == 3
+
+    assert "Resuming: 1 of 3 files were already written." in messages
+    assert (target / "01.csv").read_bytes() == original
+    assert pd.read_csv(target / "02.csv", dtype=str)["NAME"].tolist() == ["Dalila"]
+    assert pd.read_csv(target / "007.csv", dtype=str)["NAME"].tolist() == ["Amani", "Chiku"]
+
+
+def test_resume_on_other_data_starts_over(tmp_path):
+    target = tmp_path / "split"
+    _split(target)
+    job = checkpoint.SplitCheckpoint(str(target), {"columns": ["PDISTRICT"], "file_type": "csv", "data": "other"})
+
+    assert not job.is_done(str(target / "007.csv"))
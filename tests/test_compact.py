@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import compact
+import engine
+
+
+def _census(rows=1000):
+    return pd.DataFrame({
+        "PDISTRICT": pd.Series([f"{i % 4:02d}" for i in range(rows)], dtype=object),
+        "NAME": pd.Series([f"Household {i}" for i in range(rows)], dtype=object),
+        "MEMBERS": np.arange(rows, dtype=np.int64) % 9,
+        "SHARE": np.full(rows, 0.5),
+        "LAT": -6.0 - np.arange(rows) / 7,
+        "MIXED": pd.Series([1, "a"] * (rows // 2), dtype=object),
+    })
+
+
+def test_compact_frame_round_trips_every_value():
+    data = _census()
+
+    compacted = compact.compact_frame(data)
+
+    assert isinstance(compacted["PDISTRICT"].dtype, pd.CategoricalDtype)
+    assert compacted["MEMBERS"].dtype == np.int8
+    assert compacted["SHARE"].dtype == np.float32
+    # Coordinates would lose precision as float32, and mixed columns are left alone
+    assert compacted["LAT"].dtype == np.float64
+    assert compacted["MIXED"].dtype == object
+    assert compact.memory_usage(compacted) < compact.memory_usage(data)
+    restored = compacted.astype({"PDISTRICT": object, "NAME": object, "MEMBERS": np.int64, "SHARE": np.float64})
+    pd.testing.assert_frame_equal(restored, data, check_dtype=False)
+
+
+def test_compact_csv_load_keeps_text_codes(tmp_path):
+    path = tmp_path / "census.csv"
+    _census().to_csv(path, index=False)
+
+    data = engine.load_dataset(str(path), dtype=object, use_sidecar=False, compact_load=True)
+
+    assert data["PDISTRICT"].astype(object).tolist()[:5] == ["00", "01", "02", "03", "00"]
+    assert data["MEMBERS"].astype(object).tolist()[:3] == ["0", "1", "2"]
+    assert not pd.api.types.is_numeric_dtype(data["MEMBERS"].dtype)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import coordinates
+
+
+def _labels(status):
+    return coordinates.status_labels(status).tolist()
+
+
+def test_parse_pair_reads_text_dms_and_decimal_commas():
+    lat = pd.Series(["-6.8", "6°48'36\"S", "-6,7924", "S 6 48.6", None, "abc"], dtype=object)
+    lon = pd.Series(["39.28", "39°16'48\"E", "39,2083", "E 39 16.8", "39.1", "39.1"], dtype=object)
+
+    lat_values, lon_values, status = coordinates.parse_pair(lat, lon)
+
+    assert lat_values[:4] == pytest.approx([-6.8, -6.81, -6.7924, -6.81])
+    assert lon_values[:4] == pytest.approx([39.28, 39.28, 39.2083, 39.28])
+    assert np.isnan(lat_values[4:]).all()
+    assert _labels(status) == ["ok", "dms", "text", "dms", "missing", "invalid"]
+
+
+def test_parse_pair_repairs_swapped_rows():
+    # Hemisphere letters on the wrong axis, and a latitude beyond 90 degrees
+    lat = pd.Series(["39.2E", "120.5", "35.2"], dtype=object)
+    lon = pd.Series(["6.8S", "-6.1", "-6.4"], dtype=object)
+
+    lat_values, lon_values, status = coordinates.parse_pair(lat, lon)
+
+    assert lat_values[:2] == pytest.approx([-6.8, -6.1])
+    assert lon_values[:2] == pytest.approx([39.2, 120.5])
+    assert _labels(status)[:2] == ["swapped", "swapped"]
+    # Only a bounding box shows the last row is swapped
+    assert _labels(status)[2] == "ok"
+
+    lat_values, lon_values, status = coordinates.parse_pair(lat, lon, bounds=(-12, -1, 29, 41))
+    assert (lat_values[2], lon_values[2]) == pytest.approx((-6.4, 35.2))
+    assert _labels(status)[2] == "swapped"
+
+
+def test_parse_pair_clears_out_of_range_values():
+    lat, lon, status = coordinates.parse_pair(pd.Series(["95", "-6.8"]), pd.Series(["200", "39.2"]))
+
+    assert np.isnan(lat[0]) and np.isnan(lon[0])
+    assert _labels(status) == ["out_of_range", "ok"]
+
+
+def test_count_statuses_adds_across_chunks():
+    counts = {}
+    for chunk in (np.array([0, 0, 3], dtype=np.int8), np.array([4], dtype=np.int8)):
+        coordinates.count_statuses(chunk, counts)
+
+    assert counts["ok"] == 2 and counts["swapped"] == 1 and counts["missing"] == 1
@@ -0,0 +1,69 @@
+import threading
+
+import pandas as pd
+
+from dataset_manager import DatasetManager
+from splitter import SplitterWindow
+
+
+def _write_csv(tmp_path):
+    path = tmp_path / "census.csv"
+    path.write_text("PDISTRICT,NAME\n007,Amani\n01,Baraka\n")
+    return str(path)
+
+
+def test_load_is_cached_per_dtype(tmp_path):
+    path = _write_csv(tmp_path)
+    datasets = DatasetManager()
+
+    inferred = datasets.load(path)
+    text = datasets.load(path, dtype=object)
+
+    assert text is not inferred
+    assert datasets.load(path, dtype=object) is text
+    assert text["PDISTRICT"].tolist() == ["007", "01"]
+
+
+def test_borrow_checks_the_dtype_of_the_current_dataset(tmp_path):
+    path = _write_csv(tmp_path)
+    datasets = DatasetManager()
+    inferred = datasets.load(path)
+    datasets.set_current(inferred, path)
+
+    assert datasets.borrow(path) is inferred
+    assert datasets.borrow(path, dtype=object) is None
+
+    text = datasets.load(path, dtype=object)
+    datasets.set_current(text, path, dtype=object)
+    assert datasets.borrow(path, dtype=object) is text
+    assert datasets.borrow(str(tmp_path / "other.csv")) is None
+
+
+class _Task:
+    # Stand-in for task_runner.Task
+    def log(self, message):
+        pass
+
+    def progress(self, value, color="yellow"):
+        pass
+
+
+def test_splitter_splits_the_edited_dataset(tmp_path):
+    path = _write_csv(tmp_path)
+    datasets = DatasetManager()
+    # As the main window loads a file
+    datasets.set_current(datasets.load(path, dtype=object), path, dtype=object)
+    edited = datasets.borrow(path).copy()
+    edited.loc[1, "NAME"] = "Baraka Juma"
+    datasets.update(edited)
+
+    # The window without its Tk widgets
+    window = SplitterWindow.__new__(SplitterWindow)
+    window.file_path, window.dataset_manager, window.df = path, datasets, None
+    window._load_lock = threading.Lock()
+    target = tmp_path / "split"
+    window.split_by_column(_Task(), "PDISTRICT", "csv", "folder", str(target), "auto", 1, False, False)
+
+    assert window.df is edited
+    assert pd.read_csv(target / "01.csv", dtype=str)["NAME"].tolist() == ["Baraka Juma"]
+    assert pd.read_csv(target / "007.csv", dtype=str)["PDISTRICT"].tolist() == ["007"]
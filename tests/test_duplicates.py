@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+import duplicates
+
+
+@pytest.fixture
+def households():
+    return pd.DataFrame({
+        "CODE1": ["07011", "07011", "07011", "07011", "07021"],
+        "CODE2": ["0101001", "0101001", "0101001", "0101001", "0101001"],
+        "NAME": ["Amani Juma", "Amani Juma", "Amani Jumaa", "Baraka Said", "Amani Juma"],
+        "AGE": ["34", "34", "34", "51", "34"],
+    }, index=[10, 11, 12, 13, 14])
+
+
+def test_exact_duplicates_keep_the_first_row(households):
+    result, report = duplicates.find_duplicates(households)
+
+    assert report["exact"] == 1
+    assert result["DUP_STATUS"].tolist() == ["first", "exact", "", "", ""]
+    assert result["DUP_GROUP"].tolist()[:2] == [1, 1]
+    assert result["DUP_GROUP"].isna().tolist() == [False, False, True, True, True]
+    assert result.index.tolist() == households.index.tolist()
+
+
+def test_near_duplicates_only_within_a_block(households):
+    result, report = duplicates.find_duplicates(households, columns=["NAME", "AGE"], compare_columns=["NAME"],
+                                                threshold=0.9)
+
+    # The typo is a near-duplicate of the first row; the same name in
+    # another ward (row 14) is an exact match on NAME and AGE only
+    assert result["DUP_STATUS"].tolist() == ["first", "exact", "near", "", "exact"]
+    assert result["DUP_GROUP"].tolist()[:3] == [1, 1, 1]
+    assert 0.9 <= result["DUP_SCORE"].iloc[2] < 1
+    assert report["near"] == 1 and report["groups"] == 1
+
+
+def test_coordinates_limit_the_compared_pairs(households):
+    households["LAT"] = ["-6.8000", "-6.8000", "-6.9000", "-6.8001", "-6.8000"]
+    households["LON"] = ["39.2000", "39.2000", "39.2000", "39.2001", "39.2000"]
+
+    result, report = duplicates.find_duplicates(households, compare_columns=["NAME"], lat_col="LAT", lon_col="LON",
+                                                radius_m=50, threshold=0.9)
+
+    # Row 12 is 11 km away from row 10, so the typo is not compared
+    assert result["DUP_STATUS"].tolist() == ["first", "exact", "", "", ""]
+    assert report["near"] == 0
+
+
+def test_invalid_options_raise(households):
+    with pytest.raises(ValueError, match="Missing required columns"):
+        duplicates.find_duplicates(households, compare_columns=["HEAD"])
+    with pytest.raises(ValueError, match="threshold"):
+        duplicates.find_duplicates(households, threshold=1.5)
@@ -0,0 +1,97 @@
+import os
+
+import pandas as pd
+import pytest
+
+import engine
+
+
+@pytest.mark.skipif(not engine.HAS_PYARROW, reason="pyarrow is not installed")
+def test_sidecar_cleanup_errors_do_not_fail_the_load(tmp_path, monkeypatch):
+    path = tmp_path / "census.csv"
+    pd.DataFrame({"PDISTRICT": ["007", "01"], "NAME": ["Amani", "Baraka"]}).to_csv(path, index=False)
+    monkeypatch.setattr(engine, "SIDECAR_MIN_BYTES", 0)
+    # A sidecar of an earlier version of the file
+    stale = os.path.join(os.path.dirname(engine.sidecar_path(str(path), dtype=object)), "census.csv.text.0-0.feather")
+    os.makedirs(os.path.dirname(stale), exist_ok=True)
+    open(stale, "w").close()
+
+    def locked(file_path):
+        raise PermissionError("locked")
+
+    monkeypatch.setattr(engine.os, "remove", locked)
+    messages = []
+    data = engine.load_dataset(str(path), dtype=object, log_callback=messages.append)
+
+    assert data["PDISTRICT"].tolist() == ["007", "01"]
+    assert any("Could not remove" in message for message in messages)
+
+
+def test_split_by_rows_writes_parts_in_order(tmp_path):
+    data = pd.DataFrame({"ROW": range(7)})
+    target = tmp_path / "parts"
+
+    engine.split_by_rows(data, 3, "csv", "folder", str(target))
+
+    parts = [pd.read_csv(target / f"Part_{i}.csv")["ROW"].tolist() for i in (1, 2, 3)]
+    assert parts == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def _census_csv(tmp_path):
+    path = tmp_path / "census.csv"
+    path.write_text("PDISTRICT,PWARD,NAME\n007,012,Amani\n01,003,Baraka\n007,,Chiku\n,004,Dalila\n")
+    return str(path)
+
+
+def test_split_by_column_keeps_zero_padded_keys(tmp_path):
+    data = engine.load_dataset(_census_csv(tmp_path), dtype=object, use_sidecar=False)
+    target = tmp_path / "split"
+
+    groups = engine.split_by_column(data, "PDISTRICT", "csv", "folder", str(target), resume=False)
+
+    assert groups == 2
+    assert sorted(name for name in os.listdir(target) if name.endswith(".csv")) == ["007.csv", "01.csv"]
+    part = pd.read_csv(target / "007.csv", dtype=str)
+    assert part["PDISTRICT"].tolist() == ["007", "007"]
+    assert part["NAME"].tolist() == ["Amani", "Chiku"]
+    invalid = pd.read_excel(target / "Invalid_Rows.xlsx", dtype=str)
+    assert invalid["NAME"].tolist() == ["Dalila"]
+    assert invalid["PWARD"].tolist() == ["004"]
+
+
+def test_split_by_column_nested_folders(tmp_path):
+    data = engine.load_dataset(_census_csv(tmp_path), dtype=object, use_sidecar=False)
+    target = tmp_path / "split"
+
+    engine.split_by_column(data, ["PDISTRICT", "PWARD"], "csv", "folder", str(target), resume=False)
+
+    assert pd.read_csv(target / "007" / "012.csv", dtype=str)["NAME"].tolist() == ["Amani"]
+    assert pd.read_csv(target / "01" / "003.csv", dtype=str)["NAME"].tolist() == ["Baraka"]
+
+
+def test_replace_nulls_counts_per_column():
+    data = pd.DataFrame({"NAME": ["Amani", "#NULL!", None], "AGE": [30, None, 41]}, dtype=object)
+
+    counts = engine.replace_nulls(data, "NA")
+
+    assert data["NAME"].tolist() == ["Amani", "NA", "NA"]
+    assert data["AGE"].tolist() == [30, "NA", 41]
+    assert counts == {"NAME": 2, "AGE": 1}
+
+
+@pytest.mark.parametrize("parser", ["c", "pyarrow"])
+def test_load_reports_byte_progress(tmp_path, parser):
+    if parser == "pyarrow" and not engine.HAS_PYARROW:
+        pytest.skip("pyarrow is not installed")
+    path = tmp_path / "census.csv"
+    pd.DataFrame({"ROW": range(200_000), "NAME": "Amani"}).to_csv(path, index=False)
+    percents = []
+
+    data = engine.load_dataset(str(path), progress_callback=percents.append, parser=parser, use_sidecar=False)
+
+    assert len(data) == 200_000
+    assert data["ROW"].iloc[-1] == 199_999
+    # Real progress moves through the file rather than jumping from 0 to 100
+    assert percents == sorted(percents)
+    assert percents[-1] == 100
+    assert any(0 < percent < 100 for percent in percents)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import excel_io
+
+
+def _sample():
+    return pd.DataFrame({
+        "PDISTRICT": ["007", "01", None],
+        "COUNT": [1, 2, 3],
+        "LAT": [-6.8, np.nan, -3.4],
+        "NAME": ["Amani", "Baraka", "Chiku"],
+    })
+
+
+@pytest.mark.parametrize("excel_engine", ["xlsxwriter", "openpyxl"])
+def test_write_excel_round_trip(tmp_path, excel_engine):
+    if excel_engine == "xlsxwriter" and not excel_io.HAS_XLSXWRITER:
+        pytest.skip("xlsxwriter is not installed")
+    data = _sample()
+    path = tmp_path / "out.xlsx"
+
+    assert excel_io.write_excel(data, path, excel_engine=excel_engine) == 1
+
+    result = pd.read_excel(path, dtype={"PDISTRICT": str})
+    pd.testing.assert_frame_equal(result, data, check_dtype=False)
+
+
+def test_write_excel_sheets_rolls_over_long_sheets(tmp_path):
+    data = pd.DataFrame({"A": range(5), "B": list("abcde")})
+    path = tmp_path / "out.xlsx"
+
+    sheets = list(excel_io.rollover_sheets("Data", data, max_rows=2))
+    written = excel_io.write_excel_sheets(path, sheets)
+
+    assert written == 3
+    result = pd.read_excel(path, sheet_name=None)
+    assert list(result) == ["Data", "Data (2)", "Data (3)"]
+    pd.testing.assert_frame_equal(pd.concat(result.values(), ignore_index=True), data)
+
+
+def test_read_excel_selects_columns(tmp_path):
+    path = tmp_path / "out.xlsx"
+    excel_io.write_excel(_sample(), path)
+
+    result = excel_io.read_excel(path, columns=["NAME", "COUNT"], dtype=object)
+
+    assert sorted(result.columns) == ["COUNT", "NAME"]
+    assert result["NAME"].tolist() == ["Amani", "Baraka", "Chiku"]
+
+
+@pytest.mark.parametrize("calamine", [True, False])
+def test_read_excel_stacks_selected_sheets(tmp_path, monkeypatch, calamine):
+    if calamine and not excel_io.HAS_CALAMINE:
+        pytest.skip("python-calamine is not installed")
+    monkeypatch.setattr(excel_io, "HAS_CALAMINE", calamine)
+    path = tmp_path / "regions.xlsx"
+    excel_io.write_excel_sheets(path, [
+        ("Dodoma", pd.DataFrame({"PDISTRICT": ["01", "02"], "NAME": ["Amani", "Baraka"]})),
+        ("Arusha", pd.DataFrame({"PDISTRICT": ["03"], "NAME": ["Chiku"]})),
+        ("Notes", pd.DataFrame({"TEXT": ["not census data"]})),
+    ])
+    percents = []
+
+    assert excel_io.list_sheets(path) == ["Dodoma", "Arusha", "Notes"]
+    result = excel_io.read_excel(path, sheets=["Arusha", "Dodoma"], columns=["PDISTRICT", "NAME"], dtype=object,
+                                 progress_callback=percents.append)
+
+    assert result["PDISTRICT"].tolist() == ["03", "01", "02"]
+    assert result["NAME"].tolist() == ["Chiku", "Amani", "Baraka"]
+    assert percents[-1] == 100
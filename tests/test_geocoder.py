@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+import geocoder
+
+
+def test_format_field_pads_numbers_and_blanks_missing():
+    text, too_wide = geocoder.format_field(pd.Series(["7", "012", None, "x", "1234"], dtype=object), width=3)
+
+    assert text.tolist() == ["007", "012", "000", "000", "1234"]
+    assert too_wide.tolist() == [False, False, False, False, True]
+
+
+def test_build_codes_with_the_default_schema():
+    data = pd.DataFrame({
+        "PREGION": ["07"], "PDISTRICT": ["1"], "PCOUNCIL": ["2"], "PCONSTITUENCY": ["01"], "PDIVISION": ["03"],
+        "PWARD": ["12"], "PVILLAGE": ["4"], "PHAMLET": ["5"],
+    }, dtype=object)
+
+    codes, overflow = geocoder.build_codes(data)
+
+    assert codes["CODE1"].tolist() == ["07012"]
+    assert codes["CODE2"].tolist() == ["010301204005"]
+    assert overflow.tolist() == [""]
+
+
+def test_validate_schema_rejects_bad_widths():
+    with pytest.raises(ValueError):
+        geocoder.validate_schema({"CODE1": [{"column": "PREGION", "width": 0}]})
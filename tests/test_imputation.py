@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import imputation
+
+
+def _households():
+    # One ward and village; hamlet 002 has no coordinates, hamlet 004 a point far from the rest
+    return pd.DataFrame({
+        "PREGION": ["07"] * 8,
+        "PDISTRICT": ["01"] * 8,
+        "PWARD": ["001"] * 8,
+        "PVILLAGE": ["01"] * 8,
+        "PHAMLET": ["001", "001", "001", "002", "003", "003", "004", "005"],
+        "LAT": [-6.00, -6.02, np.nan, np.nan, -6.04, -6.06, -3.0, 200.0],
+        "LON": [35.00, 35.02, np.nan, np.nan, 35.04, 35.06, 38.0, 35.0],
+    })
+
+
+def test_fills_from_the_most_local_group_with_coordinates():
+    data = _households()
+
+    report = imputation.impute_coordinates(data, "LAT", "LON")
+
+    assert report["out_of_bounds"] == 1
+    assert report["outliers"] == 1
+    assert report["filled"] == {"hamlet": 1, "village": 3}
+    assert report["unfilled"] == 0
+    # Hamlet 001 median for row 2; the village median of the observed points for the rest
+    assert data.loc[2, "LAT"] == pytest.approx(-6.01)
+    assert data.loc[3, "LAT"] == pytest.approx(-6.03)
+    assert data.loc[6, ["LAT", "LON"]].tolist() == pytest.approx([-6.03, 35.03])
+    assert data.loc[7, "LAT"] == pytest.approx(-6.03)
+    assert data[imputation.STATUS_COLUMN].tolist() == [
+        "", "", "filled:hamlet", "filled:village", "", "", "outlier;filled:village", "out_of_bounds;filled:village",
+    ]
+
+
+def test_outliers_can_be_kept():
+    data = _households()
+
+    report = imputation.impute_coordinates(data, "LAT", "LON", replace_outliers=False)
+
+    assert report["outliers"] == 1
+    assert data.loc[6, ["LAT", "LON"]].tolist() == [-3.0, 38.0]
+    assert data.loc[6, imputation.STATUS_COLUMN] == "outlier"
+
+
+def test_equal_hamlet_numbers_in_other_villages_are_other_groups():
+    data = pd.DataFrame({"PVILLAGE": ["01", "01", "02"], "PHAMLET": ["001", "001", "001"]})
+
+    codes = imputation.group_codes(data)
+
+    assert codes["PHAMLET"][0] == codes["PHAMLET"][1] != codes["PHAMLET"][2]
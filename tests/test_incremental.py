@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+import pytest
+
+import engine
+import incremental
+
+pytestmark = pytest.mark.skipif(not engine.HAS_PYARROW, reason="pyarrow is not installed")
+
+COLUMNS = ["HHID", "PREGION", "PDISTRICT", "PCOUNCIL", "PCONSTITUENCY", "PDIVISION", "PWARD", "PVILLAGE", "PHAMLET",
+           "LAT", "LON"]
+
+
+def _delta(tmp_path, name, rows):
+    path = tmp_path / name
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+    return str(path)
+
+
+def _run(delta_path, output_path):
+    return incremental.process_delta(delta_path, output_path, pregion_value="07", lat_col="LAT", lon_col="LON",
+                                     method="mean", key_column="HHID")
+
+
+def test_process_delta_over_two_deltas(tmp_path):
+    output = str(tmp_path / "master.csv")
+    first = _delta(tmp_path, "day1.csv", [
+        ["H1", "07", "01", "1", "01", "01", "001", "01", "001", "-6.0", "35.0"],
+        ["H2", "07", "01", "1", "01", "01", "001", "01", "002", "-8.0", "37.0"],
+        ["H3", "07", "02", "1", "01", "02", "003", "01", "001", "", ""],
+    ])
+    second = _delta(tmp_path, "day2.csv", [
+        # Processed already, a correction of H2, a new row and a row to fill
+        ["H1", "07", "01", "1", "01", "01", "001", "01", "001", "-6.0", "35.0"],
+        ["H2", "07", "01", "1", "01", "01", "001", "01", "002", "-7.0", "37.0"],
+        ["H4", "07", "12", "2", "03", "04", "105", "06", "007", "-5.0", "39.0"],
+        ["H5", "07", "12", "2", "03", "04", "105", "06", "007", "", ""],
+    ])
+
+    report = _run(first, output)
+    assert (report["new"], report["changed"], report["skipped"]) == (3, 0, 0)
+    size = os.path.getsize(output)
+
+    report = _run(second, output)
+    assert (report["new"], report["changed"], report["skipped"]) == (2, 1, 1)
+    assert os.path.getsize(output) > size
+
+    result = pd.read_csv(output, dtype=str).set_index("HHID")
+    assert sorted(result.index) == ["H1", "H2", "H3", "H4", "H5"]
+    assert result.loc["H2", "LAT"] == "-7.0"
+    # Codes match a full run over the same rows
+    expected = engine.generate_geocode(pd.read_csv(second, dtype=object), "07").set_index("HHID")
+    for key in ("H2", "H4", "H5"):
+        assert result.loc[key, "CODE1"] == expected.loc[key, "CODE1"]
+        assert result.loc[key, "CODE2"] == expected.loc[key, "CODE2"]
+    # H3 was filled from the mean of day 1; H5 from the mean of every row seen by day 2
+    assert float(result.loc["H3", "LAT"]) == pytest.approx(-7.0)
+    assert float(result.loc["H5", "LAT"]) == pytest.approx((-6.0 - 8.0 - 7.0 - 5.0) / 4)
+
+    report = _run(second, output)
+    assert (report["new"], report["changed"], report["skipped"]) == (0, 0, 4)
+
+
+def test_changed_output_is_detected(tmp_path):
+    output = str(tmp_path / "master.csv")
+    first = _delta(tmp_path, "day1.csv", [["H1", "07", "01", "1", "01", "01", "001", "01", "001", "-6.0", "35.0"]])
+    _run(first, output)
+    with open(output, "a") as file:
+        file.write("edited by hand\n")
+
+    with pytest.raises(ValueError, match="has changed"):
+        _run(first, output)
+
+
+def test_corrections_cut_only_the_old_lines(tmp_path):
+    output = str(tmp_path / "master.csv")
+    rows = [["H%d" % i, "07", "01", "1", "01", "01", "001", "01", "%03d" % i, "-6.0", "35.0"] for i in range(1, 6)]
+    _run(_delta(tmp_path, "day1.csv", rows), output)
+    # Correct the first and the last row, then the corrected first row again
+    first = rows[0][:-2] + ["-7.0", "35.0"]
+    last = rows[4][:-2] + ["-8.0", "35.0"]
+    assert _run(_delta(tmp_path, "day2.csv", [first, last]), output)["changed"] == 2
+    assert _run(_delta(tmp_path, "day3.csv", [first[:-2] + ["-9.0", "35.0"]]), output)["changed"] == 1
+
+    result = pd.read_csv(output, dtype=str)
+    assert sorted(result["HHID"]) == ["H1", "H2", "H3", "H4", "H5"]
+    assert result.set_index("HHID")["LAT"].to_dict() == {"H1": "-9.0", "H2": "-6.0", "H3": "-6.0", "H4": "-6.0",
+                                                         "H5": "-8.0"}
+    # Unchanged rows keep their order; replacements follow them
+    assert result["HHID"].tolist() == ["H2", "H3", "H4", "H5", "H1"]
+    report = _run(_delta(tmp_path, "day4.csv", [rows[2]]), output)
+    assert (report["new"], report["changed"], report["skipped"]) == (0, 0, 1)
@@ -0,0 +1,47 @@
+import pytest
+
+import instrumentation
+
+
+def test_stages_nest_and_add_up():
+    trace = instrumentation.Trace("job")
+    with instrumentation.tracing(trace):
+        with instrumentation.stage("split") as split:
+            split.rows = 10
+            for _ in range(3):
+                with instrumentation.stage("save"):
+                    instrumentation.add_bytes(written=100)
+
+    records = {record.path: record for record in trace.records.values()}
+    assert list(records) == ["split", "split/save"]
+    assert records["split/save"].calls == 3
+    assert records["split/save"].bytes_written == 300
+    assert records["split"].bytes_written == 300
+    assert records["split"].rows == 10
+
+
+def test_stage_reports_peak_growth_without_resetting(monkeypatch):
+    def reset():
+        raise AssertionError("stages must not reset the process peak")
+
+    # The process peak read at each stage entry and exit
+    peaks = iter([100.0, 100.0, 250.0, 250.0])
+    monkeypatch.setattr(instrumentation, "reset_peak_rss", reset)
+    monkeypatch.setattr(instrumentation, "peak_rss_mb", lambda: next(peaks))
+    trace = instrumentation.Trace("job")
+    with instrumentation.tracing(trace):
+        with instrumentation.stage("load"):
+            with instrumentation.stage("parse"):
+                pass
+
+    load, parse = trace.records["load"], trace.records["load/parse"]
+    assert parse.peak_growth_mb == pytest.approx(150.0)
+    assert load.peak_growth_mb == pytest.approx(150.0)
+    assert load.peak_rss_mb == pytest.approx(250.0)
+    assert "150 MB" in trace.summary()
+
+
+def test_stage_outside_a_trace_just_runs():
+    with instrumentation.stage("load") as current:
+        current.rows = 5
+    assert instrumentation.active_trace() is None
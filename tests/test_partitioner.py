@@ -0,0 +1,19 @@
+import pandas as pd
+
+import partitioner
+
+
+def test_partition_matches_groupby_order():
+    data = pd.DataFrame({
+        "PDISTRICT": ["02", "01", "02", None, "01", "10"],
+        "PWARD": ["003", "001", "001", "002", "001", None],
+        "ROW": range(6),
+    })
+
+    partitioning = partitioner.partition(data, ["PDISTRICT", "PWARD"])
+
+    groups = [(key, group["ROW"].tolist()) for key, group in partitioning]
+    expected = [(key, group["ROW"].tolist()) for key, group in data.groupby(["PDISTRICT", "PWARD"])]
+    assert groups == expected
+    assert partitioning.invalid_rows()["ROW"].tolist() == [3, 5]
+    assert partitioning.ngroups == 3
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import recipe
+
+JSON_RECIPE = """
+{
+  "format": "csv",
+  "steps": [
+    {"op": "replace", "value": "NA", "tokens": ["#NULL!"]},
+    {"op": "fixcoords", "lat": "LAT", "lon": "LON", "method": "mean", "bounds": "-12,-1,29,41"},
+    {"op": "split", "column": "PDISTRICT"}
+  ]
+}
+"""
+
+YAML_RECIPE = """
+format: csv
+steps:
+  - op: replace
+    value: NA
+    tokens: ["#NULL!"]
+  - op: fixcoords
+    lat: LAT
+    lon: LON
+    method: mean
+    bounds: [-12, -1, 29, 41]
+  - op: split
+    column: PDISTRICT
+"""
+
+ROWS = [
+    "PREGION,PDISTRICT,PCOUNCIL,PCONSTITUENCY,PDIVISION,PWARD,PVILLAGE,PHAMLET,NAME,LAT,LON",
+    "07,007,1,01,01,012,01,001,Amani,-6.5,35.1",
+    "07,01,2,02,03,004,02,003,#NULL!,35.2,-6.4",
+    "07,007,1,01,02,012,03,002,Chiku,,",
+    "07,01,2,02,03,005,01,001,Dalila,-7.0,36.0",
+    "07,007,1,01,01,013,01,004,Esha,-6.9,35.5",
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "census.csv"
+    path.write_text("\n".join(ROWS) + "\n")
+    return str(path)
+
+
+def _group_files(folder):
+    return {name: open(os.path.join(folder, name), "rb").read() for name in os.listdir(folder)
+            if name.endswith(".csv") and name != "Invalid_Rows.csv"}
+
+
+def test_json_and_yaml_recipes_are_the_same():
+    if not recipe.HAS_YAML:
+        pytest.skip("PyYAML is not installed")
+    assert recipe.parse_recipe(YAML_RECIPE, yaml_format=True) == recipe.parse_recipe(JSON_RECIPE)
+
+
+def test_in_memory_and_chunked_runs_write_the_same_files(tmp_path, source):
+    parsed = recipe.parse_recipe(JSON_RECIPE)
+
+    in_memory = recipe.run_recipe(parsed, source, str(tmp_path / "memory"))
+    chunked = recipe.run_recipe(parsed, source, str(tmp_path / "chunked"), chunksize=2)
+
+    files = _group_files(in_memory)
+    assert sorted(files) == ["007.csv", "01.csv"]
+    assert files == _group_files(chunked)
+    text = files["01.csv"].decode()
+    assert "NA" in text and "-6.4,35.2,swapped" in text
+    assert ",012," in files["007.csv"].decode()
+
+
+def test_invalid_recipes_raise():
+    with pytest.raises(ValueError, match="Unknown recipe operation"):
+        recipe.parse_recipe('{"steps": [{"op": "sort"}]}')
+    with pytest.raises(ValueError, match="needs"):
+        recipe.parse_recipe('{"steps": [{"op": "geocode"}]}')
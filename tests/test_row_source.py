@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import row_source
+
+pytestmark = pytest.mark.skipif(not row_source.HAS_PYARROW, reason="pyarrow is not installed")
+
+
+@pytest.fixture
+def data():
+    rows = 1000
+    return pd.DataFrame({
+        "ROW": np.arange(rows),
+        "NAME": [f"HOUSEHOLD {i}" for i in range(rows)],
+        "LAT": np.random.default_rng(0).uniform(-11, -1, size=rows),
+    })
+
+
+@pytest.fixture(params=["feather", "parquet"])
+def source(request, tmp_path, data):
+    path = str(tmp_path / f"data.{request.param}")
+    if request.param == "feather":
+        # Small batches, so pages span several of them
+        data.to_feather(path, chunksize=128)
+    else:
+        data.to_parquet(path, row_group_size=128)
+    return row_source.open_file_source(path)
+
+
+def test_pages_across_chunks(source, data):
+    view = row_source.RowView(source)
+
+    assert len(view) == len(data)
+    positions, page = view.page(120, 140)
+    assert positions.tolist() == list(range(120, 140))
+    assert page["ROW"].tolist() == list(range(120, 140))
+    _, last = view.page(990, 1010)
+    assert last["NAME"].tolist() == data["NAME"].iloc[990:].tolist()
+
+
+def test_sort_and_filter(source, data):
+    view = row_source.RowView(source)
+
+    view.sort("LAT", ascending=False)
+    _, page = view.page(0, 50)
+    expected = data.sort_values("LAT", ascending=False, kind="stable")["ROW"].head(50)
+    assert page["ROW"].tolist() == expected.tolist()
+
+    view.reset()
+    assert view.filter("NAME", "household 99") == 11
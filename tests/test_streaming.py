@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+import pytest
+
+import streaming
+
+
+def test_stream_split_by_column_matches_in_memory_keys(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("PDISTRICT,NAME\n007,Amani\n01,Baraka\n007,Chiku\n,Dalila\n")
+    target = tmp_path / "split"
+
+    assert streaming.stream_split_by_column(str(source), "PDISTRICT", str(target), chunksize=2) == 2
+    assert pd.read_csv(target / "007.csv", dtype=str)["NAME"].tolist() == ["Amani", "Chiku"]
+    assert pd.read_csv(target / "Invalid_Rows.csv", dtype=str)["NAME"].tolist() == ["Dalila"]
+
+
+def test_stream_fix_coordinates_matches_bounds_repair(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("LAT,LON\n-6.5,35.1\n35.2,-6.4\n,\n-7.0,36.0\n")
+    target = tmp_path / "fixed.csv"
+    counts = {}
+
+    streaming.stream_fix_coordinates(str(source), str(target), "LAT", "LON", chunksize=2, counts=counts,
+                                     bounds=(-12, -1, 29, 41))
+
+    result = pd.read_csv(target)
+    assert result["LAT"].iloc[1] == -6.4 and result["LON"].iloc[1] == 35.2
+    assert result["COORD_PARSE"].tolist() == ["ok", "swapped", "missing", "ok"]
+    assert result["LAT"].iloc[2] == pytest.approx((-6.5 - 6.4 - 7.0) / 3)
+    assert counts["swapped"] == 1
+
+
+def _parts(folder):
+    names = sorted(os.listdir(folder), key=lambda name: int(name[len("Part_"):-len(".csv")]))
+    return [(folder / name).read_bytes() for name in names]
+
+
+@pytest.mark.parametrize("buffer_bytes", [7, 64, streaming.SCAN_BUFFER_BYTES])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_split_csv_rows_keeps_quoted_newlines(tmp_path, buffer_bytes, workers):
+    source = tmp_path / "data.csv"
+    source.write_bytes(
+        b'ID,NAME,NOTE\n'
+        b'1,Amani,"two\nlines"\n'
+        b'2,"Baraka, Jr",plain\n'
+        b'3,Chiku,"quote "" and\r\nCRLF"\n'
+        b'4,Dalila,last'
+    )
+    target = tmp_path / "parts"
+
+    count = streaming.split_csv_rows(str(source), 2, str(target), workers=workers, buffer_bytes=buffer_bytes)
+
+    assert count == 2
+    header = b'ID,NAME,NOTE\n'
+    assert _parts(target) == [
+        header + b'1,Amani,"two\nlines"\n2,"Baraka, Jr",plain\n',
+        header + b'3,Chiku,"quote "" and\r\nCRLF"\n4,Dalila,last',
+    ]
+    whole = pd.read_csv(source, dtype=str)
+    parts = pd.concat([pd.read_csv(target / f"Part_{i}.csv", dtype=str) for i in (1, 2)], ignore_index=True)
+    pd.testing.assert_frame_equal(parts, whole)
+
+
+def test_split_csv_rows_crlf_and_exact_multiple(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_bytes(b"A,B\r\n1,x\r\n2,y\r\n3,z\r\n4,w\r\n")
+    target = tmp_path / "parts"
+
+    assert streaming.split_csv_rows(str(source), 2, str(target), buffer_bytes=5) == 2
+    assert _parts(target) == [b"A,B\r\n1,x\r\n2,y\r\n", b"A,B\r\n3,z\r\n4,w\r\n"]
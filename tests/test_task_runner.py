@@ -0,0 +1,58 @@
+import time
+
+import pandas as pd
+
+import engine
+import task_runner
+
+
+class _Root:
+    # Stands in for the Tk root; the test drains the queue itself
+    def after(self, delay, callback):
+        pass
+
+
+def _wait_idle(runner, timeout=10):
+    deadline = time.monotonic() + timeout
+    while runner.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not runner.pending_count()
+
+
+def test_cancel_stops_replace_nulls_partway():
+    lines = []
+    runner = task_runner.TaskRunner(_Root(), lines.append, lambda value, color: None)
+    data = pd.DataFrame({f"COL{i}": ["", "x"] for i in range(10)}, dtype=object)
+
+    def work(task):
+        def progress(value):
+            # The user presses Cancel while the third column is replaced
+            if value >= 30:
+                task.cancel()
+            task.progress(value)
+        return engine.replace_nulls(data, "NA", progress_callback=progress)
+
+    runner.submit("Replace", work, on_success=lambda result: lines.append("succeeded"))
+    _wait_idle(runner)
+    runner._drain()
+
+    log = "\n".join(lines)
+    assert "Cancelled: Replace" in log
+    assert "succeeded" not in log
+    assert data[["COL0", "COL1", "COL2"]].iloc[0].tolist() == ["NA", "NA", "NA"]
+    assert data["COL3"].iloc[0] == ""
+    assert data["COL9"].iloc[0] == ""
+
+
+def test_cancelled_queued_task_never_starts():
+    lines = []
+    runner = task_runner.TaskRunner(_Root(), lines.append, lambda value, color: None)
+    started = []
+    runner.submit("First", lambda task: time.sleep(0.1))
+    second = runner.submit("Second", lambda task: started.append(task.name))
+    second.cancel()
+    _wait_idle(runner)
+    runner._drain()
+
+    assert started == []
+    assert "Cancelled before it started: Second" in "\n".join(lines)
@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+import pytest
+
+import engine
+import writer_pool
+
+
+def _census(rows=600):
+    return pd.DataFrame({
+        "PDISTRICT": [f"{i % 7:02d}" for i in range(rows)],
+        "NAME": [f"Household {i}" for i in range(rows)],
+        "LAT": [-6.0 - i / 1000 for i in range(rows)],
+    })
+
+
+def _files(folder):
+    # Every output file by relative path; the manifest lists files in completion order, so it is left out
+    contents = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if not name.startswith("."):
+                path = os.path.join(root, name)
+                with open(path, "rb") as file:
+                    contents[os.path.relpath(path, folder)] = file.read()
+    return contents
+
+
+@pytest.mark.parametrize("executor", writer_pool.EXECUTORS)
+def test_parallel_split_is_byte_identical_to_serial(tmp_path, executor):
+    file_types = ["csv", "parquet"] if engine.HAS_PYARROW else ["csv"]
+    for file_type in file_types:
+        serial, parallel = tmp_path / f"serial-{file_type}", tmp_path / f"parallel-{file_type}"
+        engine.split_by_column(_census(), "PDISTRICT", file_type, "folder", str(serial), resume=False)
+        engine.split_by_column(_census(), "PDISTRICT", file_type, "folder", str(parallel), workers=3,
+                               executor=executor, resume=False)
+
+        expected = _files(serial)
+        assert len(expected) == 7
+        assert _files(parallel) == expected
+
+
+def _write_text(data, file_name):
+    with open(file_name, "w") as file:
+        file.write(data)
+    return len(data)
+
+
+def test_a_failing_callback_stops_dispatching_and_records_finished_writes(tmp_path):
+    partitions = ((str(tmp_path / f"{i}.txt"), "x" * i) for i in range(1, 41))
+    recorded = []
+
+    def progress(percent):
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError, match="cancelled"):
+        writer_pool.write_partitions(partitions, _write_text, workers=2, executor="thread", total=40,
+                                     progress_callback=progress,
+                                     result_callback=lambda file_name, size: recorded.append(file_name))
+
+    written = sorted(name for name in os.listdir(tmp_path))
+    assert 1 <= len(written) < 40
+    # Every file that was completed was passed on, so a checkpoint can record it
+    assert sorted(os.path.basename(name) for name in recorded) == written
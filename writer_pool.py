@@ -0,0 +1,110 @@
+"""
+Parallel export stage for writing many output files.
+
+Each file is written by the same function the serial path uses, just on a
+worker thread or process, so every output file is byte-identical to what a
+serial export would produce. Log and progress updates are raised from the
+calling thread as writes complete, so callers see one ordered stream of
+messages whatever the worker count.
+
+If a log or progress callback raises (e.g. because the user cancelled),
+no further partitions are dispatched: queued writes are dropped, the writes
+already running are allowed to finish, and their results are still passed
+to `result_callback` so a checkpoint can record them.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+
+EXECUTORS = ("process", "thread")
+
+
+def default_workers():
+    """
+    Return the default number of writer workers: one per CPU, at most 8.
+    """
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+def write_partitions(partitions, write_function, workers=1, executor="process",
+                     log_callback=None, progress_callback=None, total=None, result_callback=None):
+    """
+    Write (file name, DataFrame) pairs with `write_function(data, file_name)`.
+
+    Parameters:
+    - partitions: Iterable of (file name, DataFrame) pairs. It is consumed
+      lazily and at most two writes per worker are queued at a time, so only
+      a bounded number of partitions is held in memory.
+    - write_function: Module-level function taking (data, file_name). It
+      must be picklable when `executor` is 'process'.
+    - workers: Number of parallel writers; 1 writes serially in this thread.
+    - executor: 'process' to write in worker processes (needed for real
+      parallelism, since pandas formatting holds the GIL) or 'thread'.
+    - log_callback: Optional function receiving 'Saved: <file>' messages.
+    - progress_callback: Optional function receiving a 0-100 percentage.
+    - total: Number of partitions, used for progress.
+    - result_callback: Optional function called in this thread with
+      (file name, return value of `write_function`) after each write,
+      before it is reported.
+
+    Returns:
+    - int: Number of files written.
+
+    Raises:
+    - Exception: The first error raised by a write or a callback. Queued
+      writes are cancelled.
+    """
+    log = log_callback or (lambda message: None)
+    progress = progress_callback or (lambda percent: None)
+    record = result_callback or (lambda file_name, result: None)
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}'. Choose one of: {', '.join(EXECUTORS)}.")
+
+    done_count = 0
+
+    def report(file_name, result):
+        nonlocal done_count
+        record(file_name, result)
+        done_count += 1
+        if total:
+            progress(int(done_count * 100 / total))
+        log(f"Saved: {file_name}")
+
+    if workers <= 1:
+        for file_name, data in partitions:
+            report(file_name, write_function(data, file_name))
+        return done_count
+
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    max_pending = workers * 2
+    pending = {}
+    with pool_class(max_workers=workers) as pool:
+        try:
+            for file_name, data in partitions:
+                if len(pending) >= max_pending:
+                    _collect(pending, report)
+                pending[pool.submit(write_function, data, file_name)] = file_name
+            while pending:
+                _collect(pending, report)
+        except BaseException:
+            _stop(pending, record)
+            raise
+    return done_count
+
+
+def _collect(pending, report):
+    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in finished:
+        file_name = pending.pop(future)
+        report(file_name, future.result())
+
+
+def _stop(pending, record):
+    # Drop the queued writes and record the ones that still complete
+    running = [future for future in pending if not future.cancel()]
+    for future in wait(running).done:
+        if future.exception() is None:
+            try:
+                record(pending[future], future.result())
+            except Exception:
+                pass